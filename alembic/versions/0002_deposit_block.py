@@ -0,0 +1,24 @@
+"""deposit block
+
+Revision ID: 0002_deposit_block
+Revises: 0001_initial
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002_deposit_block"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("escrows", sa.Column("deposit_block", sa.BigInteger()))
+
+
+def downgrade() -> None:
+    op.drop_column("escrows", "deposit_block")
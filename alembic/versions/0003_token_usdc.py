@@ -0,0 +1,27 @@
+"""token usdc
+
+Revision ID: 0003_token_usdc
+Revises: 0002_deposit_block
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003_token_usdc"
+down_revision = "0002_deposit_block"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE token ADD VALUE IF NOT EXISTS 'USDC'")
+
+
+def downgrade() -> None:
+    # Postgres cannot drop a single enum value; rebuild the type without it.
+    op.execute("ALTER TYPE token RENAME TO token_old")
+    op.execute("CREATE TYPE token AS ENUM ('USDT')")
+    op.execute("ALTER TABLE escrows ALTER COLUMN token TYPE token USING token::text::token")
+    op.execute("DROP TYPE token_old")
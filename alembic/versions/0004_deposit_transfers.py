@@ -0,0 +1,57 @@
+"""deposit transfers
+
+Revision ID: 0004_deposit_transfers
+Revises: 0003_token_usdc
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004_deposit_transfers"
+down_revision = "0003_token_usdc"
+branch_labels = None
+depends_on = None
+
+
+chain_enum = postgresql.ENUM("TRC20", "BEP20", name="chain", create_type=False)
+token_enum = postgresql.ENUM("USDT", "USDC", name="token", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "deposit_transfers",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("escrow_id", sa.UUID(), sa.ForeignKey("escrows.id"), nullable=False),
+        sa.Column("chain", chain_enum, nullable=False),
+        sa.Column("token", token_enum, nullable=False),
+        sa.Column("tx_hash", sa.String(length=128), nullable=False),
+        sa.Column("log_index", sa.Integer(), nullable=False),
+        sa.Column("block_number", sa.BigInteger(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("chain", "tx_hash", "log_index", name="uq_deposit_transfer"),
+    )
+    op.create_index("ix_deposit_transfers_escrow_id", "deposit_transfers", ["escrow_id"])
+    # Deposits are unique per transfer now; one transaction may fund several escrows.
+    op.drop_constraint("uq_chain_deposit_tx", "escrows", type_="unique")
+    # Deposits recorded before the ledger existed have no log index; -1 keeps them distinct.
+    op.execute(
+        """
+        INSERT INTO deposit_transfers
+            (escrow_id, chain, token, tx_hash, log_index, block_number, amount, created_at)
+        SELECT id, chain, token, deposit_tx_hash, -1, COALESCE(deposit_block, 0),
+            amount_received, updated_at
+        FROM escrows
+        WHERE deposit_tx_hash IS NOT NULL AND amount_received IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.create_unique_constraint("uq_chain_deposit_tx", "escrows", ["chain", "deposit_tx_hash"])
+    op.drop_index("ix_deposit_transfers_escrow_id", table_name="deposit_transfers")
+    op.drop_table("deposit_transfers")
@@ -0,0 +1,27 @@
+"""amount tagged deposits
+
+Revision ID: 0005_amount_tagged
+Revises: 0004_deposit_transfers
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_amount_tagged"
+down_revision = "0004_deposit_transfers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "escrows",
+        sa.Column("amount_tagged", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("escrows", "amount_tagged")
@@ -0,0 +1,48 @@
+"""payout jobs
+
+Revision ID: 0006_payout_jobs
+Revises: 0005_amount_tagged
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006_payout_jobs"
+down_revision = "0005_amount_tagged"
+branch_labels = None
+depends_on = None
+
+
+chain_enum = postgresql.ENUM("TRC20", "BEP20", name="chain", create_type=False)
+job_status_enum = sa.Enum("QUEUED", "RUNNING", "SENT", "FAILED", name="payoutjobstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payout_jobs",
+        sa.Column("id", sa.UUID(), primary_key=True),
+        sa.Column("escrow_id", sa.UUID(), sa.ForeignKey("escrows.id"), nullable=False),
+        sa.Column("chain", chain_enum, nullable=False),
+        sa.Column("payout_address", sa.String(length=128), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("status", job_status_enum, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("tx_hash", sa.String(length=128), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_payout_jobs_escrow_id", "payout_jobs", ["escrow_id"])
+    op.create_index("ix_payout_jobs_status", "payout_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payout_jobs_status", table_name="payout_jobs")
+    op.drop_index("ix_payout_jobs_escrow_id", table_name="payout_jobs")
+    op.drop_table("payout_jobs")
+    job_status_enum.drop(op.get_bind(), checkfirst=True)
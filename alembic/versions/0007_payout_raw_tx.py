@@ -0,0 +1,24 @@
+"""signed payout transactions
+
+Revision ID: 0007_payout_raw_tx
+Revises: 0006_payout_jobs
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007_payout_raw_tx"
+down_revision = "0006_payout_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("payout_jobs", sa.Column("raw_tx", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("payout_jobs", "raw_tx")
@@ -0,0 +1,32 @@
+"""payout job token
+
+Revision ID: 0008_payout_token
+Revises: 0007_payout_raw_tx
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008_payout_token"
+down_revision = "0007_payout_raw_tx"
+branch_labels = None
+depends_on = None
+
+
+token_enum = postgresql.ENUM("USDT", "USDC", name="token", create_type=False)
+
+
+def upgrade() -> None:
+    # Every job queued before this column existed paid out USDT.
+    op.add_column(
+        "payout_jobs",
+        sa.Column("token", token_enum, nullable=False, server_default="USDT"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("payout_jobs", "token")
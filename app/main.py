@@ -30,8 +30,11 @@ from trustora.config_service import get_config, update_config
 from trustora.db import create_engine, create_session_factory
 from trustora.enums import Chain, DisputeStatus, EscrowStatus, MessageRole, MessageType, Token
 from trustora.escrow import get_escrow_for_update, transition_escrow
+from trustora.events import consume_escrow_events, consumer_name, publish_escrow_event
 from trustora.fees import DEFAULT_FEE_SNAPSHOT, calculate_fee, calculate_net
-from trustora.models import Dispute, Escrow, Message as EscrowMessage, User
+from trustora.models import Dispute, Escrow, User
+from trustora.models import Message as EscrowMessage
+from trustora.notifications import build_status_notifications
 from trustora.reviews import build_review_post, user_public_hash
 from trustora.security import SignedRequest, generate_nonce, sign_hmac
 from trustora.state_machine import validate_transition
@@ -92,18 +95,18 @@ def generate_room_code() -> str:
     return f"{prefix}-{suffix}"
 
 
-async def request_deposit_address(settings, chain: Chain) -> str:
-    payload = {"chain": chain.value}
+async def request_deposit_address(settings, chain: Chain, amount: float) -> tuple[str, float, bool]:
+    payload = {"chain": chain.value, "amount": amount}
     timestamp = int(datetime.utcnow().timestamp())
     nonce = generate_nonce()
-    message = f"address|{chain.value}|{timestamp}|{nonce}"
+    message = f"address|{chain.value}|{amount}|{timestamp}|{nonce}"
     signature = sign_hmac(settings.signer_hmac_secret, message)
     payload.update({"timestamp": timestamp, "nonce": nonce, "signature": signature})
     async with httpx.AsyncClient(timeout=10) as client:
         response = await client.post(f"{settings.signer_base_url}/address", json=payload)
         response.raise_for_status()
         data = response.json()
-        return data["address"]
+        return data["address"], float(data.get("amount") or amount), bool(data.get("amount_tagged"))
 
 
 async def handle_start(message: Message, state: FSMContext, session_factory, settings) -> None:
@@ -185,14 +188,16 @@ async def confirm_network(
     state: FSMContext,
     session_factory,
     settings,
+    redis: Redis,
 ) -> None:
     if message.text != "I Understand":
         await message.answer("Please confirm by tapping 'I Understand'.")
         return
     data = await state.get_data()
     chain = Chain(data["chain"])
-    deposit_address = await request_deposit_address(settings, chain)
-    amount_expected = float(data["amount"])
+    deposit_address, amount_expected, amount_tagged = await request_deposit_address(
+        settings, chain, float(data["amount"])
+    )
     async with session_factory() as session:
         async with session.begin():
             config = await get_config(session)
@@ -212,6 +217,7 @@ async def confirm_network(
                 chain=chain,
                 token=Token.USDT,
                 amount_expected=amount_expected,
+                amount_tagged=amount_tagged,
                 amount_received=None,
                 fee_snapshot_json={
                     "flat_fee": snapshot.flat_fee,
@@ -231,12 +237,14 @@ async def confirm_network(
                 updated_at=datetime.utcnow(),
             )
             session.add(escrow)
+    await publish_escrow_event(redis, escrow)
     await state.clear()
+    exact = "Send this exact amount, it identifies your deposit.\n" if amount_tagged else ""
     await message.answer(
         f"Escrow created. Room: {escrow.room_code}\n"
         f"Deposit Address: `{escrow.deposit_address}`\n"
         f"Amount: {escrow.amount_expected} USDT\n"
-        f"Network: {escrow.chain.value}\n",
+        f"Network: {escrow.chain.value}\n" + exact,
         parse_mode=ParseMode.MARKDOWN,
         reply_markup=MENU,
     )
@@ -397,20 +405,18 @@ async def approve_and_send_payout(
     )
     signature = sign_hmac(settings.signer_hmac_secret, signed.message())
     payload = signed.__dict__ | {"signature": signature}
+    # The signer queues the payout and answers right away; the escrow event stream reports
+    # when it has been sent.
     async with httpx.AsyncClient(timeout=10) as client:
         response = await client.post(f"{settings.signer_base_url}/payout", json=payload)
         response.raise_for_status()
-        tx_data = response.json()
-    async with session_factory() as session:
-        async with session.begin():
-            escrow = await get_escrow_for_update(session, escrow_id)
-            escrow.payout_tx_hash = tx_data["tx_hash"]
-            await transition_escrow(session, escrow, EscrowStatus.PAYOUT_SENT)
-            await transition_escrow(session, escrow, EscrowStatus.COMPLETED)
+        job = response.json()
     if callback:
-        await callback.message.answer("Payout sent. Escrow completed.")
+        if job.get("tx_hash"):
+            await callback.message.answer("Payout already sent.")
+        else:
+            await callback.message.answer("Payout queued. You will be notified once it is sent.")
         await callback.answer()
-    await prompt_reviews(callback, session_factory, settings, escrow_id)
 
 
 async def open_dispute(callback: CallbackQuery, session_factory) -> None:
@@ -436,15 +442,14 @@ async def open_dispute(callback: CallbackQuery, session_factory) -> None:
     await callback.answer()
 
 
-async def prompt_reviews(callback: CallbackQuery | None, session_factory, settings, escrow_id: uuid.UUID) -> None:
+async def prompt_reviews(bot: Bot | None, session_factory, settings, escrow_id: uuid.UUID) -> None:
     async with session_factory() as session:
         result = await session.execute(select(Escrow).where(Escrow.id == escrow_id))
         escrow = result.scalar_one()
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[[InlineKeyboardButton(text="Leave Review", callback_data=f"review:{escrow.id}")]]
     )
-    if callback:
-        bot = callback.message.bot
+    if bot:
         await bot.send_message(escrow.buyer_tg_id, "Leave a review for this escrow.", reply_markup=keyboard)
         await bot.send_message(escrow.seller_tg_id, "Leave a review for this escrow.", reply_markup=keyboard)
 
@@ -867,7 +872,7 @@ async def handle_admin_search(message: Message, session_factory) -> None:
                             | (Escrow.payout_tx_hash == query)
                         )
                     )
-                    escrow = result.scalar_one_or_none()
+                    escrow = result.scalars().first()
         if not escrow:
             await message.answer("No escrow found.")
             return
@@ -950,6 +955,29 @@ async def handle_admin_broadcast(message: Message, session_factory, redis: Redis
             continue
     await message.answer("Broadcast sent to opt-in users.")
 
+
+async def notify_escrow_event(bot: Bot, session_factory, event: dict) -> None:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Escrow).where(Escrow.id == uuid.UUID(event["escrow_id"]))
+        )
+        escrow = result.scalar_one_or_none()
+    if escrow is None:
+        return
+    notifications = build_status_notifications(
+        EscrowStatus(event["status"]),
+        escrow.room_code,
+        escrow.amount_expected,
+        escrow.buyer_tg_id,
+        escrow.seller_tg_id,
+    )
+    for tg_id, text in notifications:
+        try:
+            await bot.send_message(tg_id, text)
+        except Exception as exc:
+            logging.warning("notification to %s failed: %s", tg_id, exc)
+
+
 async def create_app() -> None:
     settings = load_settings()
     engine = create_engine(settings.database_url)
@@ -1000,7 +1028,18 @@ async def create_app() -> None:
 
     dp.workflow_data.update(session_factory=session_factory, settings=settings, redis=redis)
 
-    await dp.start_polling(bot)
+    async def on_event(event: dict) -> None:
+        await notify_escrow_event(bot, session_factory, event)
+        if event["status"] == EscrowStatus.COMPLETED.value:
+            await prompt_reviews(bot, session_factory, settings, uuid.UUID(event["escrow_id"]))
+
+    notifier = asyncio.create_task(
+        consume_escrow_events(redis, "bot-notifier", consumer_name(), on_event)
+    )
+    try:
+        await dp.start_polling(bot)
+    finally:
+        notifier.cancel()
 
 
 if __name__ == "__main__":
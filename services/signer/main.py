@@ -1,30 +1,63 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import logging
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
 from aiohttp import web
+from eth_account import Account
 from redis.asyncio import Redis
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
-from tronpy import Tron
-from tronpy.providers import HTTPProvider
+from tronpy import AsyncTron
 from tronpy.keys import PrivateKey as TronPrivateKey
+from tronpy.providers import AsyncHTTPProvider
+from web3 import Web3
 
+from services.signer.settings import load_settings
+from trustora.address_pool import DepositAddressPool, apply_pool_event
+from trustora.chain_client import EvmChainClient, build_tron_client
 from trustora.chains import validate_address
-from trustora.db import create_engine, create_session_factory
-from trustora.enums import Chain, EscrowStatus
-from trustora.escrow import get_escrow_for_update, transition_escrow
 from trustora.config_service import get_config
+from trustora.db import create_engine, create_session_factory, session_scope
+from trustora.enums import Chain, EscrowStatus, PayoutJobStatus, Token
+from trustora.escrow import (
+    claim_payout_job,
+    claim_stale_payout_jobs,
+    find_active_payout_job,
+    get_escrow_for_update,
+    get_payout_job,
+    load_leased_addresses,
+    load_tagged_amounts,
+    mark_payout_sent,
+    replace_payout_tx_hash,
+    touch_payout_job,
+    transition_escrow,
+)
+from trustora.events import (
+    consume_escrow_events,
+    consumer_name,
+    publish_escrow_event,
+    publish_escrow_events,
+)
+from trustora.executor import ChainExecutor
+from trustora.heads import HeadReader
 from trustora.idempotency import can_send_payout
+from trustora.leases import Lease, replica_id
 from trustora.limits import check_and_track_limits
-from trustora.models import Escrow
+from trustora.models import PayoutJob
+from trustora.multicall import transfer_call
+from trustora.nonces import NonceManager, SentTransaction, bump_gas_price, cancel_transaction
+from trustora.payouts import BroadcastError, failure_status, payout_job_view, retry_delay
+from trustora.rpc import RpcClient, RpcError
 from trustora.security import decrypt_secret
 from trustora.signer_security import verify_nonce, verify_signature, verify_timestamp
-from trustora.state_machine import validate_transition
-from services.signer.settings import load_settings
+from trustora.tagging import bind_tagged_amount, reserve_tagged_amount
+from trustora.tokens import TokenSpec
 
 logging.basicConfig(level=logging.INFO)
 
@@ -41,22 +74,21 @@ def tron_address_from_key(private_key: str) -> str:
 
 
 def bsc_address_from_key(private_key: str) -> str:
-    return Web3().eth.account.from_key(private_key).address
-
-
+    return Account.from_key(private_key).address
 
 
 async def handle_address(request: web.Request) -> web.Response:
     app = request.app
     payload = await request.json()
     chain = payload.get("chain")
+    amount = payload.get("amount")
     timestamp = int(payload.get("timestamp", 0))
     nonce = payload.get("nonce", "")
     signature = payload.get("signature", "")
     try:
         verify_timestamp(timestamp)
         await verify_nonce(app["redis"], nonce)
-        message = f"address|{chain}|{timestamp}|{nonce}"
+        message = f"address|{chain}|{amount}|{timestamp}|{nonce}"
         verify_signature(app["settings"].signer_hmac_secret, message, signature)
     except ValueError as exc:
         raise web.HTTPUnauthorized(text=str(exc)) from exc
@@ -64,27 +96,114 @@ async def handle_address(request: web.Request) -> web.Response:
     if chain not in {Chain.TRC20.value, Chain.BEP20.value}:
         raise web.HTTPBadRequest(text="Unsupported chain")
 
-    if chain == Chain.TRC20.value:
-        address = await pick_address(app, Chain.TRC20)
+    chain_enum = Chain(chain)
+    settings = app["settings"]
+    if settings.shared_deposit_addresses and amount is not None:
+        try:
+            address, tagged = await reserve_tagged_amount(
+                app["redis"],
+                chain_enum,
+                shared_addresses(app, chain_enum),
+                float(amount),
+                settings.deposit_lease_pending_ttl_seconds,
+                settings.max_amount_tag,
+            )
+        except RuntimeError as exc:
+            raise web.HTTPServiceUnavailable(text=str(exc)) from exc
+        # Shared addresses are long-lived, so gas is topped up at most once a day per address.
+        if await app["redis"].set(f"gas_funded:{chain}:{address}", "1", nx=True, ex=86400):
+            await app["executor"].run(chain_enum, fund_gas(app, chain_enum, address))
+        return web.json_response({"address": address, "amount": tagged, "amount_tagged": True})
+
+    address = await pick_address(app, chain_enum)
+    await app["executor"].run(chain_enum, fund_gas(app, chain_enum, address))
+    return web.json_response({"address": address, "amount": amount, "amount_tagged": False})
+
+
+def key_address(chain: Chain, key: str) -> str:
+    return tron_address_from_key(key) if chain == Chain.TRC20 else bsc_address_from_key(key)
+
+
+def shared_addresses(app: web.Application, chain: Chain) -> list[str]:
+    return app["deposit_addresses"][chain][: app["settings"].shared_deposit_addresses]
+
+
+async def fund_gas(app: web.Application, chain: Chain, address: str) -> None:
+    if chain == Chain.TRC20:
         await fund_tron_gas(app, address)
     else:
-        address = await pick_address(app, Chain.BEP20)
         await fund_bsc_gas(app, address)
 
-    return web.json_response({"address": address})
-
 
 async def pick_address(app: web.Application, chain: Chain) -> str:
+    address = await app["address_pools"][chain].allocate()
+    if address is None:
+        raise web.HTTPServiceUnavailable(text="No deposit addresses available")
+    return address
+
+
+async def seed_address_pool(app: web.Application, chain: Chain) -> None:
     key_list = app["tron_keys"] if chain == Chain.TRC20 else app["bsc_keys"]
-    for key in key_list:
-        address = tron_address_from_key(key) if chain == Chain.TRC20 else bsc_address_from_key(key)
-        cache_key = f"deposit_used:{chain.value}:{address}"
-        exists = await app["redis"].get(cache_key)
-        if exists:
-            continue
-        await app["redis"].set(cache_key, "1", ex=86400)
-        return address
-    raise web.HTTPServiceUnavailable(text="No deposit addresses available")
+    addresses = await asyncio.to_thread(lambda: [key_address(chain, key) for key in key_list])
+    # The first key is the payout hot wallet and never receives deposits.
+    hot_wallet, deposit_addresses = addresses[0], addresses[1:]
+    app["deposit_addresses"][chain] = deposit_addresses
+    shared = app["settings"].shared_deposit_addresses
+    async with app["session_factory"]() as session:
+        leased = await load_leased_addresses(session, chain)
+        tagged = await load_tagged_amounts(session, chain)
+    # The next keys are reserved for amount-tagged shared addresses when that mode is on.
+    added = await app["address_pools"][chain].seed(
+        deposit_addresses[shared:], leased, [hot_wallet, *deposit_addresses[:shared]]
+    )
+    logging.info("seeded %s deposit pool with %s addresses", chain.value, added)
+    for escrow_id, address, amount in tagged:
+        if not await bind_tagged_amount(app["redis"], chain, address, amount, escrow_id):
+            logging.error("amount tag %s on %s is held by another escrow", amount, address)
+
+
+async def reclaim_addresses(app: web.Application) -> None:
+    while True:
+        for chain, pool in app["address_pools"].items():
+            try:
+                reclaimed = await pool.reclaim_stale()
+                if reclaimed:
+                    logging.info("returned %s unused %s addresses", reclaimed, chain.value)
+                await restore_cooled_addresses(app, chain, pool)
+            except Exception as exc:  # pragma: no cover - network behavior
+                logging.warning("address pool reclaim failed for %s: %s", chain.value, exc)
+        await asyncio.sleep(300)
+
+
+def deposit_token_contracts(settings: Any, chain: Chain) -> list[str]:
+    if chain == Chain.TRC20:
+        contracts = [settings.tron_usdt_contract, settings.tron_usdc_contract]
+    else:
+        contracts = [settings.bsc_usdt_contract, settings.bsc_usdc_contract]
+    return [contract for contract in contracts if contract]
+
+
+async def restore_cooled_addresses(
+    app: web.Application, chain: Chain, pool: DepositAddressPool
+) -> None:
+    cooled = await pool.cooled()
+    if not cooled:
+        return
+    # Only empty addresses go back; anything left over must be swept first, or a late transfer
+    # from the previous buyer would be credited to the next escrow.
+    empty = set(cooled)
+    for contract in deposit_token_contracts(app["settings"], chain):
+        balances = await app["balance_clients"][chain].token_balances(contract, cooled)
+        empty -= {address for address, balance in balances.items() if balance != 0}
+    restored = await pool.restore(sorted(empty))
+    if restored:
+        logging.info("returned %s released %s addresses", restored, chain.value)
+    if len(empty) < len(cooled):
+        logging.warning(
+            "%s released %s addresses hold funds and wait for a sweep",
+            len(cooled) - len(empty),
+            chain.value,
+        )
 
 
 async def handle_payout(request: web.Request) -> web.Response:
@@ -112,120 +231,475 @@ async def handle_payout(request: web.Request) -> web.Response:
     chain_enum = Chain(chain)
     if not validate_address(chain_enum, payout_address):
         raise web.HTTPBadRequest(text="Invalid payout address")
+    tokens = app["settings"].tokens[chain_enum]
 
     await check_kill_switch(app)
-    await check_and_track_limits(
-        app["redis"],
-        amount,
-        app["settings"].auto_payout_max,
-        app["settings"].hard_max_payout,
-        app["settings"].daily_payout_max,
-        app["settings"].payouts_per_hour_max,
-    )
-
-    async with app["session_factory"]() as session:
-        async with session.begin():
-            escrow = await get_escrow_for_update(session, escrow_id)
-            if escrow.status not in {EscrowStatus.RELEASE_APPROVED, EscrowStatus.PAYOUT_QUEUED}:
-                raise web.HTTPConflict(text="Escrow not approved")
-            if not can_send_payout(escrow):
-                return web.json_response({"tx_hash": escrow.payout_tx_hash})
-            validate_transition(escrow.status, EscrowStatus.PAYOUT_QUEUED)
+    settings = app["settings"]
+    async with session_scope(app["session_factory"]) as session:
+        escrow = await get_escrow_for_update(session, escrow_id)
+        if not can_send_payout(escrow):
+            return web.json_response({"tx_hash": escrow.payout_tx_hash})
+        job = await find_active_payout_job(session, escrow.id)
+        if job is not None:
+            return web.json_response(payout_job_view(job), status=202)
+        if escrow.status not in {EscrowStatus.RELEASE_APPROVED, EscrowStatus.PAYOUT_QUEUED}:
+            raise web.HTTPConflict(text="Escrow not approved")
+        if tokens.for_token(escrow.token) is None:
+            raise web.HTTPBadRequest(text=f"Unsupported token {escrow.token.value}")
+        try:
+            await check_and_track_limits(
+                app["redis"],
+                amount,
+                settings.auto_payout_max,
+                settings.hard_max_payout,
+                settings.daily_payout_max,
+                settings.payouts_per_hour_max,
+            )
+        except ValueError as exc:
+            raise web.HTTPForbidden(text=str(exc)) from exc
+        if escrow.status == EscrowStatus.RELEASE_APPROVED:
             await transition_escrow(session, escrow, EscrowStatus.PAYOUT_QUEUED)
+        now = datetime.utcnow()
+        job = PayoutJob(
+            id=uuid.uuid4(),
+            escrow_id=escrow.id,
+            chain=chain_enum,
+            payout_address=payout_address,
+            token=escrow.token,
+            amount=amount,
+            status=PayoutJobStatus.QUEUED,
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+            updated_at=now,
+        )
+        session.add(job)
+    await publish_escrow_event(app["redis"], escrow)
+    return web.json_response(payout_job_view(job), status=202)
+
+
+async def handle_payout_status(request: web.Request) -> web.Response:
+    app = request.app
+    job_id = request.match_info["job_id"]
+    timestamp = int(request.query.get("timestamp", 0))
+    nonce = request.query.get("nonce", "")
+    signature = request.query.get("signature", "")
+    try:
+        verify_timestamp(timestamp)
+        await verify_nonce(app["redis"], nonce)
+        message = f"payout_status|{job_id}|{timestamp}|{nonce}"
+        verify_signature(app["settings"].signer_hmac_secret, message, signature)
+        job_uuid = uuid.UUID(job_id)
+    except ValueError as exc:
+        raise web.HTTPUnauthorized(text=str(exc)) from exc
+    async with app["session_factory"]() as session:
+        job = await get_payout_job(session, job_uuid)
+    if job is None:
+        raise web.HTTPNotFound(text="Unknown payout job")
+    return web.json_response(payout_job_view(job))
+
+
+async def payout_worker(app: web.Application) -> None:
+    settings = app["settings"]
+    while True:
+        job = None
+        try:
+            if not await payouts_paused(app):
+                async with session_scope(app["session_factory"]) as session:
+                    job = await claim_payout_job(session)
+            if job is not None:
+                await run_payout_job(app, job)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - network behavior
+            logging.warning("payout worker error: %s", exc)
+        await asyncio.sleep(settings.payout_poll_seconds)
+
+
+async def run_payout_job(app: web.Application, job: PayoutJob) -> None:
+    heartbeat = asyncio.create_task(heartbeat_payout_job(app, job.id))
+
+    async def record_signed(tx_hash: str, raw_tx: str) -> None:
+        # Stored before broadcasting, so recovery can resend these exact bytes instead of
+        # signing a second payout.
+        async with session_scope(app["session_factory"]) as session:
+            locked = await get_payout_job(session, job.id, lock=True)
+            if locked.status != PayoutJobStatus.RUNNING:
+                raise RuntimeError("payout job was taken over by recovery")
+            locked.tx_hash = tx_hash
+            locked.raw_tx = raw_tx
+            locked.updated_at = datetime.utcnow()
 
-    tx_hash = (
-        await send_tron_usdt(app, payout_address, amount)
-        if chain_enum == Chain.TRC20
-        else await send_bsc_usdt(app, payout_address, amount)
-    )
+    try:
+        tx_hash = await app["executor"].run(
+            job.chain,
+            send_payout(
+                app,
+                job.chain,
+                job.token,
+                job.payout_address,
+                job.amount,
+                str(job.escrow_id),
+                record_signed,
+            ),
+        )
+    except Exception as exc:
+        await fail_payout_job(app, job, exc)
+        return
+    finally:
+        heartbeat.cancel()
+    async with session_scope(app["session_factory"]) as session:
+        locked = await get_payout_job(session, job.id, lock=True)
+        if locked.status != PayoutJobStatus.RUNNING:
+            return
+        escrow = await mark_payout_sent(session, locked, tx_hash)
+    logging.info("payout job %s sent %s", job.id, tx_hash)
+    await publish_escrow_event(app["redis"], escrow)
+
+
+async def heartbeat_payout_job(app: web.Application, job_id: uuid.UUID) -> None:
+    while True:
+        await asyncio.sleep(app["settings"].payout_job_timeout_seconds / 3)
+        try:
+            async with session_scope(app["session_factory"]) as session:
+                await touch_payout_job(session, job_id)
+        except Exception as exc:  # pragma: no cover - network behavior
+            logging.warning("payout job %s heartbeat failed: %s", job_id, exc)
+
+
+async def fail_payout_job(app: web.Application, job: PayoutJob, exc: Exception) -> None:
+    logging.warning("payout job %s attempt %s failed: %s", job.id, job.attempts, exc)
+    escrow = None
+    async with session_scope(app["session_factory"]) as session:
+        locked = await get_payout_job(session, job.id, lock=True)
+        if locked.status != PayoutJobStatus.RUNNING:
+            return
+        locked.last_error = str(exc)
+        signed = locked.raw_tx is not None
+        status = failure_status(signed, job.attempts, app["settings"].payout_max_attempts)
+        if status == PayoutJobStatus.SENT:
+            # The payout tracker completes the escrow, or fails it once the transaction is
+            # known to be dropped or reverted.
+            escrow = await mark_payout_sent(session, locked, locked.tx_hash)
+        else:
+            locked.status = status
+            locked.updated_at = datetime.utcnow()
+            delay = timedelta(seconds=retry_delay(job.attempts))
+            locked.next_attempt_at = locked.updated_at + delay
+            if status == PayoutJobStatus.FAILED:
+                escrow = await get_escrow_for_update(session, job.escrow_id)
+                await transition_escrow(session, escrow, EscrowStatus.PAYOUT_FAILED)
+    if escrow is not None:
+        await publish_escrow_event(app["redis"], escrow)
+
+
+async def recover_payout_jobs(app: web.Application) -> None:
+    settings = app["settings"]
+    while True:
+        await asyncio.sleep(settings.payout_job_timeout_seconds / 3)
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.payout_job_timeout_seconds)
+            escrows = []
+            async with session_scope(app["session_factory"]) as session:
+                # Running jobs heartbeat, so a stale one belongs to a worker that is gone.
+                for job in await claim_stale_payout_jobs(session, cutoff):
+                    if job.raw_tx is None:
+                        # Nothing was signed yet, so nothing can be on chain.
+                        job.status = PayoutJobStatus.QUEUED
+                        job.last_error = "worker stopped before signing"
+                        job.updated_at = job.next_attempt_at = datetime.utcnow()
+                        continue
+                    # Resending the same signed bytes cannot pay twice; the payout tracker
+                    # completes the escrow or fails it once the transaction is known to be gone.
+                    await rebroadcast_payout(app, job)
+                    escrows.append(await mark_payout_sent(session, job, job.tx_hash))
+            if escrows:
+                await publish_escrow_events(app["redis"], escrows)
+        except Exception as exc:  # pragma: no cover - network behavior
+            logging.warning("payout job recovery failed: %s", exc)
+
+
+async def rebroadcast_payout(app: web.Application, job: PayoutJob) -> None:
+    try:
+        if job.chain == Chain.TRC20:
+            await app["tron_client"].provider.make_request(
+                "wallet/broadcasttransaction", json.loads(job.raw_tx)
+            )
+        else:
+            await broadcast_raw_bsc_transaction(app, job.raw_tx)
+    except Exception as exc:  # pragma: no cover - network behavior
+        logging.warning("rebroadcast of payout job %s failed: %s", job.id, exc)
 
-    async with app["session_factory"]() as session:
-        async with session.begin():
-            escrow = await get_escrow_for_update(session, escrow_id)
-            escrow.payout_tx_hash = tx_hash
-            await transition_escrow(session, escrow, EscrowStatus.PAYOUT_SENT)
 
-    return web.json_response({"tx_hash": tx_hash})
+async def payouts_paused(app: web.Application) -> bool:
+    if app["settings"].pause_payouts:
+        return True
+    async with session_scope(app["session_factory"]) as session:
+        config = await get_config(session)
+        return bool(config.json.get("pause_payouts", False))
 
 
 async def check_kill_switch(app: web.Application) -> None:
-    if app["settings"].pause_payouts:
+    if await payouts_paused(app):
         raise web.HTTPServiceUnavailable(text="Payouts paused")
-    async with app["session_factory"]() as session:
-        async with session.begin():
-            config = await get_config(session)
-            if config.json.get("pause_payouts", False):
-                raise web.HTTPServiceUnavailable(text="Payouts paused")
+
+
+@functools.lru_cache(maxsize=16)
+def sender_address(chain: Chain, key: str) -> str:
+    return key_address(chain, key)
+
+
+class PooledTronProvider(AsyncHTTPProvider):
+    # tronpy talks to a single node; send its HTTP API calls through the health-scored pool.
+    def __init__(self, rpc: RpcClient) -> None:
+        super().__init__(rpc.urls[0])
+        self.rpc = rpc
+
+    async def make_request(self, method: str, params: Any = None) -> dict:
+        hedge = not method.startswith("wallet/broadcast")
+        return await self.rpc.post(params or {}, hedge=hedge, path=method)
+
+
+def sign_tron_transaction(txn: Any, key: str) -> Any:
+    return txn.sign(TronPrivateKey(bytes.fromhex(key)))
+
+
+def sign_bsc_transaction(txn: dict[str, Any], key: str) -> str:
+    return Web3.to_hex(Account.sign_transaction(txn, key).rawTransaction)
+
+
+async def tron_contract(app: web.Application, address: str) -> Any:
+    contracts = app["tron_contracts"]
+    if address not in contracts:
+        contracts[address] = await app["tron_client"].get_contract(address)
+    return contracts[address]
 
 
 async def fund_tron_gas(app: web.Application, address: str) -> None:
-    client = Tron(network="mainnet", provider=HTTPProvider(app["tron_rpc"][0]))
-    gas_key = TronPrivateKey(bytes.fromhex(app["tron_gas_key"]))
+    key = app["tron_gas_key"]
     amount = int(app["settings"].tron_gas_amount * 1_000_000)
-    txn = client.trx.transfer(gas_key.public_key.to_base58check_address(), address, amount).build().sign(gas_key)
-    txn.broadcast()
+    builder = app["tron_client"].trx.transfer(sender_address(Chain.TRC20, key), address, amount)
+    txn = await builder.build()
+    signed = await app["executor"].sign(sign_tron_transaction, txn, key)
+    await signed.broadcast()
+
+
+async def bsc_fee_params(app: web.Application) -> tuple[int, int]:
+    # The watcher's head tracker keeps these warm; only hit the node when its data is stale.
+    head = await app["bsc_head"].get()
+    if head is not None and head.gas_price and head.chain_id:
+        return head.gas_price, head.chain_id
+    results = await app["bsc_rpc_client"].batch([("eth_gasPrice", []), ("eth_chainId", [])])
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return int(results[0], 16), int(results[1], 16)
+
+
+async def send_bsc_transaction(
+    app: web.Application,
+    key: str,
+    to: str,
+    value: int,
+    data: bytes,
+    gas: int,
+    ref: str = "",
+    on_signed: Callable[[str, str], Awaitable[None]] | None = None,
+) -> str:
+    nonces = app["nonce_managers"][sender_address(Chain.BEP20, key)]
+    nonce = await nonces.reserve()
+    stored_hash = None
+
+    async def record_signed(tx_hash: str, raw: str) -> None:
+        nonlocal stored_hash
+        await on_signed(tx_hash, raw)
+        stored_hash = tx_hash
+
+    try:
+        gas_price, chain_id = await bsc_fee_params(app)
+        txn = {
+            "to": to,
+            "value": value,
+            "gas": gas,
+            "gasPrice": gas_price,
+            "nonce": nonce,
+            "chainId": chain_id,
+            "data": "0x" + data.hex(),
+        }
+        tx_hash = await broadcast_bsc_transaction(
+            app, txn, key, record_signed if on_signed is not None else None
+        )
+    except Exception as exc:
+        if stored_hash is None:
+            await nonces.failed(nonce, exc)
+        else:
+            # A stored payout may still land; the stuck transaction check replaces it, or
+            # cancels it once the payout tracker gives up on it.
+            await nonces.sent(nonce, stored_hash, txn, ref)
+        raise
+    await nonces.sent(nonce, tx_hash, txn, ref)
+    return tx_hash
+
+
+async def broadcast_bsc_transaction(
+    app: web.Application,
+    txn: dict[str, Any],
+    key: str,
+    on_signed: Callable[[str, str], Awaitable[None]] | None = None,
+) -> str:
+    raw = await app["executor"].sign(sign_bsc_transaction, txn, key)
+    if on_signed is not None:
+        await on_signed(Web3.to_hex(Web3.keccak(hexstr=raw)), raw)
+    return await broadcast_raw_bsc_transaction(app, raw)
+
+
+async def broadcast_raw_bsc_transaction(app: web.Application, raw: str) -> str:
+    try:
+        return await app["bsc_rpc_client"].call("eth_sendRawTransaction", [raw])
+    except RpcError as exc:
+        # A retried broadcast that reached the node the first time.
+        if "already known" in str(exc).lower():
+            return Web3.to_hex(Web3.keccak(hexstr=raw))
+        raise BroadcastError(str(exc)) from exc
+    except Exception as exc:
+        raise BroadcastError(str(exc)) from exc
+
+
+async def replace_stuck_transactions(app: web.Application) -> None:
+    settings = app["settings"]
+    lease = Lease(app["redis"], "signer:stuck_tx", replica_id(), settings.bsc_stuck_tx_seconds)
+    while True:
+        await asyncio.sleep(settings.bsc_stuck_tx_seconds / 3)
+        if not await lease.hold():
+            continue
+        for address, nonces in app["nonce_managers"].items():
+            try:
+                for nonce in await nonces.claim_holes():
+                    await fill_nonce_hole(app, address, nonces, nonce)
+                for record in await nonces.stuck(settings.bsc_stuck_tx_seconds):
+                    await replace_stuck_transaction(app, address, nonces, record)
+            except Exception as exc:  # pragma: no cover - network behavior
+                logging.warning("stuck transaction check failed for %s: %s", address, exc)
+
+
+async def fill_nonce_hole(
+    app: web.Application, address: str, nonces: NonceManager, nonce: int
+) -> None:
+    gas_price, chain_id = await bsc_fee_params(app)
+    txn = cancel_transaction({"nonce": nonce, "chainId": chain_id}, address, gas_price)
+    try:
+        tx_hash = await broadcast_bsc_transaction(app, txn, app["bsc_senders"][address])
+    except Exception as exc:
+        await nonces.failed(nonce, exc)
+        raise
+    await nonces.sent(nonce, tx_hash, txn)
+    logging.info("filled nonce hole %s for %s: %s", nonce, address, tx_hash)
+
+
+async def replace_stuck_transaction(
+    app: web.Application,
+    address: str,
+    nonces: NonceManager,
+    record: SentTransaction,
+) -> None:
+    key = app["bsc_senders"][address]
+    gas_price, _ = await bsc_fee_params(app)
+    gas_price = bump_gas_price(record.txn["gasPrice"], gas_price)
+    if not record.ref:
+        txn = record.txn | {"gasPrice": gas_price}
+        tx_hash = await broadcast_bsc_transaction(app, txn, key)
+        await nonces.sent(record.nonce, tx_hash, txn)
+        logging.info("replaced stuck %s nonce %s: %s", address, record.nonce, tx_hash)
+        return
+    escrow = None
+    # The escrow row stays locked while broadcasting so the payout tracker cannot fail it
+    # between the check and the hash update.
+    async with session_scope(app["session_factory"]) as session:
+        locked = await get_escrow_for_update(session, record.ref)
+        if locked.status == EscrowStatus.PAYOUT_SENT and locked.payout_tx_hash == record.tx_hash:
+            txn = record.txn | {"gasPrice": gas_price}
+            tx_hash = await broadcast_bsc_transaction(app, txn, key)
+            await replace_payout_tx_hash(session, locked, record.tx_hash, tx_hash)
+            escrow = locked
+    if escrow is not None:
+        await nonces.sent(record.nonce, tx_hash, txn, record.ref)
+        logging.info("replaced stuck payout %s nonce %s: %s", record.ref, record.nonce, tx_hash)
+        await publish_escrow_event(app["redis"], escrow)
+        return
+    # The payout was already given up on; only a cancellation may use its nonce now.
+    txn = cancel_transaction(record.txn, address, gas_price)
+    tx_hash = await broadcast_bsc_transaction(app, txn, key)
+    await nonces.sent(record.nonce, tx_hash, txn)
+    logging.info("cancelled abandoned payout %s nonce %s: %s", record.ref, record.nonce, tx_hash)
 
 
 async def fund_bsc_gas(app: web.Application, address: str) -> None:
-    web3 = Web3(Web3.HTTPProvider(app["bsc_rpc"][0]))
-    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
-    acct = web3.eth.account.from_key(app["bsc_gas_key"])
-    nonce = web3.eth.get_transaction_count(acct.address)
-    txn = {
-        "to": address,
-        "value": web3.to_wei(app["settings"].bsc_gas_amount, "ether"),
-        "gas": 21000,
-        "gasPrice": web3.eth.gas_price,
-        "nonce": nonce,
-        "chainId": web3.eth.chain_id,
-    }
-    signed = acct.sign_transaction(txn)
-    web3.eth.send_raw_transaction(signed.rawTransaction)
-
-
-async def send_tron_usdt(app: web.Application, address: str, amount: float) -> str:
-    client = Tron(network="mainnet", provider=HTTPProvider(app["tron_rpc"][0]))
-    contract = client.get_contract(app["settings"].tron_usdt_contract)
-    key = TronPrivateKey(bytes.fromhex(app["tron_keys"][0]))
-    txn = (
-        contract.functions.transfer(address, int(amount * 1_000_000))
-        .with_owner(key.public_key.to_base58check_address())
-        .fee_limit(10_000_000)
-        .build()
-        .sign(key)
-    )
-    result = txn.broadcast()
+    value = Web3.to_wei(app["settings"].bsc_gas_amount, "ether")
+    await send_bsc_transaction(app, app["bsc_gas_key"], address, value, b"", 21000)
+
+
+async def send_tron_token(
+    app: web.Application,
+    spec: TokenSpec,
+    address: str,
+    amount: float,
+    on_signed: Callable[[str, str], Awaitable[None]] | None = None,
+) -> str:
+    key = app["tron_keys"][0]
+    contract = await tron_contract(app, spec.contract)
+    raw_amount = spec.to_raw(amount)
+    builder = await contract.functions.transfer(address, raw_amount)
+    txn = await builder.with_owner(sender_address(Chain.TRC20, key)).fee_limit(10_000_000).build()
+    signed = await app["executor"].sign(sign_tron_transaction, txn, key)
+    if on_signed is not None:
+        await on_signed(signed.txid, json.dumps(signed.to_json()))
+    try:
+        result = await signed.broadcast()
+    except Exception as exc:
+        raise BroadcastError(str(exc)) from exc
     return result["txid"]
 
 
-async def send_bsc_usdt(app: web.Application, address: str, amount: float) -> str:
-    web3 = Web3(Web3.HTTPProvider(app["bsc_rpc"][0]))
-    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
-    acct = web3.eth.account.from_key(app["bsc_keys"][0])
-    contract = web3.eth.contract(address=app["settings"].bsc_usdt_contract, abi=[
-        {
-            "constant": False,
-            "inputs": [
-                {"name": "_to", "type": "address"},
-                {"name": "_value", "type": "uint256"},
-            ],
-            "name": "transfer",
-            "outputs": [{"name": "", "type": "bool"}],
-            "type": "function",
-        }
-    ])
-    nonce = web3.eth.get_transaction_count(acct.address)
-    txn = contract.functions.transfer(address, int(amount * 1_000_000)).build_transaction(
-        {
-            "from": acct.address,
-            "nonce": nonce,
-            "gas": 120000,
-            "gasPrice": web3.eth.gas_price,
-        }
+async def send_bsc_token(
+    app: web.Application,
+    spec: TokenSpec,
+    address: str,
+    amount: float,
+    ref: str = "",
+    on_signed: Callable[[str, str], Awaitable[None]] | None = None,
+) -> str:
+    raw_amount = spec.to_raw(amount)
+    data = transfer_call(address, raw_amount)
+    return await send_bsc_transaction(
+        app, app["bsc_keys"][0], spec.contract, 0, data, 120000, ref, on_signed
     )
-    signed = acct.sign_transaction(txn)
-    tx_hash = web3.eth.send_raw_transaction(signed.rawTransaction)
-    return tx_hash.hex()
+
+
+async def send_payout(
+    app: web.Application,
+    chain: Chain,
+    token: Token,
+    address: str,
+    amount: float,
+    ref: str = "",
+    on_signed: Callable[[str, str], Awaitable[None]] | None = None,
+) -> str:
+    spec = app["settings"].tokens[chain].for_token(token)
+    if spec is None:
+        raise ValueError(f"no {token.value} contract configured for {chain.value}")
+    if chain == Chain.TRC20:
+        return await send_tron_token(app, spec, address, amount, on_signed)
+    return await send_bsc_token(app, spec, address, amount, ref, on_signed)
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    app = request.app
+    snapshot = app["executor"].snapshot()
+    snapshot["address_pools"] = {
+        chain.value: await pool.available() for chain, pool in app["address_pools"].items()
+    }
+    return web.json_response(snapshot)
 
 
 def create_app() -> web.Application:
@@ -240,9 +714,87 @@ def create_app() -> web.Application:
     app["bsc_gas_key"] = load_key_list(settings.bsc_gas_key_file, settings.key_encryption_key)[0]
     app["tron_rpc"] = settings.tron_rpc_urls.split(",")
     app["bsc_rpc"] = settings.bsc_rpc_urls.split(",")
+    app["tron_rpc_client"] = RpcClient(app["tron_rpc"], head_method=None)
+    app["tron_client"] = AsyncTron(provider=PooledTronProvider(app["tron_rpc_client"]))
+    app["tron_contracts"] = {}
+    app["bsc_rpc_client"] = RpcClient(app["bsc_rpc"])
+    app["bsc_senders"] = {
+        sender_address(Chain.BEP20, key): key for key in (app["bsc_keys"][0], app["bsc_gas_key"])
+    }
+    app["nonce_managers"] = {
+        address: NonceManager(app["redis"], app["bsc_rpc_client"], Chain.BEP20, address)
+        for address in app["bsc_senders"]
+    }
+    app["executor"] = ChainExecutor(
+        {
+            Chain.TRC20: settings.tron_signer_concurrency,
+            Chain.BEP20: settings.bsc_signer_concurrency,
+        },
+        settings.signing_workers,
+    )
+    app["bsc_head"] = HeadReader(app["redis"], Chain.BEP20)
+    app["deposit_addresses"] = {}
+    app["address_pools"] = {
+        chain: DepositAddressPool(
+            app["redis"],
+            chain,
+            settings.deposit_lease_pending_ttl_seconds,
+            settings.deposit_address_cooldown_seconds,
+        )
+        for chain in (Chain.TRC20, Chain.BEP20)
+    }
+    app["balance_clients"] = {
+        Chain.TRC20: build_tron_client(app["tron_rpc"]),
+        Chain.BEP20: EvmChainClient(app["bsc_rpc_client"]),
+    }
+
+    async def follow_heads(app: web.Application) -> AsyncIterator[None]:
+        task = asyncio.create_task(app["bsc_head"].follow())
+        yield
+        task.cancel()
+
+    async def run_address_pools(app: web.Application) -> AsyncIterator[None]:
+        for chain in app["address_pools"]:
+            await seed_address_pool(app, chain)
+
+        async def on_event(event: dict[str, Any]) -> None:
+            await apply_pool_event(app["address_pools"], app["redis"], event)
+
+        tasks = [
+            asyncio.create_task(
+                consume_escrow_events(
+                    app["redis"], "signer-address-pool", consumer_name(), on_event
+                )
+            ),
+            asyncio.create_task(reclaim_addresses(app)),
+        ]
+        yield
+        for task in tasks:
+            task.cancel()
+
+    async def chain_clients(app: web.Application) -> AsyncIterator[None]:
+        tasks = [
+            asyncio.create_task(replace_stuck_transactions(app)),
+            asyncio.create_task(recover_payout_jobs(app)),
+        ]
+        tasks += [asyncio.create_task(payout_worker(app)) for _ in range(settings.payout_workers)]
+        yield
+        for task in tasks:
+            task.cancel()
+        await app["tron_client"].close()
+        await app["tron_rpc_client"].aclose()
+        await app["balance_clients"][Chain.TRC20].aclose()
+        await app["bsc_rpc_client"].aclose()
+        app["executor"].shutdown()
+
+    app.cleanup_ctx.append(follow_heads)
+    app.cleanup_ctx.append(chain_clients)
+    app.cleanup_ctx.append(run_address_pools)
 
     app.router.add_post("/address", handle_address)
     app.router.add_post("/payout", handle_payout)
+    app.router.add_get("/payout/{job_id}", handle_payout_status)
+    app.router.add_get("/metrics", handle_metrics)
     return app
 
 
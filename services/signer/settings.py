@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from functools import cached_property
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from trustora.enums import Chain, Token
+from trustora.tokens import TokenRegistry, build_token_registry
+
 
 class SignerSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -18,6 +23,12 @@ class SignerSettings(BaseSettings):
 
     tron_usdt_contract: str = Field(..., alias="TRON_USDT_CONTRACT")
     bsc_usdt_contract: str = Field(..., alias="BSC_USDT_CONTRACT")
+    tron_usdt_decimals: int = Field(6, alias="TRON_USDT_DECIMALS")
+    bsc_usdt_decimals: int = Field(18, alias="BSC_USDT_DECIMALS")
+    tron_usdc_contract: str = Field("", alias="TRON_USDC_CONTRACT")
+    bsc_usdc_contract: str = Field("", alias="BSC_USDC_CONTRACT")
+    tron_usdc_decimals: int = Field(6, alias="TRON_USDC_DECIMALS")
+    bsc_usdc_decimals: int = Field(18, alias="BSC_USDC_DECIMALS")
 
     fee_wallet_tron: str = Field(..., alias="FEE_WALLET_TRON")
     fee_wallet_bsc: str = Field(..., alias="FEE_WALLET_BSC")
@@ -27,14 +38,50 @@ class SignerSettings(BaseSettings):
 
     tron_gas_key_file: str = Field("./secrets/tron_gas.enc", alias="TRON_GAS_KEY_FILE")
     bsc_gas_key_file: str = Field("./secrets/bsc_gas.enc", alias="BSC_GAS_KEY_FILE")
+    signing_workers: int = Field(4, alias="SIGNING_WORKERS")
+    tron_signer_concurrency: int = Field(8, alias="TRON_SIGNER_CONCURRENCY")
+    bsc_signer_concurrency: int = Field(8, alias="BSC_SIGNER_CONCURRENCY")
+
+    bsc_stuck_tx_seconds: int = Field(180, alias="BSC_STUCK_TX_SECONDS")
+
     tron_gas_amount: float = Field(1.0, alias="TRON_GAS_AMOUNT")
     bsc_gas_amount: float = Field(0.001, alias="BSC_GAS_AMOUNT")
 
+    deposit_lease_pending_ttl_seconds: int = Field(86400, alias="DEPOSIT_LEASE_PENDING_TTL")
+    deposit_address_cooldown_seconds: int = Field(86400, alias="DEPOSIT_ADDRESS_COOLDOWN")
+    shared_deposit_addresses: int = Field(0, alias="SHARED_DEPOSIT_ADDRESSES")
+    max_amount_tag: int = Field(99, alias="MAX_AMOUNT_TAG")
+
+    payout_workers: int = Field(4, alias="PAYOUT_WORKERS")
+    payout_max_attempts: int = Field(5, alias="PAYOUT_MAX_ATTEMPTS")
+    payout_poll_seconds: float = Field(1.0, alias="PAYOUT_POLL_SECONDS")
+    payout_job_timeout_seconds: int = Field(900, alias="PAYOUT_JOB_TIMEOUT")
+
     auto_payout_max: float = Field(200, alias="AUTO_PAYOUT_MAX")
     hard_max_payout: float = Field(1000, alias="HARD_MAX_PAYOUT")
     daily_payout_max: float = Field(1000, alias="DAILY_PAYOUT_MAX")
     payouts_per_hour_max: int = Field(10, alias="PAYOUTS_PER_HOUR_MAX")
 
+    @cached_property
+    def tokens(self) -> dict[Chain, TokenRegistry]:
+        return {
+            Chain.TRC20: build_token_registry(
+                Chain.TRC20,
+                {
+                    Token.USDT: (self.tron_usdt_contract, self.tron_usdt_decimals),
+                    Token.USDC: (self.tron_usdc_contract, self.tron_usdc_decimals),
+                },
+            ),
+            Chain.BEP20: build_token_registry(
+                Chain.BEP20,
+                {
+                    Token.USDT: (self.bsc_usdt_contract, self.bsc_usdt_decimals),
+                    Token.USDC: (self.bsc_usdc_contract, self.bsc_usdc_decimals),
+                },
+                normalize=str.lower,
+            ),
+        }
+
 
 def load_settings() -> SignerSettings:
     return SignerSettings()
@@ -2,36 +2,79 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime
 
 from redis.asyncio import Redis
-from sqlalchemy import select
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
 
-from trustora.enums import Chain, EscrowStatus
-from trustora.escrow import get_escrow_for_update, transition_escrow
-from trustora.idempotency import can_record_deposit
-from trustora.db import create_engine, create_session_factory
-from trustora.models import Escrow
 from services.watcher_bsc.settings import load_settings
+from services.watcher_bsc.subscription import SubscriptionState, subscribe_transfer_logs
+from trustora.address_index import DepositAddressIndex
+from trustora.chain_client import EvmChainClient, TransferLog, build_bsc_client
+from trustora.db import create_engine, create_session_factory
+from trustora.enums import Chain
+from trustora.watcher import ChainWatcher
 
 logging.basicConfig(level=logging.INFO)
 
-TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)").hex()
-
-
-def build_web3(rpc_url: str) -> Web3:
-    web3 = Web3(Web3.HTTPProvider(rpc_url))
-    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
-    return web3
-
 
-def parse_transfer(log) -> tuple[str, str, int]:
-    from_addr = "0x" + log["topics"][1].hex()[-40:]
-    to_addr = "0x" + log["topics"][2].hex()[-40:]
-    amount = int(log["data"], 16)
-    return Web3.to_checksum_address(from_addr), Web3.to_checksum_address(to_addr), amount
+class BscWatcher(ChainWatcher):
+    def __init__(self, settings, session_factory, redis: Redis, client: EvmChainClient) -> None:
+        super().__init__(
+            settings,
+            session_factory,
+            redis,
+            client,
+            Chain.BEP20,
+            "bsc",
+            settings.bsc_confirmations_required,
+            DepositAddressIndex(
+                Chain.BEP20,
+                normalize=str.lower,
+                resync_seconds=settings.index_resync_interval_seconds,
+            ),
+            multicall=settings.multicall_address or None,
+        )
+        self.subscription = SubscriptionState()
+
+    def start(self) -> list[asyncio.Task[None]]:
+        tasks = super().start()
+        if self.settings.ws_url:
+            tasks.append(
+                asyncio.create_task(
+                    subscribe_transfer_logs(
+                        self.settings.ws_url,
+                        self.settings.tokens.contracts(),
+                        self.handle_pushed_log,
+                        self.subscription,
+                    )
+                )
+            )
+        return tasks
+
+    def scan_interval(self) -> float:
+        # While logs are pushed, polling only has to fill gaps and advance the cursor.
+        if self.subscription.connected:
+            return self.settings.subscribed_scan_interval_seconds
+        return self.settings.scan_interval_seconds
+
+    async def fetch_transfers(self, start: int, end: int) -> list[TransferLog]:
+        # Past the cap, one unfiltered scan beats many OR-list requests.
+        filter_by_topic = len(self.index) <= self.settings.topic_filter_max_addresses
+        recipients = self.index.addresses() if filter_by_topic else None
+        return await self.fetch_recipients(start, end, recipients)
+
+    async def handle_pushed_log(self, log: dict) -> None:
+        if len(log.get("topics", [])) != 3:
+            return
+        transfer = self.client.parse_transfer(log)
+        if log.get("removed"):
+            # The node orphaned the block this log came from.
+            await self.rollback_transfer(transfer)
+            return
+        # Pushed logs sit at the head; the confirmation tracker takes it from here.
+        matches = self.match_transfers([transfer], transfer.block_number)
+        if matches:
+            await self.record_pushed_block(transfer.block_number, transfer.block_hash)
+            await self.apply_matches(matches)
 
 
 async def scan_loop() -> None:
@@ -39,75 +82,11 @@ async def scan_loop() -> None:
     redis = Redis.from_url(settings.redis_url, decode_responses=True)
     engine = create_engine(settings.database_url)
     session_factory = create_session_factory(engine)
-
-    rpc_urls = settings.bsc_rpc_urls.split(",")
-
-    while True:
-        try:
-            await scan_once(settings, session_factory, redis, rpc_urls)
-        except Exception as exc:  # pragma: no cover
-            logging.error("scan error: %s", exc)
-        await asyncio.sleep(settings.scan_interval_seconds)
-
-
-async def scan_once(settings, session_factory, redis: Redis, rpc_urls: list[str]) -> None:
-    web3 = build_web3(rpc_urls[0])
-    latest_block = web3.eth.block_number
-    last_block = int(await redis.get("bsc:last_block") or 0)
-    from_block = max(latest_block - 500, last_block + 1)
-    to_block = latest_block
-
-    async with session_factory() as session:
-        result = await session.execute(
-            select(Escrow).where(
-                Escrow.chain == Chain.BEP20,
-                Escrow.status.in_([EscrowStatus.AWAITING_DEPOSIT, EscrowStatus.UNDERPAID]),
-            )
-        )
-        escrows = result.scalars().all()
-
-    if not escrows:
-        await redis.set("bsc:last_block", to_block)
-        return
-
-    addresses = {Web3.to_checksum_address(e.deposit_address) for e in escrows}
-    logs = web3.eth.get_logs(
-        {
-            "fromBlock": from_block,
-            "toBlock": to_block,
-            "address": Web3.to_checksum_address(settings.bsc_usdt_contract),
-            "topics": [TRANSFER_TOPIC],
-        }
-    )
-    for log in logs:
-        _, to_addr, amount = parse_transfer(log)
-        if to_addr not in addresses:
-            continue
-        escrow = next(e for e in escrows if Web3.to_checksum_address(e.deposit_address) == to_addr)
-        confirmations = latest_block - log["blockNumber"]
-        if confirmations < settings.bsc_confirmations_required:
-            continue
-        await update_escrow(session_factory, escrow.id, log["transactionHash"].hex(), amount)
-
-    await redis.set("bsc:last_block", to_block)
-
-
-async def update_escrow(session_factory, escrow_id, tx_hash: str, amount_raw: int) -> None:
-    amount = round(amount_raw / 1_000_000, 2)
-    async with session_factory() as session:
-        async with session.begin():
-            escrow = await get_escrow_for_update(session, escrow_id)
-            if not can_record_deposit(escrow, tx_hash):
-                return
-            escrow.deposit_tx_hash = tx_hash
-            escrow.amount_received = amount
-            escrow.deposit_confirmations = None
-            if amount < escrow.amount_expected:
-                await transition_escrow(session, escrow, EscrowStatus.UNDERPAID)
-            elif amount > escrow.amount_expected:
-                await transition_escrow(session, escrow, EscrowStatus.OVERPAID_REVIEW)
-            else:
-                await transition_escrow(session, escrow, EscrowStatus.FUNDS_LOCKED)
+    client = build_bsc_client(settings.bsc_rpc_urls.split(","))
+    try:
+        await BscWatcher(settings, session_factory, redis, client).run()
+    finally:
+        await client.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import asyncio
+
+from services.watcher_bsc.main import BscWatcher
+from services.watcher_bsc.settings import load_settings
+from trustora.chain_client import build_bsc_client
+from trustora.replay import replay, replay_parser
+
+
+def main() -> None:
+    args = replay_parser("BSC").parse_args()
+    settings = load_settings()
+    asyncio.run(
+        replay(
+            args, settings, lambda: build_bsc_client(settings.bsc_rpc_urls.split(",")), BscWatcher
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+from functools import cached_property
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from trustora.enums import Chain, Token
+from trustora.multicall import MULTICALL3_ADDRESS
+from trustora.tokens import TokenRegistry, build_token_registry
+
 
 class WatcherSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -11,10 +17,58 @@ class WatcherSettings(BaseSettings):
     redis_url: str = Field(..., alias="REDIS_URL")
     bsc_rpc_urls: str = Field(..., alias="BSC_RPC_URLS")
     bsc_usdt_contract: str = Field(..., alias="BSC_USDT_CONTRACT")
+    bsc_usdt_decimals: int = Field(18, alias="BSC_USDT_DECIMALS")
+    bsc_usdc_contract: str = Field("", alias="BSC_USDC_CONTRACT")
+    bsc_usdc_decimals: int = Field(18, alias="BSC_USDC_DECIMALS")
     bsc_confirmations_required: int = Field(12, alias="BSC_CONFIRMATIONS_REQUIRED")
 
+    ws_url: str = Field("", alias="BSC_WS_URL")
+
     scan_interval_seconds: int = Field(30, alias="BSC_SCAN_INTERVAL")
+    subscribed_scan_interval_seconds: int = Field(120, alias="BSC_SUBSCRIBED_SCAN_INTERVAL")
+    head_poll_seconds: float = Field(3, alias="BSC_HEAD_POLL_INTERVAL")
+    confirm_by_finality: bool = Field(False, alias="BSC_CONFIRM_BY_FINALITY")
+    confirmation_poll_seconds: float = Field(3, alias="BSC_CONFIRMATION_POLL_INTERVAL")
     rescan_interval_seconds: int = Field(300, alias="BSC_RESCAN_INTERVAL")
+    index_resync_interval_seconds: int = Field(600, alias="BSC_INDEX_RESYNC_INTERVAL")
+
+    initial_lookback_blocks: int = Field(500, alias="BSC_INITIAL_LOOKBACK_BLOCKS")
+    backfill_chunk_blocks: int = Field(500, alias="BSC_BACKFILL_CHUNK_BLOCKS")
+    backfill_max_chunk_blocks: int = Field(5000, alias="BSC_BACKFILL_MAX_CHUNK_BLOCKS")
+    backfill_concurrency: int = Field(4, alias="BSC_BACKFILL_CONCURRENCY")
+    apply_batch_size: int = Field(200, alias="BSC_APPLY_BATCH_SIZE")
+
+    quarantine_poll_seconds: float = Field(15, alias="BSC_QUARANTINE_POLL_INTERVAL")
+    quarantine_base_delay_seconds: float = Field(30, alias="BSC_QUARANTINE_BASE_DELAY")
+    quarantine_max_attempts: int = Field(10, alias="BSC_QUARANTINE_MAX_ATTEMPTS")
+
+    reorg_ring_size: int = Field(128, alias="BSC_REORG_RING_SIZE")
+
+    reconcile_interval_seconds: float = Field(600, alias="BSC_RECONCILE_INTERVAL")
+    reconcile_tolerance: float = Field(0.01, alias="BSC_RECONCILE_TOLERANCE")
+    reconcile_rescan: bool = Field(False, alias="BSC_RECONCILE_RESCAN")
+    reconcile_rescan_blocks: int = Field(28800, alias="BSC_RECONCILE_RESCAN_BLOCKS")
+    multicall_address: str = Field(MULTICALL3_ADDRESS, alias="BSC_MULTICALL_ADDRESS")
+
+    payout_poll_seconds: float = Field(15, alias="BSC_PAYOUT_POLL_INTERVAL")
+    payout_drop_seconds: float = Field(600, alias="BSC_PAYOUT_DROP_AFTER")
+
+    sharded: bool = Field(False, alias="BSC_SHARDED")
+    lease_ttl_seconds: float = Field(30, alias="BSC_LEASE_TTL")
+
+    topic_filter_chunk_size: int = Field(100, alias="BSC_TOPIC_FILTER_CHUNK")
+    topic_filter_max_addresses: int = Field(1000, alias="BSC_TOPIC_FILTER_MAX_ADDRESSES")
+
+    @cached_property
+    def tokens(self) -> TokenRegistry:
+        return build_token_registry(
+            Chain.BEP20,
+            {
+                Token.USDT: (self.bsc_usdt_contract, self.bsc_usdt_decimals),
+                Token.USDC: (self.bsc_usdc_contract, self.bsc_usdc_decimals),
+            },
+            normalize=str.lower,
+        )
 
 
 def load_settings() -> WatcherSettings:
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import aiohttp
+
+from trustora.chain_client import TRANSFER_TOPIC
+
+
+@dataclass
+class SubscriptionState:
+    connected: bool = False
+
+
+async def subscribe_transfer_logs(
+    ws_url: str,
+    contract: str | list[str],
+    on_log: Callable[[dict[str, Any]], Awaitable[None]],
+    state: SubscriptionState,
+    retry_seconds: float = 5.0,
+    ack_timeout: float = 10.0,
+) -> None:
+    contracts = [contract] if isinstance(contract, str) else contract
+    request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "eth_subscribe",
+        "params": ["logs", {"address": [c.lower() for c in contracts], "topics": [TRANSFER_TOPIC]}],
+    }
+    while True:
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(ws_url, heartbeat=30) as ws:
+                    await ws.send_json(request)
+                    ack = await ws.receive_json(timeout=ack_timeout)
+                    if ack.get("error") or not ack.get("result"):
+                        raise RuntimeError(f"eth_subscribe rejected: {ack.get('error')}")
+                    subscription_id = ack["result"]
+                    state.connected = True
+                    logging.info("subscribed to transfer logs via %s", ws_url)
+                    async for message in ws:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        data = message.json()
+                        params = data.get("params") or {}
+                        if (
+                            data.get("method") != "eth_subscription"
+                            or params.get("subscription") != subscription_id
+                        ):
+                            continue
+                        try:
+                            await on_log(params["result"])
+                        except Exception as exc:
+                            logging.error("pushed log handling failed: %s", exc)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - network behavior
+            logging.warning("log subscription error: %s", exc)
+        finally:
+            state.connected = False
+        logging.info("log subscription down, polling only")
+        await asyncio.sleep(retry_seconds)
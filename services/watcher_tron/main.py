@@ -4,89 +4,56 @@ import asyncio
 import logging
 
 from redis.asyncio import Redis
-from sqlalchemy import select
-from tronpy import Tron
-from tronpy.providers import HTTPProvider
 
-from trustora.enums import Chain, EscrowStatus
-from trustora.escrow import get_escrow_for_update, transition_escrow
-from trustora.idempotency import can_record_deposit
-from trustora.db import create_engine, create_session_factory
-from trustora.models import Escrow
 from services.watcher_tron.settings import load_settings
+from trustora.address_index import DepositAddressIndex
+from trustora.backfill import TransferRate
+from trustora.chain_client import TransferLog, TronChainClient, build_tron_client
+from trustora.db import create_engine, create_session_factory
+from trustora.enums import Chain
+from trustora.watcher import ChainWatcher
 
 logging.basicConfig(level=logging.INFO)
 
 
+class TronWatcher(ChainWatcher):
+    def __init__(self, settings, session_factory, redis: Redis, client: TronChainClient) -> None:
+        # No canonical Multicall deployment on TRON; balanceOf goes out as batched eth_calls.
+        super().__init__(
+            settings,
+            session_factory,
+            redis,
+            client,
+            Chain.TRC20,
+            "tron",
+            settings.tron_confirmations_required,
+            DepositAddressIndex(Chain.TRC20, resync_seconds=settings.index_resync_interval_seconds),
+            topic_filter_concurrency=settings.topic_filter_concurrency,
+        )
+        self.rate = TransferRate(per_block=settings.transfers_per_block)
+
+    async def fetch_transfers(self, start: int, end: int) -> list[TransferLog]:
+        settings = self.settings
+        blocks = end - start + 1
+        if self.rate.prefer_recipient_filter(
+            len(self.index), blocks, settings.topic_filter_chunk_size, settings.filter_request_cost
+        ):
+            return await self.fetch_recipients(start, end, self.index.addresses())
+        transfers = await self.client.get_transfers(start, end, settings.tokens.contracts())
+        self.rate.observe(blocks, len(transfers))
+        return transfers
+
+
 async def scan_loop() -> None:
     settings = load_settings()
     redis = Redis.from_url(settings.redis_url, decode_responses=True)
     engine = create_engine(settings.database_url)
     session_factory = create_session_factory(engine)
-    rpc_urls = settings.tron_rpc_urls.split(",")
-
-    while True:
-        try:
-            await scan_once(settings, session_factory, redis, rpc_urls)
-        except Exception as exc:  # pragma: no cover
-            logging.error("scan error: %s", exc)
-        await asyncio.sleep(settings.scan_interval_seconds)
-
-
-async def scan_once(settings, session_factory, redis: Redis, rpc_urls: list[str]) -> None:
-    client = Tron(provider=HTTPProvider(rpc_urls[0]))
-    latest_block = client.get_latest_block_number()
-    last_block = int(await redis.get("tron:last_block") or 0)
-    from_block = max(latest_block - 500, last_block + 1)
-    to_block = latest_block
-
-    async with session_factory() as session:
-        result = await session.execute(
-            select(Escrow).where(
-                Escrow.chain == Chain.TRC20,
-                Escrow.status.in_([EscrowStatus.AWAITING_DEPOSIT, EscrowStatus.UNDERPAID]),
-            )
-        )
-        escrows = result.scalars().all()
-
-    if not escrows:
-        await redis.set("tron:last_block", to_block)
-        return
-
-    contract = client.get_contract(settings.tron_usdt_contract)
-    logs = contract.get_event_logs(event_name="Transfer", since=from_block, stop=to_block)
-    addresses = {e.deposit_address for e in escrows}
-
-    for log in logs:
-        to_addr = log["result"]["to"]
-        amount = int(log["result"]["value"]) / 1_000_000
-        if to_addr not in addresses:
-            continue
-        confirmations = latest_block - log["block_number"]
-        if confirmations < settings.tron_confirmations_required:
-            continue
-        escrow = next(e for e in escrows if e.deposit_address == to_addr)
-        await update_escrow(session_factory, escrow.id, log["transaction_id"], amount)
-
-    await redis.set("tron:last_block", to_block)
-
-
-async def update_escrow(session_factory, escrow_id, tx_hash: str, amount: float) -> None:
-    amount = round(amount, 2)
-    async with session_factory() as session:
-        async with session.begin():
-            escrow = await get_escrow_for_update(session, escrow_id)
-            if not can_record_deposit(escrow, tx_hash):
-                return
-            escrow.deposit_tx_hash = tx_hash
-            escrow.amount_received = amount
-            escrow.deposit_confirmations = None
-            if amount < escrow.amount_expected:
-                await transition_escrow(session, escrow, EscrowStatus.UNDERPAID)
-            elif amount > escrow.amount_expected:
-                await transition_escrow(session, escrow, EscrowStatus.OVERPAID_REVIEW)
-            else:
-                await transition_escrow(session, escrow, EscrowStatus.FUNDS_LOCKED)
+    client = build_tron_client(settings.tron_rpc_urls.split(","))
+    try:
+        await TronWatcher(settings, session_factory, redis, client).run()
+    finally:
+        await client.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import asyncio
+
+from services.watcher_tron.main import TronWatcher
+from services.watcher_tron.settings import load_settings
+from trustora.chain_client import build_tron_client
+from trustora.replay import replay, replay_parser
+
+
+def main() -> None:
+    args = replay_parser("TRON").parse_args()
+    settings = load_settings()
+    asyncio.run(
+        replay(
+            args,
+            settings,
+            lambda: build_tron_client(settings.tron_rpc_urls.split(",")),
+            TronWatcher,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from functools import cached_property
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from trustora.enums import Chain, Token
+from trustora.tokens import TokenRegistry, build_token_registry
+
 
 class WatcherSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -11,10 +16,55 @@ class WatcherSettings(BaseSettings):
     redis_url: str = Field(..., alias="REDIS_URL")
     tron_rpc_urls: str = Field(..., alias="TRON_RPC_URLS")
     tron_usdt_contract: str = Field(..., alias="TRON_USDT_CONTRACT")
+    tron_usdt_decimals: int = Field(6, alias="TRON_USDT_DECIMALS")
+    tron_usdc_contract: str = Field("", alias="TRON_USDC_CONTRACT")
+    tron_usdc_decimals: int = Field(6, alias="TRON_USDC_DECIMALS")
     tron_confirmations_required: int = Field(20, alias="TRON_CONFIRMATIONS_REQUIRED")
 
     scan_interval_seconds: int = Field(30, alias="TRON_SCAN_INTERVAL")
+    head_poll_seconds: float = Field(3, alias="TRON_HEAD_POLL_INTERVAL")
+    confirm_by_finality: bool = Field(False, alias="TRON_CONFIRM_BY_FINALITY")
+    confirmation_poll_seconds: float = Field(3, alias="TRON_CONFIRMATION_POLL_INTERVAL")
     rescan_interval_seconds: int = Field(300, alias="TRON_RESCAN_INTERVAL")
+    index_resync_interval_seconds: int = Field(600, alias="TRON_INDEX_RESYNC_INTERVAL")
+
+    initial_lookback_blocks: int = Field(500, alias="TRON_INITIAL_LOOKBACK_BLOCKS")
+    backfill_chunk_blocks: int = Field(500, alias="TRON_BACKFILL_CHUNK_BLOCKS")
+    backfill_max_chunk_blocks: int = Field(5000, alias="TRON_BACKFILL_MAX_CHUNK_BLOCKS")
+    backfill_concurrency: int = Field(4, alias="TRON_BACKFILL_CONCURRENCY")
+    apply_batch_size: int = Field(200, alias="TRON_APPLY_BATCH_SIZE")
+
+    topic_filter_chunk_size: int = Field(100, alias="TRON_TOPIC_FILTER_CHUNK")
+    topic_filter_concurrency: int = Field(8, alias="TRON_TOPIC_FILTER_CONCURRENCY")
+    transfers_per_block: float = Field(80, alias="TRON_TRANSFERS_PER_BLOCK")
+    filter_request_cost: float = Field(200, alias="TRON_FILTER_REQUEST_COST")
+
+    quarantine_poll_seconds: float = Field(15, alias="TRON_QUARANTINE_POLL_INTERVAL")
+    quarantine_base_delay_seconds: float = Field(30, alias="TRON_QUARANTINE_BASE_DELAY")
+    quarantine_max_attempts: int = Field(10, alias="TRON_QUARANTINE_MAX_ATTEMPTS")
+
+    reorg_ring_size: int = Field(128, alias="TRON_REORG_RING_SIZE")
+
+    reconcile_interval_seconds: float = Field(600, alias="TRON_RECONCILE_INTERVAL")
+    reconcile_tolerance: float = Field(0.01, alias="TRON_RECONCILE_TOLERANCE")
+    reconcile_rescan: bool = Field(False, alias="TRON_RECONCILE_RESCAN")
+    reconcile_rescan_blocks: int = Field(28800, alias="TRON_RECONCILE_RESCAN_BLOCKS")
+
+    payout_poll_seconds: float = Field(15, alias="TRON_PAYOUT_POLL_INTERVAL")
+    payout_drop_seconds: float = Field(600, alias="TRON_PAYOUT_DROP_AFTER")
+
+    sharded: bool = Field(False, alias="TRON_SHARDED")
+    lease_ttl_seconds: float = Field(30, alias="TRON_LEASE_TTL")
+
+    @cached_property
+    def tokens(self) -> TokenRegistry:
+        return build_token_registry(
+            Chain.TRC20,
+            {
+                Token.USDT: (self.tron_usdt_contract, self.tron_usdt_decimals),
+                Token.USDC: (self.tron_usdc_contract, self.tron_usdc_decimals),
+            },
+        )
 
 
 def load_settings() -> WatcherSettings:
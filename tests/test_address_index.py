@@ -0,0 +1,92 @@
+import uuid
+
+from trustora.address_index import DepositAddressIndex
+from trustora.enums import Chain, EscrowStatus, Token
+
+
+def make_index():
+    return DepositAddressIndex(Chain.BEP20, normalize=str.lower)
+
+
+def test_index_lookup_is_case_insensitive():
+    index = make_index()
+    escrow_id = uuid.uuid4()
+    index.replace([(escrow_id, "0xAbC0000000000000000000000000000000000001", 50.0)])
+    watched = index.get("0xabc0000000000000000000000000000000000001")
+    assert watched.escrow_id == escrow_id
+    assert watched.amount_expected == 50.0
+    assert not index.is_stale()
+
+
+def test_index_tracks_transitions():
+    index = make_index()
+    escrow_id = uuid.uuid4()
+    index.apply_status("0xA1", escrow_id, 10.0, EscrowStatus.AWAITING_DEPOSIT)
+    assert index.get("0xa1") is not None
+    index.apply_status("0xA1", escrow_id, 10.0, EscrowStatus.FUNDS_LOCKED)
+    assert index.get("0xa1") is None
+    assert len(index) == 0
+
+
+def test_index_ignores_other_chains():
+    index = make_index()
+    index.apply_event(
+        {
+            "escrow_id": str(uuid.uuid4()),
+            "chain": Chain.TRC20.value,
+            "status": EscrowStatus.AWAITING_DEPOSIT.value,
+            "deposit_address": "TXYZ",
+            "amount_expected": 5.0,
+        }
+    )
+    assert len(index) == 0
+    assert index.is_stale()
+
+
+def test_index_keeps_escrow_token():
+    index = make_index()
+    usdc_id = uuid.uuid4()
+    index.replace([(uuid.uuid4(), "0xA1", 10.0), (usdc_id, "0xB2", 20.0, Token.USDC)])
+    assert index.get("0xa1").token == Token.USDT
+    assert index.get("0xb2").token == Token.USDC
+    index.apply_event(
+        {
+            "escrow_id": str(usdc_id),
+            "chain": Chain.BEP20.value,
+            "status": EscrowStatus.UNDERPAID.value,
+            "deposit_address": "0xB2",
+            "amount_expected": 20.0,
+            "token": Token.USDC.value,
+        }
+    )
+    assert index.get("0xb2").token == Token.USDC
+
+
+def test_index_matches_shared_addresses_by_amount():
+    index = make_index()
+    first, second = uuid.uuid4(), uuid.uuid4()
+    index.replace(
+        [
+            (first, "0xS1", 100.07, Token.USDT, True),
+            (second, "0xS1", 100.42, Token.USDT, True),
+        ]
+    )
+    assert len(index) == 1
+    assert index.get("0xs1", 100.42).escrow_id == second
+    assert index.get("0xs1", 100.07).escrow_id == first
+    assert index.get("0xs1", 100.0) is None
+    assert index.get("0xs1") is None
+    index.apply_status("0xS1", first, 100.07, EscrowStatus.FUNDS_LOCKED)
+    assert index.get("0xs1", 100.07) is None
+    assert index.find(second).amount_tagged
+    index.remove(second)
+    assert len(index) == 0
+
+
+def test_index_refuses_colliding_amount_tags():
+    index = make_index()
+    first, second = uuid.uuid4(), uuid.uuid4()
+    index.apply_status("0xS1", first, 100.07, EscrowStatus.AWAITING_DEPOSIT, Token.USDT, True)
+    index.apply_status("0xS1", second, 100.07, EscrowStatus.AWAITING_DEPOSIT, Token.USDT, True)
+    assert index.get("0xs1", 100.07).escrow_id == first
+    assert index.find(second) is None
@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+
+from trustora.address_pool import apply_pool_event
+from trustora.enums import Chain, EscrowStatus
+from trustora.tagging import BIND_TAG_SCRIPT, RELEASE_TAG_SCRIPT
+
+
+class FakePool:
+    cooldown_seconds = 3600
+
+    def __init__(self):
+        self.calls = []
+
+    async def bind(self, address, escrow_id):
+        self.calls.append(("bind", address, escrow_id))
+
+    async def release(self, address, escrow_id):
+        self.calls.append(("release", address, escrow_id))
+
+
+class FakeRedis:
+    def __init__(self):
+        self.scripts = []
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.scripts.append((script, keys[0], args[0]))
+            return 1
+
+        return run
+
+
+def event(escrow_id, status, tagged=False, chain=Chain.BEP20):
+    return {
+        "escrow_id": str(escrow_id),
+        "chain": chain.value,
+        "status": status.value,
+        "deposit_address": "0xA1",
+        "amount_expected": 25.07,
+        "amount_tagged": tagged,
+    }
+
+
+def test_pool_binds_open_escrows_and_releases_finished_ones():
+    pool, redis = FakePool(), FakeRedis()
+    escrow_id = uuid.uuid4()
+
+    async def run():
+        pools = {Chain.BEP20: pool}
+        await apply_pool_event(pools, redis, event(escrow_id, EscrowStatus.AWAITING_DEPOSIT))
+        await apply_pool_event(pools, redis, event(escrow_id, EscrowStatus.COMPLETED))
+        await apply_pool_event(
+            pools, redis, event(escrow_id, EscrowStatus.COMPLETED, chain=Chain.TRC20)
+        )
+
+    asyncio.run(run())
+    assert pool.calls == [("bind", "0xA1", escrow_id), ("release", "0xA1", escrow_id)]
+    assert redis.scripts == []
+
+
+def test_pool_frees_amount_tags_instead_of_shared_addresses():
+    pool, redis = FakePool(), FakeRedis()
+    escrow_id = uuid.uuid4()
+
+    async def run():
+        pools = {Chain.BEP20: pool}
+        await apply_pool_event(pools, redis, event(escrow_id, EscrowStatus.FUNDS_LOCKED, True))
+        await apply_pool_event(pools, redis, event(escrow_id, EscrowStatus.COMPLETED, True))
+
+    asyncio.run(run())
+    assert pool.calls == []
+    key = "deposit_tag:BEP20:0xA1:2507"
+    assert redis.scripts == [
+        (BIND_TAG_SCRIPT, key, str(escrow_id)),
+        (RELEASE_TAG_SCRIPT, key, str(escrow_id)),
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+
+from trustora.backfill import ChunkSizer, TransferRate, backoff_delay, plan_chunks, run_backfill
+
+
+def test_plan_chunks_covers_range():
+    assert plan_chunks(10, 25, 5, 10) == [(10, 14), (15, 19), (20, 24), (25, 25)]
+    assert plan_chunks(10, 25, 5, 2) == [(10, 14), (15, 19)]
+
+
+def test_backfill_applies_in_order_and_checkpoints():
+    applied = []
+    checkpoints = []
+
+    async def fetch(start, end):
+        await asyncio.sleep(0.001 * (end % 3))
+        return [start]
+
+    async def apply(start, end, items):
+        applied.append((start, end))
+
+    async def checkpoint(block):
+        checkpoints.append(block)
+
+    async def run():
+        sizer = ChunkSizer(size=10)
+        return await run_backfill(1, 100, fetch, apply, checkpoint, sizer, concurrency=3)
+
+    assert asyncio.run(run()) == 100
+    assert applied == sorted(applied)
+    assert applied[0][0] == 1 and applied[-1][1] == 100
+    assert all(b[0] == a[1] + 1 for a, b in zip(applied, applied[1:], strict=False))
+    assert checkpoints[-1] == 100
+
+
+def test_backfill_shrinks_chunks_on_error():
+    calls = []
+    sizer = ChunkSizer(size=40, min_size=10)
+
+    async def fetch(start, end):
+        calls.append((start, end))
+        if end - start + 1 > 20:
+            raise RuntimeError("range too large")
+        return []
+
+    async def noop(*args):
+        return None
+
+    async def run():
+        return await run_backfill(1, 60, fetch, noop, noop, sizer, concurrency=2, backoff_seconds=0)
+
+    assert asyncio.run(run()) == 60
+    assert sizer.size <= 20
+    assert sizer.max_size == 5000
+
+
+def test_chunks_grow_back_after_a_run_of_successes():
+    sizer = ChunkSizer(size=400, grow_after=2)
+    sizer.on_error()
+    assert sizer.size == 200
+    sizer.on_success(200, 0)
+    assert sizer.size == 200
+    sizer.on_success(200, 0)
+    sizer.on_success(200, 0)
+    assert sizer.size == 400
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    delays = [backoff_delay(10, 0.5, 30.0) for _ in range(50)]
+    assert all(0 <= delay <= 30.0 for delay in delays)
+    assert len(set(delays)) > 1
+    assert backoff_delay(1, 0.0, 30.0) == 0
+
+
+def test_transfer_rate_picks_cheaper_strategy():
+    rate = TransferRate(per_block=80.0)
+    assert rate.prefer_recipient_filter(500, 100, chunk_size=100, request_cost=200)
+    assert not rate.prefer_recipient_filter(50_000, 10, chunk_size=100, request_cost=200)
+    for _ in range(50):
+        rate.observe(100, 0)
+    assert rate.per_block < 1
+    assert not rate.prefer_recipient_filter(500, 100, chunk_size=100, request_cost=200)
@@ -0,0 +1,64 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.watcher_bsc.subscription import (
+    SubscriptionState,
+    subscribe_transfer_logs,
+)
+
+LOG = {"topics": [], "data": "0x0", "removed": False}
+
+
+def notification(subscription, result):
+    return {
+        "jsonrpc": "2.0",
+        "method": "eth_subscription",
+        "params": {"subscription": subscription, "result": result},
+    }
+
+
+async def fake_node(request):
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    subscribe = await ws.receive_json()
+    assert subscribe["method"] == "eth_subscribe"
+    await ws.send_json({"jsonrpc": "2.0", "id": subscribe["id"], "result": "0xsub"})
+    await ws.send_json(notification("0xother", {}))
+    await ws.send_json(notification("0xsub", LOG))
+    await ws.close()
+    return ws
+
+
+def test_subscription_delivers_logs_and_falls_back():
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", fake_node)
+        server = TestServer(app)
+        await server.start_server()
+        state = SubscriptionState()
+        received = []
+        seen_connected = []
+
+        async def on_log(log):
+            seen_connected.append(state.connected)
+            received.append(log)
+
+        task = asyncio.create_task(
+            subscribe_transfer_logs(
+                str(server.make_url("/")), "0xContract", on_log, state, retry_seconds=60
+            )
+        )
+        for _ in range(100):
+            if received and not state.connected:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await server.close()
+        return received, seen_connected, state.connected
+
+    received, seen_connected, connected = asyncio.run(run())
+    assert received == [LOG]
+    assert seen_connected == [True]
+    assert connected is False
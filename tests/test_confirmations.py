@@ -0,0 +1,34 @@
+import uuid
+
+from trustora.confirmations import ConfirmationTracker
+from trustora.enums import EscrowStatus
+
+
+def test_confirmations_from_head():
+    tracker = ConfirmationTracker()
+    first, second = uuid.uuid4(), uuid.uuid4()
+    tracker.replace([(first, 100)])
+    tracker.track(second, 110)
+    assert tracker.confirmations(112) == {first: 12, second: 2}
+    tracker.forget(first)
+    assert len(tracker) == 1
+    assert not tracker.is_stale()
+
+
+def test_confirmations_follow_finality_tag():
+    tracker = ConfirmationTracker()
+    final, recent = uuid.uuid4(), uuid.uuid4()
+    tracker.replace([(final, 100), (recent, 90)])
+    tracker.track(recent, 105)
+    assert tracker.confirmations(130, finalized=102, required=12) == {final: 12, recent: 11}
+    assert tracker.confirmations(103, finalized=102, required=12) == {final: 12, recent: 0}
+
+
+def test_events_track_and_forget_deposits():
+    tracker = ConfirmationTracker()
+    escrow_id = uuid.uuid4()
+    seen = {"escrow_id": str(escrow_id), "status": EscrowStatus.DEPOSIT_SEEN.value}
+    tracker.apply_event(seen | {"deposit_block": 100})
+    assert tracker.confirmations(104) == {escrow_id: 4}
+    tracker.apply_event(seen | {"status": EscrowStatus.FUNDS_LOCKED.value})
+    assert len(tracker) == 0
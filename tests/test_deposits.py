@@ -0,0 +1,100 @@
+import uuid
+
+import pytest
+
+from trustora.deposits import DepositMatch, EscrowRow, deposit_path, plan_deposits
+from trustora.enums import EscrowStatus
+
+
+def make_row(status=EscrowStatus.AWAITING_DEPOSIT, tx_hash=None, received=None, block=None):
+    return EscrowRow(
+        uuid.uuid4(), status, "0xabc", 10.0, tx_hash, amount_received=received, deposit_block=block
+    )
+
+
+def test_plan_records_first_sighting_as_seen():
+    row = make_row()
+    match = DepositMatch(row.id, "tx1", 10.0, 100, 2)
+    updates, states, applied = plan_deposits({row.id: row}, [match], 12)
+    assert applied == [match]
+    assert updates[row.id]["status"] == EscrowStatus.DEPOSIT_SEEN
+    assert updates[row.id]["deposit_block"] == 100
+    assert states[row.id].deposit_tx_hash == "tx1"
+
+
+def test_plan_promotes_confirmed_deposits():
+    row = make_row()
+    updates, _, _ = plan_deposits({row.id: row}, [DepositMatch(row.id, "tx1", 9.0, 100, 20)], 12)
+    assert updates[row.id]["status"] == EscrowStatus.UNDERPAID
+
+
+def test_plan_sums_transfers_into_running_total():
+    row = make_row()
+    matches = [DepositMatch(row.id, "tx1", 6.0, 100, 1), DepositMatch(row.id, "tx2", 4.0, 101, 0)]
+    updates, states, _ = plan_deposits({row.id: row}, matches, 12)
+    assert updates[row.id]["deposit_tx_hash"] == "tx1"
+    assert updates[row.id]["amount_received"] == 10.0
+    assert updates[row.id]["deposit_block"] == 101
+    assert states[row.id].status == EscrowStatus.DEPOSIT_SEEN
+
+
+def test_underpaid_escrow_accepts_top_up():
+    row = make_row(EscrowStatus.UNDERPAID, "tx1", received=6.0, block=90)
+    top_up = DepositMatch(row.id, "tx2", 4.0, 100, 20)
+    updates, _, _ = plan_deposits({row.id: row}, [top_up], 12)
+    assert updates[row.id]["status"] == EscrowStatus.FUNDS_LOCKED
+    assert updates[row.id]["amount_received"] == 10.0
+
+
+def test_ledger_entries_are_counted_once():
+    row = make_row()
+    first = DepositMatch(row.id, "tx1", 6.0, 100, 1, log_index=3)
+    again = DepositMatch(row.id, "tx2", 4.0, 101, 0, log_index=0)
+    updates, _, applied = plan_deposits({row.id: row}, [first, again, again], 12, {("tx1", 3)})
+    assert applied == [again]
+    assert updates[row.id]["amount_received"] == 4.0
+
+
+def test_confirmations_count_from_newest_transfer():
+    row = make_row(EscrowStatus.DEPOSIT_SEEN, "tx2", received=4.0, block=110)
+    late = DepositMatch(row.id, "tx1", 6.0, 100, 15)
+    updates, _, _ = plan_deposits({row.id: row}, [late], 12)
+    assert updates[row.id]["deposit_confirmations"] == 5
+    assert updates[row.id]["status"] == EscrowStatus.DEPOSIT_SEEN
+
+
+def test_plan_skips_unwatched_and_missing_rows():
+    locked = make_row(status=EscrowStatus.FUNDS_LOCKED, tx_hash="tx0")
+    missing = DepositMatch(uuid.uuid4(), "tx9", 1.0, 1, 0)
+    updates, _, _ = plan_deposits(
+        {locked.id: locked}, [DepositMatch(locked.id, "tx1", 1.0, 1, 0), missing], 12
+    )
+    assert updates == {}
+
+
+def test_deposit_path_validates_transitions():
+    assert deposit_path(EscrowStatus.UNDERPAID, 10.0, 10.0, True) == [
+        EscrowStatus.AWAITING_DEPOSIT,
+        EscrowStatus.DEPOSIT_SEEN,
+        EscrowStatus.FUNDS_LOCKED,
+    ]
+    with pytest.raises(ValueError):
+        deposit_path(EscrowStatus.FUNDS_LOCKED, 10.0, 10.0, False)
+
+
+def test_transfers_sharing_a_transaction_are_all_counted():
+    row = make_row()
+    matches = [
+        DepositMatch(row.id, "tx1", 6.0, 100, 1, log_index=3),
+        DepositMatch(row.id, "tx1", 4.0, 100, 1, log_index=5),
+    ]
+    updates, _, applied = plan_deposits({row.id: row}, matches, 12)
+    assert applied == matches
+    assert updates[row.id]["amount_received"] == 10.0
+
+
+def test_backfilled_deposits_are_not_counted_again():
+    row = make_row(EscrowStatus.DEPOSIT_SEEN, "tx1", received=6.0, block=100)
+    rescanned = DepositMatch(row.id, "tx1", 6.0, 100, 1, log_index=3)
+    updates, _, _ = plan_deposits({row.id: row}, [rescanned], 12, {("tx1", -1)})
+    assert updates == {}
@@ -0,0 +1,40 @@
+import asyncio
+
+from trustora.events import ESCROW_EVENTS_DEAD_LETTER, deliver_event
+
+
+class FakeRedis:
+    def __init__(self, deliveries):
+        self.deliveries = deliveries
+        self.added = []
+
+    async def xpending_range(self, stream, group, min, max, count):
+        return [{"message_id": min, "times_delivered": self.deliveries}]
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self.added.append((stream, fields))
+
+
+async def failing(event):
+    raise RuntimeError("telegram down")
+
+
+def test_failed_events_stay_pending_until_delivery_limit():
+    redis = FakeRedis(deliveries=2)
+    assert not asyncio.run(deliver_event(redis, "bot", "1-0", {"status": "X"}, failing, 5))
+    assert redis.added == []
+
+
+def test_events_are_dead_lettered_after_delivery_limit():
+    redis = FakeRedis(deliveries=5)
+    assert asyncio.run(deliver_event(redis, "bot", "1-0", {"status": "X"}, failing, 5))
+    stream, fields = redis.added[0]
+    assert stream == ESCROW_EVENTS_DEAD_LETTER
+    assert fields["entry_id"] == "1-0" and fields["error"] == "telegram down"
+
+
+def test_handled_events_are_acknowledged():
+    async def ok(event):
+        pass
+
+    assert asyncio.run(deliver_event(FakeRedis(0), "bot", "1-0", {}, ok, 5))
@@ -0,0 +1,49 @@
+import asyncio
+
+from trustora.enums import Chain
+from trustora.executor import ChainExecutor
+
+
+def test_executor_limits_concurrency_per_chain():
+    executor = ChainExecutor({Chain.BEP20: 2, Chain.TRC20: 1}, signing_workers=2)
+    running = {Chain.BEP20: 0, Chain.TRC20: 0}
+    peak = {Chain.BEP20: 0, Chain.TRC20: 0}
+
+    async def operation(chain):
+        running[chain] += 1
+        peak[chain] = max(peak[chain], running[chain])
+        await asyncio.sleep(0.01)
+        running[chain] -= 1
+        return chain
+
+    async def run():
+        calls = [executor.run(chain, operation(chain)) for chain in [Chain.BEP20, Chain.TRC20] * 4]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(run())
+    executor.shutdown()
+    assert results.count(Chain.BEP20) == 4
+    assert peak == {Chain.BEP20: 2, Chain.TRC20: 1}
+    snapshot = executor.snapshot()
+    assert snapshot["chains"]["BEP20"]["completed"] == 4
+    assert snapshot["chains"]["BEP20"]["max_queued"] == 2
+    assert snapshot["chains"]["TRC20"]["queued"] == 0
+
+
+def test_executor_counts_failures_and_signs_off_loop():
+    executor = ChainExecutor({Chain.BEP20: 1}, signing_workers=1)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def run():
+        try:
+            await executor.run(Chain.BEP20, fail())
+        except RuntimeError:
+            pass
+        return await executor.sign(lambda a, b: a + b, 2, 3)
+
+    assert asyncio.run(run()) == 5
+    executor.shutdown()
+    assert executor.stats[Chain.BEP20].failed == 1
+    assert executor.snapshot()["signing"] == {"workers": 1, "pending": 0}
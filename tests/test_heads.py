@@ -0,0 +1,67 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from trustora.enums import Chain
+from trustora.heads import ChainHead, HeadTracker, head_key
+
+
+def test_chain_head_round_trip():
+    head = ChainHead(Chain.BEP20, 120, "0xb", "0xa", 100, 110, 3_000_000_000, 56, time.time())
+    restored = ChainHead.loads(head.dumps())
+    assert restored == head
+    assert restored.block_ref().parent_hash == "0xa"
+    assert restored.age() < 5
+
+
+class FakeRpc:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    async def batch(self, calls):
+        self.calls.append([method for method, _ in calls])
+        return [self.results[(method, tuple(params))] for method, params in calls]
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+
+    def set(self, key, value):
+        self.store[key] = value
+
+    def publish(self, key, value):
+        pass
+
+    async def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store)
+
+
+def test_refresh_batches_head_reads_and_tolerates_missing_tags():
+    block = {"number": hex(120), "hash": "0xb", "parentHash": "0xa"}
+    rpc = FakeRpc(
+        {
+            ("eth_getBlockByNumber", ("latest", False)): block,
+            ("eth_getBlockByNumber", ("finalized", False)): RuntimeError("unknown tag"),
+            ("eth_getBlockByNumber", ("safe", False)): None,
+            ("eth_gasPrice", ()): hex(3_000_000_000),
+            ("eth_chainId", ()): hex(56),
+        }
+    )
+    redis = FakeRedis()
+    tracker = HeadTracker(redis, Chain.BEP20, SimpleNamespace(rpc=rpc))
+    head = asyncio.run(tracker.refresh())
+    asyncio.run(tracker.refresh())
+    assert (head.latest, head.finalized, head.safe, head.chain_id) == (120, None, None, 56)
+    assert head.gas_price == 3_000_000_000
+    assert len(rpc.calls[0]) == 5 and len(rpc.calls[1]) == 4
+    assert ChainHead.loads(redis.store[head_key(Chain.BEP20)]) == tracker.head
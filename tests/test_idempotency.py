@@ -1,7 +1,8 @@
 from trustora.idempotency import can_record_deposit, can_send_payout
+
+
 class DummyEscrow:
     def __init__(self):
-        self.deposit_tx_hash = None
         self.payout_tx_hash = None
 
 
@@ -10,11 +11,14 @@ def make_escrow():
 
 
 def test_deposit_idempotency():
-    escrow = make_escrow()
-    assert can_record_deposit(escrow, "tx1")
-    escrow.deposit_tx_hash = "tx1"
-    assert can_record_deposit(escrow, "tx1")
-    assert not can_record_deposit(escrow, "tx2")
+    recorded = {("tx1", 0)}
+    assert not can_record_deposit(recorded, "tx1", 0)
+    assert can_record_deposit(recorded, "tx1", 1)
+    assert can_record_deposit(recorded, "tx2", 0)
+
+
+def test_legacy_ledger_entries_cover_their_transaction():
+    assert not can_record_deposit({("tx1", -1)}, "tx1", 4)
 
 
 def test_payout_idempotency():
@@ -0,0 +1,41 @@
+from trustora.multicall import (
+    balance_of_call,
+    decode_aggregate3,
+    decode_uint,
+    encode_aggregate3,
+)
+
+
+def word(value):
+    return value.to_bytes(32, "big")
+
+
+def encode_results(results):
+    items = [
+        word(1 if data is not None else 0) + word(64) + word(len(data or b"")) + (data or b"")
+        for data in results
+    ]
+    offsets, position = [], 32 * len(items)
+    for item in items:
+        offsets.append(word(position))
+        position += len(item)
+    return "0x" + (word(32) + word(len(items)) + b"".join(offsets) + b"".join(items)).hex()
+
+
+def test_aggregate3_calldata_layout():
+    token = "0x55d398326f99059ff775485246999027b3197955"
+    call = balance_of_call("0x" + "ab" * 20)
+    assert call.hex() == "70a08231" + "00" * 12 + "ab" * 20
+    data = bytes.fromhex(encode_aggregate3([(token, call), (token, call)])[2:])
+    assert data[:4].hex() == "82ad56cb"
+    body = data[4:]
+    assert int.from_bytes(body[32:64], "big") == 2
+    first = 64 + int.from_bytes(body[64:96], "big")
+    assert body[first + 12 : first + 32].hex() == token[2:]
+    assert int.from_bytes(body[first + 96 : first + 128], "big") == len(call)
+    assert body[first + 128 : first + 128 + len(call)] == call
+
+
+def test_aggregate3_results_decode_failures_as_none():
+    decoded = decode_aggregate3(encode_results([word(10**18), None, word(0)]))
+    assert [decode_uint(data) for data in decoded] == [10**18, None, 0]
@@ -0,0 +1,54 @@
+from trustora.nonces import (
+    bump_gas_price,
+    can_reuse_nonce,
+    cancel_transaction,
+    find_holes,
+    is_nonce_conflict,
+    plan_resync,
+)
+
+
+def test_resync_starts_at_pending_count():
+    assert plan_resync(12, []) == (12, [])
+    assert plan_resync(12, [9, 10]) == (12, [])
+
+
+def test_resync_keeps_reserved_nonces_and_refills_holes():
+    assert plan_resync(12, [13, 15]) == (16, [12, 14])
+    assert plan_resync(12, [12]) == (13, [])
+
+
+def test_replacement_gas_price_beats_both_old_and_current():
+    assert bump_gas_price(3_000_000_000) == 3_375_000_001
+    assert bump_gas_price(3_000_000_000, 5_000_000_000) == 5_000_000_000
+
+
+def test_nonce_conflicts_are_recognised():
+    assert is_nonce_conflict(RuntimeError("nonce too low: next nonce 5, tx nonce 4"))
+    assert is_nonce_conflict(RuntimeError("Replacement transaction underpriced"))
+    assert not is_nonce_conflict(RuntimeError("insufficient funds for gas"))
+
+
+def test_cancel_transaction_reuses_nonce_with_empty_self_transfer():
+    txn = {"to": "0xtoken", "value": 0, "gas": 120000, "gasPrice": 1, "nonce": 7, "chainId": 56}
+    cancel = cancel_transaction(txn | {"data": "0xa9059cbb"}, "0xhot", 5)
+    assert cancel["nonce"] == 7 and cancel["chainId"] == 56
+    assert cancel["to"] == "0xhot" and cancel["value"] == 0 and cancel["data"] == "0x"
+    assert cancel["gasPrice"] == 5
+
+
+def test_failed_nonce_is_reused_only_if_the_node_never_saw_it():
+    assert can_reuse_nonce(7, 7, TimeoutError("read timeout"))
+    assert not can_reuse_nonce(7, 8, TimeoutError("read timeout"))
+    assert not can_reuse_nonce(7, 7, RuntimeError("nonce too low"))
+
+
+def test_holes_are_unsent_nonces_below_the_highest_sent_one():
+    assert find_holes(10, [11, 13], []) == [10, 12]
+    assert find_holes(10, [11, 13], [12]) == [10]
+    assert find_holes(10, [], [10, 11]) == []
+    assert find_holes(12, [9, 12], []) == []
+
+
+def test_resync_keeps_sent_nonces_above_a_hole():
+    assert plan_resync(10, [11, 12]) == (13, [10])
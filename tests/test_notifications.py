@@ -0,0 +1,35 @@
+import json
+
+from trustora.enums import Chain, EscrowStatus, Token
+from trustora.events import decode_entries, escrow_event
+from trustora.notifications import build_status_notifications
+
+
+class FakeEscrow:
+    id = "e1"
+    status = EscrowStatus.FUNDS_LOCKED
+    deposit_address = "0xabc"
+    amount_expected = 10.0
+    token = Token.USDT
+    amount_tagged = False
+    deposit_block = None
+
+
+def test_status_notifications_target_parties():
+    both = build_status_notifications(EscrowStatus.FUNDS_LOCKED, "TR-ABC123", 10.0, 1, 2)
+    assert [tg_id for tg_id, _ in both] == [1, 2]
+    assert "TR-ABC123" in both[0][1]
+    underpaid = build_status_notifications(EscrowStatus.UNDERPAID, "TR-ABC123", 10.0, 1, 2)
+    assert [tg_id for tg_id, _ in underpaid] == [1]
+    assert build_status_notifications(EscrowStatus.AWAITING_DEPOSIT, "TR-ABC123", 10.0, 1, 2) == []
+    failed = build_status_notifications(EscrowStatus.PAYOUT_FAILED, "TR-ABC123", 10.0, 1, 2)
+    assert [tg_id for tg_id, _ in failed] == [1, 2]
+    completed = build_status_notifications(EscrowStatus.COMPLETED, "TR-ABC123", 10.0, 1, 2)
+    assert [tg_id for tg_id, _ in completed] == [1, 2]
+
+
+def test_escrow_event_round_trips_through_stream_fields():
+    event = escrow_event(FakeEscrow(), Chain.BEP20)
+    entries = [("1-0", {"event": json.dumps(event)}), ("2-0", None)]
+    assert decode_entries(entries) == [("1-0", event), ("2-0", None)]
+    assert event["chain"] == "BEP20" and event["status"] == "FUNDS_LOCKED"
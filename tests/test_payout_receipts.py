@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime, timedelta
+
+from trustora.enums import EscrowStatus
+from trustora.payout_receipts import SentPayout, payout_confirmations, plan_payout_updates
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def sent(n: int, minutes_ago: float = 1, confirmations: int | None = None) -> SentPayout:
+    sent_at = NOW - timedelta(minutes=minutes_ago)
+    return SentPayout(uuid.UUID(int=n), f"0x{n:064x}", sent_at, confirmations)
+
+
+def receipt(block: int, status: str = "0x1") -> dict:
+    return {"blockNumber": hex(block), "status": status}
+
+
+def test_payout_confirmations_with_finality():
+    assert payout_confirmations(100, 110) == 10
+    assert payout_confirmations(100, 90) == 0
+    assert payout_confirmations(100, 130, finalized=99, required=20) == 19
+    assert payout_confirmations(100, 101, finalized=100, required=20) == 20
+
+
+def test_confirmed_payout_completes_escrow():
+    payouts = [sent(1), sent(2, confirmations=3)]
+    lookups = [(receipt(100), {}), (receipt(108), {})]
+    updates = plan_payout_updates(payouts, lookups, 112, None, 12, 600, NOW)
+    assert [(u.escrow_id.int, u.confirmations, u.status) for u in updates] == [
+        (1, 12, EscrowStatus.COMPLETED),
+        (2, 4, None),
+    ]
+
+
+def test_unchanged_confirmations_are_skipped():
+    lookups = [(receipt(108), {})]
+    updates = plan_payout_updates([sent(1, confirmations=4)], lookups, 112, None, 12, 600, NOW)
+    assert updates == []
+
+
+def test_reverted_payout_fails():
+    updates = plan_payout_updates([sent(1)], [(receipt(100, "0x0"), {})], 112, None, 12, 600, NOW)
+    assert updates[0].status == EscrowStatus.PAYOUT_FAILED
+    assert updates[0].reason == "reverted"
+
+
+def test_dropped_payout_fails_only_after_grace_period():
+    payouts = [sent(1, minutes_ago=20), sent(2, minutes_ago=2), sent(3, minutes_ago=20)]
+    lookups = [(None, None), (None, None), (None, {"hash": "0x3"})]
+    updates = plan_payout_updates(payouts, lookups, 112, None, 12, 600, NOW)
+    assert [(u.escrow_id.int, u.reason) for u in updates] == [(1, "dropped")]
+
+
+def test_lookup_errors_are_skipped():
+    lookups = [(RuntimeError("rpc down"), None), (receipt(100), {})]
+    payouts = [sent(1, minutes_ago=20), sent(2)]
+    updates = plan_payout_updates(payouts, lookups, 112, None, 12, 600, NOW)
+    assert [u.escrow_id.int for u in updates] == [2]
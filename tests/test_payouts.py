@@ -0,0 +1,34 @@
+import uuid
+
+from trustora.enums import PayoutJobStatus, Token
+from trustora.payouts import failure_status, payout_job_view, retry_delay
+
+
+class FakeJob:
+    id = uuid.UUID(int=1)
+    escrow_id = uuid.UUID(int=2)
+    status = PayoutJobStatus.QUEUED
+    token = Token.USDC
+    attempts = 1
+    tx_hash = None
+    last_error = "rpc timeout"
+
+
+def test_retry_delay_backs_off_up_to_cap():
+    assert [retry_delay(n) for n in (1, 2, 3)] == [5.0, 10.0, 20.0]
+    assert retry_delay(20) == 300.0
+
+
+def test_signed_payouts_are_handed_to_the_tracker_instead_of_failing():
+    assert failure_status(False, 1, 5) == PayoutJobStatus.QUEUED
+    assert failure_status(False, 5, 5) == PayoutJobStatus.FAILED
+    assert failure_status(True, 1, 5) == PayoutJobStatus.SENT
+    assert failure_status(True, 5, 5) == PayoutJobStatus.SENT
+
+
+def test_payout_job_view_is_json_ready():
+    view = payout_job_view(FakeJob())
+    assert view["job_id"] == str(uuid.UUID(int=1))
+    assert view["status"] == "QUEUED"
+    assert view["token"] == "USDC"
+    assert view["error"] == "rpc timeout"
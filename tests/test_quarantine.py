@@ -0,0 +1,16 @@
+import uuid
+
+from trustora.deposits import DepositMatch
+from trustora.quarantine import decode_entry, encode_entry, entry_key, retry_delay
+
+
+def test_retry_delay_backs_off_to_cap():
+    assert [retry_delay(n, 30, 3600) for n in (1, 2, 3)] == [30, 60, 120]
+    assert retry_delay(20, 30, 3600) == 3600
+
+
+def test_entry_round_trip():
+    match = DepositMatch(uuid.uuid4(), "tx1", 10.5, 123, 4, log_index=7)
+    assert decode_entry(encode_entry(match, 3, "Invalid transition")) == (match, 3)
+    assert entry_key(match) == f"{match.escrow_id}:tx1:7:123"
+    assert entry_key(match) != entry_key(DepositMatch(match.escrow_id, "tx1", 2.0, 123, 4, 8))
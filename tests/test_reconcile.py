@@ -0,0 +1,78 @@
+import asyncio
+import uuid
+
+from trustora.enums import Chain, Token
+from trustora.reconcile import diff_balances, fetch_balances, group_targets
+from trustora.tokens import build_token_registry
+
+
+def test_shared_addresses_are_reconciled_as_one_total():
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    targets = group_targets(
+        [
+            (a, "0xaa", Token.USDT, 10.0, False),
+            (b, "0xaa", Token.USDT, 5.0, False),
+            (c, "0xbb", Token.USDT, None, False),
+        ]
+    )
+    assert {(t.address, t.expected, t.escrow_ids) for t in targets} == {
+        ("0xaa", 15.0, (a, b)),
+        ("0xbb", 0.0, (c,)),
+    }
+
+
+def test_diff_classifies_mismatches():
+    targets = group_targets(
+        [
+            (uuid.uuid4(), "0xaa", Token.USDT, 10.0, False),
+            (uuid.uuid4(), "0xbb", Token.USDT, None, False),
+            (uuid.uuid4(), "0xcc", Token.USDT, 10.0, False),
+            (uuid.uuid4(), "0xdd", Token.USDT, 10.0, False),
+        ]
+    )
+    balances = {
+        ("0xaa", Token.USDT): 10.001,
+        ("0xbb", Token.USDT): 25.0,
+        ("0xcc", Token.USDT): 0.0,
+        ("0xdd", Token.USDT): None,
+    }
+    kinds = {m.address: m.kind for m in diff_balances(targets, balances)}
+    assert kinds == {"0xbb": "unrecorded_deposit", "0xcc": "missing_funds", "0xdd": "unreadable"}
+
+
+def test_fetch_balances_converts_raw_amounts_per_token():
+    registry = build_token_registry(
+        Chain.BEP20, {Token.USDT: ("0xusdt", 18), Token.USDC: ("0xusdc", 6)}
+    )
+
+    class FakeClient:
+        async def token_balances(self, contract, addresses, multicall=None):
+            scale = 10**18 if contract == "0xusdt" else 10**6
+            return {address: (None if address == "0xdead" else 7 * scale) for address in addresses}
+
+    targets = group_targets(
+        [
+            (uuid.uuid4(), "0xaa", Token.USDT, 7.0, False),
+            (uuid.uuid4(), "0xaa", Token.USDC, 7.0, False),
+            (uuid.uuid4(), "0xdead", Token.USDC, 1.0, False),
+        ]
+    )
+    balances = asyncio.run(fetch_balances(FakeClient(), registry, targets))
+    assert balances == {
+        ("0xaa", Token.USDT): 7.0,
+        ("0xaa", Token.USDC): 7.0,
+        ("0xdead", Token.USDC): None,
+    }
+
+
+def test_shared_addresses_only_report_shortfalls():
+    targets = group_targets(
+        [
+            (uuid.uuid4(), "0xaa", Token.USDT, 10.01, True),
+            (uuid.uuid4(), "0xaa", Token.USDT, None, False),
+            (uuid.uuid4(), "0xbb", Token.USDT, 20.02, True),
+        ]
+    )
+    balances = {("0xaa", Token.USDT): 95.5, ("0xbb", Token.USDT): 5.0}
+    mismatches = diff_balances(targets, balances)
+    assert [(m.address, m.kind) for m in mismatches] == [("0xbb", "missing_funds")]
@@ -0,0 +1,49 @@
+import asyncio
+
+from trustora.reorg import BlockHashRing, BlockRef, detect_reorg
+
+
+def make_chain(start, end, tag):
+    return {n: BlockRef(n, f"{tag}{n}", f"{tag}{n - 1}") for n in range(start, end + 1)}
+
+
+def test_ring_is_bounded_and_round_trips():
+    ring = BlockHashRing(size=3)
+    for number in range(1, 6):
+        ring.record(number, f"h{number}")
+    assert ring.numbers() == [5, 4, 3]
+    ring.truncate(4)
+    restored = BlockHashRing.loads(ring.dumps(), size=3)
+    assert restored.numbers() == [4, 3]
+    assert restored.get(4) == "h4"
+
+
+def test_linked_head_is_not_a_reorg():
+    chain = make_chain(1, 20, "a")
+    ring = BlockHashRing()
+    ring.record(10, chain[10].hash)
+
+    async def fetch(numbers):
+        return [chain[number] for number in numbers]
+
+    assert asyncio.run(detect_reorg(ring, chain[11], fetch)) is None
+    assert asyncio.run(detect_reorg(ring, chain[20], fetch)) is None
+    assert asyncio.run(detect_reorg(ring, chain[9], fetch)) is None
+
+
+def test_reorg_rewinds_to_last_common_block():
+    old = make_chain(1, 20, "a")
+    new = {**old, **make_chain(16, 25, "b")}
+    new[16] = BlockRef(16, "b16", old[15].hash)
+    ring = BlockHashRing()
+    for number in (12, 15, 17, 19):
+        ring.record(number, old[number].hash)
+
+    calls = []
+
+    async def fetch(numbers):
+        calls.append(numbers)
+        return [new[number] for number in numbers]
+
+    assert asyncio.run(detect_reorg(ring, new[25], fetch)) == 15
+    assert calls == [[20], [19, 17, 15, 12]]
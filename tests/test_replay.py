@@ -0,0 +1,37 @@
+import uuid
+
+from trustora.deposits import EscrowRow
+from trustora.enums import EscrowStatus
+from trustora.replay import ReplayStats, format_diff, replay_parser
+
+
+def test_parser_reads_range_and_addresses():
+    args = replay_parser("BSC").parse_args(
+        ["--from", "100", "--to", "200", "--address", "0xa", "--address", "0xb", "--dry-run"]
+    )
+    assert (args.from_block, args.to_block, args.workers) == (100, 200, 4)
+    assert args.address == ["0xa", "0xb"]
+    assert args.dry_run
+
+
+def test_stats_report_throughput():
+    stats = ReplayStats()
+    stats.record(500, 40, 2)
+    stats.record(500, 10, 0)
+    summary = stats.summary()
+    assert "1000 blocks, 50 logs, 2 deposit matches" in summary
+    assert "blocks/s" in summary and "logs/s" in summary
+
+
+def test_diff_shows_status_and_total_changes():
+    row = EscrowRow(uuid.uuid4(), EscrowStatus.UNDERPAID, "0xabc", 10.0, "tx1", amount_received=6.0)
+    updates = {
+        row.id: {
+            "status": EscrowStatus.DEPOSIT_SEEN,
+            "amount_received": 10.0,
+            "deposit_block": 120,
+        }
+    }
+    (line,) = format_diff({row.id: row}, updates)
+    assert "UNDERPAID -> DEPOSIT_SEEN" in line
+    assert "received 6.0 -> 10.0" in line
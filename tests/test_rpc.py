@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+
+from trustora.rpc import EndpointHealth, RpcClient, RpcError
+
+
+def test_ranking_prefers_fast_healthy_endpoints():
+    client = RpcClient(urls=["http://a", "http://b", "http://c"])
+    a, b, c = client.ranked()
+    for _ in range(10):
+        a.record_success(0.5)
+        b.record_success(0.05)
+        c.record_success(0.01)
+        c.record_error()
+    # c answers fastest but fails every other call, so the slow, healthy a beats it.
+    assert [e.url for e in client.ranked()] == ["http://b", "http://a", "http://c"]
+
+
+def test_lagging_endpoints_are_ejected():
+    client = RpcClient(urls=["http://a", "http://b"], max_head_lag=5)
+    client.update_heads({"http://a": 100, "http://b": 90})
+    assert [e.url for e in client.ranked()] == ["http://a", "http://b"]
+    assert client.ranked()[1].lagging
+    client.update_heads({"http://a": 101, "http://b": 99})
+    assert not any(e.lagging for e in client.ranked())
+
+
+def test_percentile():
+    endpoint = EndpointHealth("http://a")
+    assert endpoint.percentile(0.95) is None
+    for value in range(100):
+        endpoint.record_success(value / 100)
+    assert endpoint.percentile(0.95) == 0.95
+
+
+def test_hedged_request_uses_backup_when_primary_is_slow():
+    client = RpcClient(urls=["http://slow", "http://fast"], hedge_min_delay=0.01)
+    client.ranked()[0].record_success(0.01)
+
+    async def fake_send(endpoint, payload, path=""):
+        if endpoint.url == "http://slow":
+            await asyncio.sleep(1)
+        return {"result": endpoint.url}
+
+    client._send = fake_send
+    result = asyncio.run(client.post({}, hedge=True))
+    assert result == {"result": "http://fast"}
+
+
+def test_batch_maps_items_by_id_and_retries_missing_ones():
+    client = RpcClient(urls=["http://a"], backoff_seconds=0, max_batch_size=2)
+    sent = []
+
+    async def fake_post(payload, hedge=False):
+        sent.append([item["method"] for item in payload])
+        responses = []
+        for item in reversed(payload):
+            if item["method"] == "flaky" and len(sent) == 1:
+                continue
+            if item["method"] == "bad":
+                responses.append({"id": item["id"], "error": {"code": -32000, "message": "no"}})
+            else:
+                responses.append({"id": item["id"], "result": item["method"]})
+        return responses
+
+    client.post = fake_post
+    results = asyncio.run(client.batch([("a", []), ("flaky", []), ("bad", []), ("b", [])]))
+    assert results[0] == "a" and results[1] == "flaky" and results[3] == "b"
+    assert isinstance(results[2], RpcError) and results[2].code == -32000
+    assert sorted(sent) == [["a", "flaky"], ["bad", "b"], ["flaky"]]
+
+
+def test_rejected_batches_are_split():
+    client = RpcClient(urls=["http://a"], backoff_seconds=0, max_batch_size=8)
+
+    async def fake_post(payload, hedge=False):
+        if len(payload) > 2:
+            return {"id": None, "error": {"code": -32600, "message": "batch too large"}}
+        return [{"id": item["id"], "result": item["params"][0]} for item in payload]
+
+    client.post = fake_post
+    results = asyncio.run(client.batch([("echo", [n]) for n in range(8)]))
+    assert results == list(range(8))
+    assert client.max_batch_size == 2
+
+
+def test_post_appends_the_path_to_the_ranked_endpoint():
+    client = RpcClient(urls=["http://a/"])
+    seen = []
+
+    def handler(request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"txid": "ab"})
+
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = asyncio.run(client.post({}, path="wallet/broadcasttransaction"))
+    assert result == {"txid": "ab"}
+    assert seen == ["http://a/wallet/broadcasttransaction"]
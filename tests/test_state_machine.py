@@ -1,7 +1,7 @@
 import pytest
 
 from trustora.enums import EscrowStatus
-from trustora.state_machine import validate_transition
+from trustora.state_machine import deposit_outcome, validate_transition
 
 
 def test_valid_transition():
@@ -11,3 +11,24 @@ def test_valid_transition():
 def test_invalid_transition():
     with pytest.raises(ValueError):
         validate_transition(EscrowStatus.CREATED, EscrowStatus.COMPLETED)
+
+
+def test_deposit_outcome():
+    assert deposit_outcome(10.0, 10.0) == EscrowStatus.FUNDS_LOCKED
+    assert deposit_outcome(9.99, 10.0) == EscrowStatus.UNDERPAID
+    assert deposit_outcome(10.01, 10.0) == EscrowStatus.OVERPAID_REVIEW
+    validate_transition(EscrowStatus.AWAITING_DEPOSIT, EscrowStatus.DEPOSIT_SEEN)
+    validate_transition(EscrowStatus.DEPOSIT_SEEN, deposit_outcome(9.0, 10.0))
+
+
+def test_reorged_deposit_returns_to_awaiting():
+    validate_transition(EscrowStatus.DEPOSIT_SEEN, EscrowStatus.AWAITING_DEPOSIT)
+    with pytest.raises(ValueError):
+        validate_transition(EscrowStatus.FUNDS_LOCKED, EscrowStatus.AWAITING_DEPOSIT)
+
+
+def test_sent_payout_completes_or_fails():
+    validate_transition(EscrowStatus.PAYOUT_SENT, EscrowStatus.COMPLETED)
+    validate_transition(EscrowStatus.PAYOUT_SENT, EscrowStatus.PAYOUT_FAILED)
+    with pytest.raises(ValueError):
+        validate_transition(EscrowStatus.PAYOUT_SENT, EscrowStatus.RELEASE_APPROVED)
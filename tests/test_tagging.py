@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+
+import pytest
+
+from trustora.enums import Chain
+from trustora.tagging import (
+    BIND_TAG_SCRIPT,
+    PENDING_TAG,
+    bind_tagged_amount,
+    release_tagged_amount,
+    reserve_tagged_amount,
+    tag_key,
+    tagged_amount,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.expiring = set()
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        if ex is not None:
+            self.expiring.add(key)
+        return True
+
+    def register_script(self, script):
+        async def run(keys, args):
+            owner = self.values.get(keys[0])
+            if script == BIND_TAG_SCRIPT:
+                if owner not in (None, args[0], args[1]):
+                    return 0
+                self.values[keys[0]] = args[0]
+                self.expiring.discard(keys[0])
+                return 1
+            if owner != args[0]:
+                return 0
+            self.values[keys[0]] = "released"
+            self.expiring.add(keys[0])
+            return 1
+
+        return run
+
+
+def test_tagged_amount_adds_cents():
+    assert tagged_amount(100.0, 7) == 100.07
+    assert tagged_amount(19.99, 1) == 20.0
+
+
+def test_reserve_hands_out_unique_amounts():
+    redis = FakeRedis()
+
+    async def reserve_all():
+        return [
+            await reserve_tagged_amount(redis, Chain.BEP20, ["0xa", "0xb"], 50.0, 60, max_tag=3)
+            for _ in range(6)
+        ]
+
+    reserved = asyncio.run(reserve_all())
+    assert len(set(reserved)) == 6
+    assert {amount for _, amount in reserved} == {50.01, 50.02, 50.03}
+    with pytest.raises(RuntimeError):
+        asyncio.run(reserve_tagged_amount(redis, Chain.BEP20, ["0xa", "0xb"], 50.0, 60, 3))
+
+    address, amount = reserved[0]
+    escrow_id = uuid.uuid4()
+    key = tag_key(Chain.BEP20, address, amount)
+    assert redis.values[key] == PENDING_TAG and key in redis.expiring
+    assert asyncio.run(bind_tagged_amount(redis, Chain.BEP20, address, amount, escrow_id))
+    assert redis.values[key] == str(escrow_id) and key not in redis.expiring
+    assert not asyncio.run(bind_tagged_amount(redis, Chain.BEP20, address, amount, uuid.uuid4()))
+    other = uuid.uuid4()
+    assert not asyncio.run(release_tagged_amount(redis, Chain.BEP20, address, amount, other, 60))
+    assert asyncio.run(release_tagged_amount(redis, Chain.BEP20, address, amount, escrow_id, 60))
+    assert key in redis.expiring
+    with pytest.raises(RuntimeError):
+        asyncio.run(reserve_tagged_amount(redis, Chain.BEP20, [address], 50.0, 60, 3))
+    del redis.values[key]
+    again = asyncio.run(reserve_tagged_amount(redis, Chain.BEP20, [address], 50.0, 60, 3))
+    assert again == (address, amount)
@@ -0,0 +1,29 @@
+from trustora.enums import Chain, Token
+from trustora.tokens import build_token_registry
+
+
+def test_registry_resolves_contracts_and_decimals():
+    registry = build_token_registry(
+        Chain.BEP20,
+        {Token.USDT: ("0x55d3AB", 18), Token.USDC: ("0x8AC7CD", 18)},
+        normalize=str.lower,
+    )
+    assert len(registry) == 2
+    usdc = registry.by_contract("0x8ac7cd")
+    assert usdc.token == Token.USDC
+    assert usdc.to_amount(12_345 * 10**16) == 123.45
+    assert usdc.to_raw(1.5) == 15 * 10**17
+    assert registry.for_token(Token.USDT).contract == "0x55d3AB"
+
+
+def test_registry_skips_unconfigured_tokens():
+    registry = build_token_registry(Chain.TRC20, {Token.USDT: ("TXL", 6), Token.USDC: ("", 6)})
+    assert registry.contracts() == ["TXL"]
+    assert registry.by_contract("TXL").to_amount(2_500_000) == 2.5
+
+
+def test_to_raw_is_exact_for_decimal_amounts():
+    registry = build_token_registry(Chain.TRC20, {Token.USDT: ("TXL", 6)})
+    assert registry.for_token(Token.USDT).to_raw(0.29) == 290_000
+    bep20 = build_token_registry(Chain.BEP20, {Token.USDT: ("0x55d3ab", 18)})
+    assert bep20.for_token(Token.USDT).to_raw(1234.57) == 123_457 * 10**16
@@ -0,0 +1,45 @@
+import uuid
+from types import SimpleNamespace
+
+from trustora.address_index import DepositAddressIndex
+from trustora.chain_client import TransferLog
+from trustora.enums import Chain, Token
+from trustora.tokens import build_token_registry
+from trustora.watcher import ChainWatcher
+
+
+def make_watcher() -> ChainWatcher:
+    settings = SimpleNamespace(
+        tokens=build_token_registry(
+            Chain.BEP20,
+            {Token.USDT: ("0x55d3ab", 18), Token.USDC: ("0x8ac7cd", 18)},
+            normalize=str.lower,
+        ),
+        backfill_chunk_blocks=500,
+        backfill_max_chunk_blocks=5000,
+        rescan_interval_seconds=300,
+        quarantine_base_delay_seconds=30,
+        quarantine_max_attempts=10,
+        sharded=False,
+        head_poll_seconds=3,
+    )
+    index = DepositAddressIndex(Chain.BEP20, normalize=str.lower)
+    return ChainWatcher(settings, None, None, None, Chain.BEP20, "bsc", 12, index)
+
+
+def transfer(contract: str, to_address: str, block: int = 100) -> TransferLog:
+    return TransferLog("0xabc", 0, block, "0xblock", contract, "0xfrom", to_address, 25 * 10**18)
+
+
+def test_match_transfers_counts_only_the_escrow_token():
+    watcher = make_watcher()
+    escrow_id = uuid.uuid4()
+    watcher.index.replace([(escrow_id, "0xA1", 25.0)])
+    transfers = [
+        transfer("0x8ac7cd", "0xa1"),
+        transfer("0x55d3ab", "0xa1"),
+        transfer("0x55d3ab", "0xb2"),
+        transfer("0xdead", "0xa1"),
+    ]
+    matches = watcher.match_transfers(transfers, 110)
+    assert [(m.escrow_id, m.amount, m.confirmations) for m in matches] == [(escrow_id, 25.0, 10)]
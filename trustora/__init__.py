@@ -6,6 +6,7 @@ __all__ = [
     "fees",
     "security",
     "chains",
+    "chain_client",
     "escrow",
     "reviews",
     "idempotency",
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from trustora.enums import Chain, EscrowStatus, Token
+from trustora.tagging import amount_key
+
+# DEPOSIT_SEEN stays watched so top-ups before confirmation add to the running total.
+WATCHED_STATUSES = frozenset(
+    {EscrowStatus.AWAITING_DEPOSIT, EscrowStatus.DEPOSIT_SEEN, EscrowStatus.UNDERPAID}
+)
+
+
+@dataclass(frozen=True)
+class WatchedDeposit:
+    escrow_id: uuid.UUID
+    amount_expected: float
+    token: Token = Token.USDT
+    amount_tagged: bool = False
+
+
+class DepositAddressIndex:
+    def __init__(
+        self,
+        chain: Chain,
+        normalize: Callable[[str], str] = str,
+        resync_seconds: float = 600.0,
+    ) -> None:
+        self.chain = chain
+        self.normalize = normalize
+        self.resync_seconds = resync_seconds
+        self._entries: dict[str, WatchedDeposit] = {}
+        # Shared addresses tell escrows apart by exact amount (in cents).
+        self._tagged: dict[str, dict[int, WatchedDeposit]] = {}
+        self._locations: dict[uuid.UUID, str] = {}
+        self._synced_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries.keys() | self._tagged.keys())
+
+    def get(self, address: str, amount: float | None = None) -> WatchedDeposit | None:
+        key = self.normalize(address)
+        watched = self._entries.get(key)
+        if watched is None and amount is not None:
+            watched = self._tagged.get(key, {}).get(amount_key(amount))
+        return watched
+
+    def addresses(self) -> list[str]:
+        return list(self._entries.keys() | self._tagged.keys())
+
+    def replace(self, rows: Iterable[tuple[Any, ...]]) -> None:
+        # Rows are (escrow_id, address, amount_expected[, token[, amount_tagged]]).
+        self._entries = {}
+        self._tagged = {}
+        self._locations = {}
+        for escrow_id, address, amount_expected, *extra in rows:
+            self.upsert(address, escrow_id, amount_expected, *extra)
+        self._synced_at = time.monotonic()
+
+    def upsert(
+        self,
+        address: str,
+        escrow_id: uuid.UUID,
+        amount_expected: float,
+        token: Token = Token.USDT,
+        amount_tagged: bool = False,
+    ) -> None:
+        self.remove(escrow_id)
+        key = self.normalize(address)
+        watched = WatchedDeposit(escrow_id, amount_expected, token, amount_tagged)
+        if amount_tagged:
+            holder = self._tagged.get(key, {}).get(amount_key(amount_expected))
+            if holder is not None and holder.escrow_id != escrow_id:
+                # Replacing the holder would credit its deposits to another escrow.
+                logging.error(
+                    "escrow %s reuses amount %s on %s held by %s",
+                    escrow_id,
+                    amount_expected,
+                    address,
+                    holder.escrow_id,
+                )
+                return
+            self._tagged.setdefault(key, {})[amount_key(amount_expected)] = watched
+        else:
+            self._entries[key] = watched
+        self._locations[escrow_id] = key
+
+    def find(self, escrow_id: uuid.UUID) -> WatchedDeposit | None:
+        key = self._locations.get(escrow_id)
+        if key is None:
+            return None
+        watched = self._entries.get(key)
+        if watched is not None and watched.escrow_id == escrow_id:
+            return watched
+        return next(
+            (w for w in self._tagged.get(key, {}).values() if w.escrow_id == escrow_id), None
+        )
+
+    def remove(self, escrow_id: uuid.UUID) -> None:
+        watched = self.find(escrow_id)
+        key = self._locations.pop(escrow_id, None)
+        if watched is None or key is None:
+            return
+        if not watched.amount_tagged:
+            del self._entries[key]
+            return
+        tagged = self._tagged[key]
+        del tagged[amount_key(watched.amount_expected)]
+        if not tagged:
+            del self._tagged[key]
+
+    def apply_status(
+        self,
+        address: str,
+        escrow_id: uuid.UUID,
+        amount_expected: float,
+        status: EscrowStatus,
+        token: Token = Token.USDT,
+        amount_tagged: bool | None = None,
+    ) -> None:
+        if status not in WATCHED_STATUSES:
+            self.remove(escrow_id)
+            return
+        if amount_tagged is None:
+            current = self.find(escrow_id)
+            amount_tagged = current is not None and current.amount_tagged
+        self.upsert(address, escrow_id, amount_expected, token, amount_tagged)
+
+    def apply_event(self, event: dict[str, Any]) -> None:
+        if event.get("chain") != self.chain.value or not event.get("deposit_address"):
+            return
+        self.apply_status(
+            event["deposit_address"],
+            uuid.UUID(event["escrow_id"]),
+            float(event["amount_expected"]),
+            EscrowStatus(event["status"]),
+            Token(event.get("token", Token.USDT.value)),
+            event.get("amount_tagged", False),
+        )
+
+    def mark_stale(self) -> None:
+        self._synced_at = None
+
+    def is_stale(self) -> bool:
+        if self._synced_at is None:
+            return True
+        return time.monotonic() - self._synced_at >= self.resync_seconds
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from typing import Any
+
+from trustora.enums import Chain, EscrowStatus
+from trustora.tagging import bind_tagged_amount, release_tagged_amount
+
+# Escrows in these states no longer need their deposit address.
+RELEASED_STATUSES = frozenset({EscrowStatus.COMPLETED})
+PENDING = "pending"
+
+ALLOCATE_SCRIPT = """
+local address = redis.call('SPOP', KEYS[1])
+if not address then
+  return nil
+end
+redis.call('HSET', KEYS[2], address, ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[1], address)
+return address
+"""
+
+BIND_SCRIPT = """
+local bound = 0
+for i = 2, #ARGV, 2 do
+  local address, escrow_id = ARGV[i], ARGV[i + 1]
+  local owner = redis.call('HGET', KEYS[2], address)
+  if not owner or owner == ARGV[1] or owner == escrow_id then
+    redis.call('SREM', KEYS[1], address)
+    redis.call('HSET', KEYS[2], address, escrow_id)
+    redis.call('ZREM', KEYS[3], address)
+    bound = bound + 1
+  end
+end
+return bound
+"""
+
+RELEASE_SCRIPT = """
+local owner = redis.call('HGET', KEYS[2], ARGV[1])
+if owner and owner ~= ARGV[2] then
+  return 0
+end
+if redis.call('SISMEMBER', KEYS[4], ARGV[1]) == 0 then
+  return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('ZADD', KEYS[5], ARGV[3], ARGV[1])
+return 1
+"""
+
+RECLAIM_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])
+for _, address in ipairs(stale) do
+  redis.call('HDEL', KEYS[2], address)
+  redis.call('ZREM', KEYS[3], address)
+  redis.call('SADD', KEYS[1], address)
+end
+return #stale
+"""
+
+SEED_SCRIPT = """
+local added = 0
+for _, address in ipairs(ARGV) do
+  redis.call('SADD', KEYS[4], address)
+  local leased = redis.call('HEXISTS', KEYS[2], address) == 1
+  if not leased and not redis.call('ZSCORE', KEYS[5], address) then
+    added = added + redis.call('SADD', KEYS[1], address)
+  end
+end
+return added
+"""
+
+RESTORE_SCRIPT = """
+local restored = 0
+for _, address in ipairs(ARGV) do
+  if redis.call('ZREM', KEYS[5], address) == 1 and redis.call('HEXISTS', KEYS[2], address) == 0 then
+    restored = restored + redis.call('SADD', KEYS[1], address)
+  end
+end
+return restored
+"""
+
+
+class DepositAddressPool:
+    def __init__(
+        self,
+        redis: Any,
+        chain: Chain,
+        pending_ttl_seconds: float = 86400.0,
+        cooldown_seconds: float = 86400.0,
+    ) -> None:
+        self.redis = redis
+        self.chain = chain
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self.cooldown_seconds = cooldown_seconds
+        prefix = f"deposit_pool:{chain.value}"
+        # free set, address -> escrow id (or "pending") leases, pending allocation times,
+        # every dedicated address this pool may hand out, and release times of addresses that
+        # are not handed out again until they cooled down and hold no funds.
+        self.keys = [
+            f"{prefix}:free",
+            f"{prefix}:leases",
+            f"{prefix}:pending",
+            f"{prefix}:known",
+            f"{prefix}:cooling",
+        ]
+
+    async def _run(self, script: str, *args: Any) -> Any:
+        return await self.redis.register_script(script)(keys=self.keys, args=list(args))
+
+    async def allocate(self) -> str | None:
+        return await self._run(ALLOCATE_SCRIPT, time.time(), PENDING)
+
+    async def bind(self, address: str, escrow_id: uuid.UUID) -> bool:
+        return bool(await self._run(BIND_SCRIPT, PENDING, address, str(escrow_id)))
+
+    async def release(self, address: str, escrow_id: uuid.UUID) -> bool:
+        return bool(await self._run(RELEASE_SCRIPT, address, str(escrow_id), time.time()))
+
+    async def reclaim_stale(self) -> int:
+        # Addresses handed out but never attached to an escrow (the bot gave up or crashed).
+        return int(await self._run(RECLAIM_SCRIPT, time.time() - self.pending_ttl_seconds))
+
+    async def cooled(self) -> list[str]:
+        cutoff = time.time() - self.cooldown_seconds
+        return list(await self.redis.zrangebyscore(self.keys[4], "-inf", cutoff))
+
+    async def restore(self, addresses: list[str]) -> int:
+        if not addresses:
+            return 0
+        return int(await self._run(RESTORE_SCRIPT, *addresses))
+
+    async def seed(
+        self,
+        addresses: list[str],
+        open_escrows: list[tuple[uuid.UUID, str]],
+        excluded: list[str] | None = None,
+        chunk_size: int = 1000,
+    ) -> int:
+        # Escrows created before the pool existed hold their address without a lease.
+        for start in range(0, len(open_escrows), chunk_size):
+            chunk = open_escrows[start : start + chunk_size]
+            pairs = [value for escrow_id, address in chunk for value in (address, str(escrow_id))]
+            await self._run(BIND_SCRIPT, PENDING, *pairs)
+        if excluded:
+            await self.redis.srem(self.keys[0], *excluded)
+            await self.redis.srem(self.keys[3], *excluded)
+        added = 0
+        for start in range(0, len(addresses), chunk_size):
+            added += int(await self._run(SEED_SCRIPT, *addresses[start : start + chunk_size]))
+        return added
+
+    async def available(self) -> int:
+        return int(await self.redis.scard(self.keys[0]))
+
+
+async def apply_pool_event(
+    pools: dict[Chain, DepositAddressPool],
+    redis: Any,
+    event: dict[str, Any],
+) -> None:
+    chain = Chain(event["chain"])
+    address = event.get("deposit_address")
+    pool = pools.get(chain)
+    if pool is None or not address:
+        return
+    escrow_id = uuid.UUID(event["escrow_id"])
+    released = EscrowStatus(event["status"]) in RELEASED_STATUSES
+    if event.get("amount_tagged"):
+        amount = float(event["amount_expected"])
+        if released:
+            await release_tagged_amount(
+                redis, chain, address, amount, escrow_id, pool.cooldown_seconds
+            )
+        elif not await bind_tagged_amount(redis, chain, address, amount, escrow_id):
+            logging.error("amount tag %s on %s is held by another escrow", amount, address)
+    elif released:
+        await pool.release(address, escrow_id)
+    else:
+        await pool.bind(address, escrow_id)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class ChunkSizer:
+    size: int = 500
+    min_size: int = 10
+    max_size: int = 5000
+    target_items: int = 2000
+    grow_after: int = 5
+    hold: int = 0
+
+    def on_success(self, blocks: int, items: int) -> None:
+        self.hold = max(0, self.hold - 1)
+        if items > self.target_items:
+            self.size = max(self.min_size, self.size // 2)
+        elif items < self.target_items // 4 and blocks >= self.size and not self.hold:
+            self.size = min(self.max_size, self.size * 2)
+
+    def on_error(self) -> None:
+        # A failure may be a provider range limit or just a timeout, so shrink for now and only
+        # try growing again after a run of successful chunks.
+        self.size = max(self.min_size, self.size // 2)
+        self.hold = self.grow_after
+
+
+def backoff_delay(failures: int, base_seconds: float, max_seconds: float) -> float:
+    # Full jitter keeps replicas that failed together from retrying together.
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** max(failures - 1, 0)))
+
+
+@dataclass
+class TransferRate:
+    per_block: float = 50.0
+    alpha: float = 0.2
+
+    def observe(self, blocks: int, transfers: int) -> None:
+        self.per_block += self.alpha * (transfers / max(1, blocks) - self.per_block)
+
+    def prefer_recipient_filter(
+        self,
+        addresses: int,
+        blocks: int,
+        chunk_size: int,
+        request_cost: float,
+    ) -> bool:
+        # A filtered scan costs one request per address chunk; a full scan costs every
+        # transfer in the range, which on busy token contracts dwarfs a few requests.
+        requests = math.ceil(addresses / chunk_size)
+        return requests * request_cost <= blocks * self.per_block
+
+
+def plan_chunks(start: int, end: int, size: int, limit: int) -> list[tuple[int, int]]:
+    chunks: list[tuple[int, int]] = []
+    cursor = start
+    while cursor <= end and len(chunks) < limit:
+        chunk_end = min(end, cursor + size - 1)
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + 1
+    return chunks
+
+
+async def run_backfill(
+    start: int,
+    end: int,
+    fetch: Callable[[int, int], Awaitable[Sequence[T]]],
+    apply: Callable[[int, int, Sequence[T]], Awaitable[Any]],
+    checkpoint: Callable[[int], Awaitable[Any]],
+    sizer: ChunkSizer,
+    concurrency: int = 4,
+    max_failures: int = 5,
+    backoff_seconds: float = 0.5,
+    max_backoff_seconds: float = 30.0,
+) -> int:
+    applied_to = start - 1
+    failures = 0
+    while applied_to < end:
+        window = plan_chunks(applied_to + 1, end, sizer.size, concurrency)
+        results = await asyncio.gather(
+            *(fetch(chunk_start, chunk_end) for chunk_start, chunk_end in window),
+            return_exceptions=True,
+        )
+        for (chunk_start, chunk_end), result in zip(window, results, strict=True):
+            if isinstance(result, BaseException):
+                logging.warning("fetch %s-%s failed: %s", chunk_start, chunk_end, result)
+                sizer.on_error()
+                failures += 1
+                break
+            await apply(chunk_start, chunk_end, result)
+            await checkpoint(chunk_end)
+            applied_to = chunk_end
+            sizer.on_success(chunk_end - chunk_start + 1, len(result))
+        else:
+            failures = 0
+            continue
+        if failures >= max_failures:
+            break
+        await asyncio.sleep(backoff_delay(failures, backoff_seconds, max_backoff_seconds))
+    return applied_to
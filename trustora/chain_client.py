@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from dataclasses import dataclass
+from typing import Any
+
+from trustora.multicall import balance_of_call, decode_aggregate3, decode_uint, encode_aggregate3
+from trustora.reorg import BlockRef, parse_block_ref
+from trustora.rpc import RpcClient
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+@dataclass(frozen=True)
+class TransferLog:
+    tx_hash: str
+    log_index: int
+    block_number: int
+    block_hash: str
+    contract: str
+    from_address: str
+    to_address: str
+    amount_raw: int
+
+
+def address_from_topic(topic: str) -> str:
+    return "0x" + topic[-40:].lower()
+
+
+def address_to_topic(address: str) -> str:
+    return "0x" + address.lower().removeprefix("0x").rjust(64, "0")
+
+
+def block_tag(block: int | str) -> str:
+    return hex(block) if isinstance(block, int) else block
+
+
+def chunked(items: list[Any], size: int) -> list[list[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class EvmChainClient:
+    def __init__(self, rpc: RpcClient) -> None:
+        self.rpc = rpc
+
+    async def block_number(self) -> int:
+        return int(await self.rpc.call("eth_blockNumber"), 16)
+
+    async def get_block_ref(self, block: int | str = "latest") -> BlockRef:
+        result = await self.rpc.call("eth_getBlockByNumber", [block_tag(block), False])
+        return parse_block_ref(result)
+
+    async def get_block_refs(self, blocks: list[int | str]) -> list[BlockRef]:
+        results = await self.rpc.batch(
+            [("eth_getBlockByNumber", [block_tag(block), False]) for block in blocks]
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return [parse_block_ref(result) for result in results]
+
+    async def get_logs(
+        self,
+        from_block: int,
+        to_block: int,
+        contract: str | list[str],
+        topics: list[Any],
+    ) -> list[dict[str, Any]]:
+        contracts = [contract] if isinstance(contract, str) else contract
+        return await self.rpc.call(
+            "eth_getLogs",
+            [
+                {
+                    "fromBlock": hex(from_block),
+                    "toBlock": hex(to_block),
+                    "address": [self.to_rpc_address(c) for c in contracts],
+                    "topics": topics,
+                }
+            ],
+        )
+
+    async def get_transfers(
+        self,
+        from_block: int,
+        to_block: int,
+        contract: str | list[str],
+        recipients: list[str] | None = None,
+        topic_chunk_size: int = 100,
+        max_concurrency: int = 8,
+    ) -> list[TransferLog]:
+        if recipients is None:
+            logs = await self.get_logs(from_block, to_block, contract, [TRANSFER_TOPIC])
+        else:
+            # topics[2] is an OR-list; providers cap its length, so fan out per chunk.
+            to_topics = sorted({address_to_topic(self.to_rpc_address(a)) for a in recipients})
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def fetch_chunk(chunk: list[str]) -> list[dict[str, Any]]:
+                async with semaphore:
+                    return await self.get_logs(
+                        from_block, to_block, contract, [TRANSFER_TOPIC, None, chunk]
+                    )
+
+            batches = await asyncio.gather(
+                *(fetch_chunk(chunk) for chunk in chunked(to_topics, topic_chunk_size))
+            )
+            logs = [log for batch in batches for log in batch]
+            logs.sort(key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+        return [self.parse_transfer(log) for log in logs if len(log["topics"]) == 3]
+
+    async def token_balances(
+        self,
+        contract: str,
+        addresses: list[str],
+        multicall: str | None = None,
+        multicall_chunk: int = 500,
+    ) -> dict[str, int | None]:
+        token = self.to_rpc_address(contract)
+        calls = [(token, balance_of_call(self.to_rpc_address(address))) for address in addresses]
+        values: list[bytes | None] = []
+        if multicall:
+            chunks = chunked(calls, multicall_chunk)
+            results = await self.rpc.batch(
+                [
+                    ("eth_call", [{"to": multicall, "data": encode_aggregate3(chunk)}, "latest"])
+                    for chunk in chunks
+                ]
+            )
+            for chunk, result in zip(chunks, results, strict=True):
+                failed = isinstance(result, Exception) or not result
+                values.extend([None] * len(chunk) if failed else decode_aggregate3(result))
+        else:
+            results = await self.rpc.batch(
+                [
+                    ("eth_call", [{"to": target, "data": "0x" + data.hex()}, "latest"])
+                    for target, data in calls
+                ]
+            )
+            for result in results:
+                failed = isinstance(result, Exception) or not result or result == "0x"
+                values.append(None if failed else bytes.fromhex(result.removeprefix("0x")))
+        # None marks a balance that could not be read, which is not the same as zero.
+        return {
+            address: decode_uint(value) for address, value in zip(addresses, values, strict=True)
+        }
+
+    def parse_transfer(self, log: dict[str, Any]) -> TransferLog:
+        return TransferLog(
+            tx_hash=self.normalize_tx_hash(log["transactionHash"]),
+            log_index=int(log["logIndex"], 16),
+            block_number=int(log["blockNumber"], 16),
+            block_hash=log["blockHash"],
+            contract=self.from_rpc_address(log["address"]),
+            from_address=self.from_rpc_address(address_from_topic(log["topics"][1])),
+            to_address=self.from_rpc_address(address_from_topic(log["topics"][2])),
+            amount_raw=int(log["data"], 16),
+        )
+
+    def to_rpc_address(self, address: str) -> str:
+        return address.lower()
+
+    def from_rpc_address(self, address: str) -> str:
+        return address.lower()
+
+    def normalize_tx_hash(self, tx_hash: str) -> str:
+        return tx_hash
+
+    def to_rpc_tx_hash(self, tx_hash: str) -> str:
+        return tx_hash
+
+    async def get_transaction_lookups(self, tx_hashes: list[str]) -> list[tuple[Any, Any]]:
+        # Receipt and transaction for every hash in one batch; a missing transaction tells a
+        # dropped payout apart from one still waiting in the mempool.
+        calls = []
+        for tx_hash in tx_hashes:
+            rpc_hash = self.to_rpc_tx_hash(tx_hash)
+            calls.append(("eth_getTransactionReceipt", [rpc_hash]))
+            calls.append(("eth_getTransactionByHash", [rpc_hash]))
+        results = await self.rpc.batch(calls)
+        return list(zip(results[0::2], results[1::2], strict=True))
+
+    async def aclose(self) -> None:
+        await self.rpc.aclose()
+
+
+# TRON full nodes expose an Ethereum-compatible JSON-RPC endpoint under /jsonrpc.
+class TronChainClient(EvmChainClient):
+    def to_rpc_address(self, address: str) -> str:
+        return tron_to_rpc_address(address)
+
+    def from_rpc_address(self, address: str) -> str:
+        return tron_from_rpc_address(address)
+
+    def normalize_tx_hash(self, tx_hash: str) -> str:
+        return tx_hash.removeprefix("0x")
+
+    def to_rpc_tx_hash(self, tx_hash: str) -> str:
+        return "0x" + tx_hash.removeprefix("0x")
+
+
+# Base58check round trips hash every address; the watched set is small and stable, so cache.
+@functools.lru_cache(maxsize=65536)
+def tron_to_rpc_address(address: str) -> str:
+    from tronpy.keys import to_hex_address
+
+    return "0x" + to_hex_address(address)[2:]
+
+
+@functools.lru_cache(maxsize=65536)
+def tron_from_rpc_address(address: str) -> str:
+    from tronpy.keys import to_base58check_address
+
+    return to_base58check_address("41" + address.removeprefix("0x"))
+
+
+def build_bsc_client(rpc_urls: list[str]) -> EvmChainClient:
+    return EvmChainClient(RpcClient(urls=rpc_urls))
+
+
+def build_tron_client(rpc_urls: list[str]) -> TronChainClient:
+    return TronChainClient(RpcClient(urls=[f"{url.rstrip('/')}/jsonrpc" for url in rpc_urls]))
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections.abc import Iterable
+from typing import Any
+
+from trustora.enums import EscrowStatus
+
+
+class ConfirmationTracker:
+    def __init__(self, resync_seconds: float = 300.0) -> None:
+        self.resync_seconds = resync_seconds
+        self._pending: dict[uuid.UUID, int] = {}
+        self._synced_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(self, escrow_id: uuid.UUID, block_number: int) -> None:
+        self._pending[escrow_id] = block_number
+
+    def forget(self, escrow_id: uuid.UUID) -> None:
+        self._pending.pop(escrow_id, None)
+
+    def apply_event(self, event: dict[str, Any]) -> None:
+        escrow_id = uuid.UUID(event["escrow_id"])
+        if event["status"] == EscrowStatus.DEPOSIT_SEEN.value and event.get("deposit_block"):
+            self.track(escrow_id, int(event["deposit_block"]))
+        else:
+            self.forget(escrow_id)
+
+    def replace(self, rows: Iterable[tuple[uuid.UUID, int]]) -> None:
+        self._pending = {escrow_id: block_number for escrow_id, block_number in rows}
+        self._synced_at = time.monotonic()
+
+    def confirmations(
+        self,
+        head: int,
+        finalized: int | None = None,
+        required: int | None = None,
+    ) -> dict[uuid.UUID, int]:
+        counts = {escrow_id: max(0, head - block) for escrow_id, block in self._pending.items()}
+        if finalized is None or required is None:
+            return counts
+        # With a finality tag, a deposit is confirmed exactly when its block is finalized.
+        return {
+            escrow_id: required if block <= finalized else min(counts[escrow_id], required - 1)
+            for escrow_id, block in self._pending.items()
+        }
+
+    def mark_stale(self) -> None:
+        self._synced_at = None
+
+    def is_stale(self) -> bool:
+        if self._synced_at is None:
+            return True
+        return time.monotonic() - self._synced_at >= self.resync_seconds
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, replace
+from typing import Any
+
+from trustora.address_index import WATCHED_STATUSES
+from trustora.enums import EscrowStatus, Token
+from trustora.idempotency import LEGACY_LOG_INDEX, can_record_deposit
+from trustora.state_machine import deposit_outcome, validate_transition
+
+
+@dataclass(frozen=True)
+class DepositMatch:
+    escrow_id: uuid.UUID
+    tx_hash: str
+    amount: float
+    block_number: int
+    confirmations: int
+    log_index: int = 0
+
+    def ledger_key(self) -> tuple[str, int]:
+        return self.tx_hash, self.log_index
+
+    def legacy_key(self) -> tuple[str, int]:
+        return self.tx_hash, LEGACY_LOG_INDEX
+
+
+@dataclass(frozen=True)
+class EscrowRow:
+    id: uuid.UUID
+    status: EscrowStatus
+    deposit_address: str
+    amount_expected: float
+    deposit_tx_hash: str | None
+    payout_tx_hash: str | None = None
+    token: Token = Token.USDT
+    amount_received: float | None = None
+    deposit_block: int | None = None
+    amount_tagged: bool = False
+
+
+def deposit_path(
+    status: EscrowStatus,
+    amount: float,
+    amount_expected: float,
+    confirmed: bool,
+) -> list[EscrowStatus]:
+    path = []
+    if status == EscrowStatus.UNDERPAID:
+        path.append(EscrowStatus.AWAITING_DEPOSIT)
+    if status != EscrowStatus.DEPOSIT_SEEN:
+        path.append(EscrowStatus.DEPOSIT_SEEN)
+    if confirmed:
+        path.append(deposit_outcome(amount, amount_expected))
+    current = status
+    for target in path:
+        validate_transition(current, target)
+        current = target
+    return path
+
+
+def plan_deposits(
+    rows: dict[uuid.UUID, EscrowRow],
+    matches: list[DepositMatch],
+    confirmations_required: int,
+    recorded: set[tuple[str, int]] | frozenset[tuple[str, int]] = frozenset(),
+) -> tuple[dict[uuid.UUID, dict[str, Any]], dict[uuid.UUID, EscrowRow], list[DepositMatch]]:
+    updates: dict[uuid.UUID, dict[str, Any]] = {}
+    states = dict(rows)
+    seen = set(recorded)
+    applied = []
+    for match in matches:
+        row = states.get(match.escrow_id)
+        if row is None or row.status not in WATCHED_STATUSES:
+            continue
+        if not can_record_deposit(seen, match.tx_hash, match.log_index):
+            continue
+        # Confirmations count from the newest transfer, which may have been applied first.
+        block = max(match.block_number, row.deposit_block or 0)
+        confirmations = match.confirmations - (block - match.block_number)
+        received = round((row.amount_received or 0.0) + match.amount, 2)
+        confirmed = confirmations >= confirmations_required
+        path = deposit_path(row.status, received, row.amount_expected, confirmed)
+        status = path[-1] if path else row.status
+        tx_hash = row.deposit_tx_hash or match.tx_hash
+        seen.add(match.ledger_key())
+        applied.append(match)
+        states[row.id] = replace(
+            row,
+            status=status,
+            deposit_tx_hash=tx_hash,
+            amount_received=received,
+            deposit_block=block,
+        )
+        updates[row.id] = {
+            "status": status,
+            "deposit_tx_hash": tx_hash,
+            "amount_received": received,
+            "deposit_block": block,
+            "deposit_confirmations": confirmations,
+        }
+    return updates, states, applied
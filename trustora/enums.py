@@ -8,6 +8,7 @@ class Chain(str, Enum):
 
 class Token(str, Enum):
     USDT = "USDT"
+    USDC = "USDC"
 
 
 class EscrowStatus(str, Enum):
@@ -29,6 +30,13 @@ class EscrowStatus(str, Enum):
     PAYOUT_FAILED = "PAYOUT_FAILED"
 
 
+class PayoutJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
 class MessageRole(str, Enum):
     BUYER = "buyer"
     SELLER = "seller"
@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import uuid
+from collections import defaultdict
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import case, delete, insert, literal, select, tuple_, update
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from trustora.enums import EscrowStatus
-from trustora.models import Escrow
-from trustora.state_machine import validate_transition
+from trustora.address_index import WATCHED_STATUSES
+from trustora.address_pool import RELEASED_STATUSES
+from trustora.db import session_scope
+from trustora.deposits import DepositMatch, EscrowRow, plan_deposits
+from trustora.enums import Chain, EscrowStatus, PayoutJobStatus
+from trustora.models import DepositTransfer, Escrow, PayoutJob
+from trustora.payout_receipts import PayoutUpdate, SentPayout
+from trustora.payouts import ACTIVE_JOB_STATUSES
+from trustora.reconcile import RECONCILED_STATUSES
+from trustora.state_machine import deposit_outcome, validate_transition
+
+# Errors caused by the data of a single match rather than by the database being unavailable.
+POISON_ERRORS = (ValueError, IntegrityError, DataError)
 
 
 async def get_escrow_for_update(session: AsyncSession, escrow_id) -> Escrow:
-    result = await session.execute(
-        select(Escrow).where(Escrow.id == escrow_id).with_for_update()
-    )
+    result = await session.execute(select(Escrow).where(Escrow.id == escrow_id).with_for_update())
     escrow = result.scalar_one()
     return escrow
 
@@ -28,3 +41,435 @@ async def transition_escrow(
     escrow.updated_at = datetime.utcnow()
     session.add(escrow)
     return escrow
+
+
+async def find_active_payout_job(session: AsyncSession, escrow_id: uuid.UUID) -> PayoutJob | None:
+    result = await session.execute(
+        select(PayoutJob)
+        .where(
+            PayoutJob.escrow_id == escrow_id,
+            PayoutJob.status.in_(list(ACTIVE_JOB_STATUSES)),
+        )
+        .order_by(PayoutJob.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_payout_job(session: AsyncSession, job_id, lock: bool = False) -> PayoutJob | None:
+    query = select(PayoutJob).where(PayoutJob.id == job_id)
+    if lock:
+        query = query.with_for_update()
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def claim_payout_job(session: AsyncSession) -> PayoutJob | None:
+    now = datetime.utcnow()
+    result = await session.execute(
+        select(PayoutJob)
+        .where(PayoutJob.status == PayoutJobStatus.QUEUED, PayoutJob.next_attempt_at <= now)
+        .order_by(PayoutJob.next_attempt_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+    if job is not None:
+        job.status = PayoutJobStatus.RUNNING
+        job.attempts += 1
+        job.updated_at = now
+    return job
+
+
+async def claim_stale_payout_jobs(session: AsyncSession, older_than: datetime) -> list[PayoutJob]:
+    result = await session.execute(
+        select(PayoutJob)
+        .where(PayoutJob.status == PayoutJobStatus.RUNNING, PayoutJob.updated_at < older_than)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+async def mark_payout_sent(session: AsyncSession, job: PayoutJob, tx_hash: str) -> Escrow:
+    job.status = PayoutJobStatus.SENT
+    job.tx_hash = tx_hash
+    job.updated_at = datetime.utcnow()
+    escrow = await get_escrow_for_update(session, job.escrow_id)
+    escrow.payout_tx_hash = tx_hash
+    await transition_escrow(session, escrow, EscrowStatus.PAYOUT_SENT)
+    return escrow
+
+
+async def touch_payout_job(session: AsyncSession, job_id: uuid.UUID) -> None:
+    await session.execute(
+        update(PayoutJob)
+        .where(PayoutJob.id == job_id, PayoutJob.status == PayoutJobStatus.RUNNING)
+        .values(updated_at=datetime.utcnow())
+    )
+
+
+async def replace_payout_tx_hash(session: AsyncSession, escrow: Escrow, old: str, new: str) -> None:
+    escrow.payout_tx_hash = new
+    escrow.updated_at = datetime.utcnow()
+    await session.execute(
+        update(PayoutJob)
+        .where(PayoutJob.escrow_id == escrow.id, PayoutJob.tx_hash == old)
+        .values(tx_hash=new, updated_at=escrow.updated_at)
+    )
+
+
+async def load_sent_payouts(session: AsyncSession, chain: Chain) -> list[SentPayout]:
+    result = await session.execute(
+        select(
+            Escrow.id, Escrow.payout_tx_hash, Escrow.updated_at, Escrow.payout_confirmations
+        ).where(
+            Escrow.chain == chain,
+            Escrow.status == EscrowStatus.PAYOUT_SENT,
+            Escrow.payout_tx_hash.is_not(None),
+        )
+    )
+    return [SentPayout(*row) for row in result.all()]
+
+
+async def apply_payout_updates(session: AsyncSession, changes: list[PayoutUpdate]) -> list[Escrow]:
+    if not changes:
+        return []
+    result = await session.execute(
+        select(Escrow)
+        .where(Escrow.id.in_([change.escrow_id for change in changes]))
+        .with_for_update()
+    )
+    escrows = {escrow.id: escrow for escrow in result.scalars().all()}
+    finished = []
+    for change in changes:
+        escrow = escrows.get(change.escrow_id)
+        if (
+            escrow is None
+            or escrow.status != EscrowStatus.PAYOUT_SENT
+            or escrow.payout_tx_hash != change.tx_hash
+        ):
+            continue
+        escrow.payout_confirmations = change.confirmations
+        if change.status is None:
+            continue
+        if change.status == EscrowStatus.PAYOUT_FAILED:
+            # Nothing was paid, so the escrow must be able to take a fresh payout job.
+            escrow.payout_tx_hash = None
+            await session.execute(
+                update(PayoutJob)
+                .where(PayoutJob.escrow_id == escrow.id, PayoutJob.status == PayoutJobStatus.SENT)
+                .values(
+                    status=PayoutJobStatus.FAILED,
+                    last_error=f"payout transaction {change.reason}",
+                    updated_at=datetime.utcnow(),
+                )
+            )
+        await transition_escrow(session, escrow, change.status)
+        finished.append(escrow)
+    return finished
+
+
+async def load_watched_deposits(session: AsyncSession, chain: Chain) -> list[tuple]:
+    result = await session.execute(
+        select(
+            Escrow.id,
+            Escrow.deposit_address,
+            Escrow.amount_expected,
+            Escrow.token,
+            Escrow.amount_tagged,
+        ).where(
+            Escrow.chain == chain,
+            Escrow.status.in_(list(WATCHED_STATUSES)),
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def load_leased_addresses(session: AsyncSession, chain: Chain) -> list[tuple]:
+    result = await session.execute(
+        select(Escrow.id, Escrow.deposit_address).where(
+            Escrow.chain == chain,
+            Escrow.deposit_address.is_not(None),
+            Escrow.amount_tagged.is_(False),
+            Escrow.status.not_in(list(RELEASED_STATUSES)),
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def load_tagged_amounts(session: AsyncSession, chain: Chain) -> list[tuple]:
+    result = await session.execute(
+        select(Escrow.id, Escrow.deposit_address, Escrow.amount_expected).where(
+            Escrow.chain == chain,
+            Escrow.deposit_address.is_not(None),
+            Escrow.amount_tagged.is_(True),
+            Escrow.status.not_in(list(RELEASED_STATUSES)),
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def load_reconcile_targets(session: AsyncSession, chain: Chain) -> list[tuple]:
+    result = await session.execute(
+        select(
+            Escrow.id,
+            Escrow.deposit_address,
+            Escrow.token,
+            Escrow.amount_received,
+            Escrow.amount_tagged,
+        ).where(
+            Escrow.chain == chain,
+            Escrow.status.in_(list(RECONCILED_STATUSES)),
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def preview_deposits(
+    session: AsyncSession,
+    chain: Chain,
+    matches: list[DepositMatch],
+    confirmations_required: int,
+    lock: bool = False,
+) -> tuple[
+    dict[uuid.UUID, EscrowRow],
+    dict[uuid.UUID, dict[str, Any]],
+    dict[uuid.UUID, EscrowRow],
+    list[DepositMatch],
+]:
+    ids = list({match.escrow_id for match in matches})
+    if not ids:
+        return {}, {}, {}, []
+    query = select(
+        Escrow.id,
+        Escrow.status,
+        Escrow.deposit_address,
+        Escrow.amount_expected,
+        Escrow.deposit_tx_hash,
+        Escrow.payout_tx_hash,
+        Escrow.token,
+        Escrow.amount_received,
+        Escrow.deposit_block,
+        Escrow.amount_tagged,
+    ).where(Escrow.id.in_(ids))
+    if lock:
+        query = query.with_for_update(skip_locked=True)
+    result = await session.execute(query)
+    rows = {row.id: EscrowRow(*row) for row in result.all()}
+    # One unique-index probe per transfer: anything already in the ledger has been counted.
+    keys = list(
+        {
+            key
+            for match in matches
+            if match.escrow_id in rows
+            for key in (match.ledger_key(), match.legacy_key())
+        }
+    )
+    recorded = set()
+    if keys:
+        result = await session.execute(
+            select(DepositTransfer.tx_hash, DepositTransfer.log_index).where(
+                DepositTransfer.chain == chain,
+                tuple_(DepositTransfer.tx_hash, DepositTransfer.log_index).in_(keys),
+            )
+        )
+        recorded = {tuple(row) for row in result.all()}
+    updates, states, applied = plan_deposits(rows, matches, confirmations_required, recorded)
+    return rows, updates, states, applied
+
+
+async def record_deposits(
+    session: AsyncSession,
+    chain: Chain,
+    matches: list[DepositMatch],
+    confirmations_required: int,
+) -> tuple[list[tuple[EscrowRow, DepositMatch]], list[DepositMatch]]:
+    rows, updates, states, applied = await preview_deposits(
+        session, chain, matches, confirmations_required, lock=True
+    )
+    skipped = [match for match in matches if match.escrow_id not in rows]
+    if not updates:
+        return [], skipped
+    await session.execute(
+        insert(DepositTransfer),
+        [
+            {
+                "escrow_id": match.escrow_id,
+                "chain": chain,
+                "token": states[match.escrow_id].token,
+                "tx_hash": match.tx_hash,
+                "log_index": match.log_index,
+                "block_number": match.block_number,
+                "amount": match.amount,
+                "created_at": datetime.utcnow(),
+            }
+            for match in applied
+        ],
+    )
+    values = {
+        column: case(
+            {
+                escrow_id: literal(update_values[column], Escrow.__table__.c[column].type)
+                for escrow_id, update_values in updates.items()
+            },
+            value=Escrow.id,
+        )
+        for column in next(iter(updates.values()))
+    }
+    await session.execute(
+        update(Escrow)
+        .where(Escrow.id.in_(list(updates)))
+        .values(**values, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    latest = {match.escrow_id: match for match in applied}
+    return [(states[escrow_id], latest[escrow_id]) for escrow_id in updates], skipped
+
+
+async def apply_deposit_matches(
+    session_factory,
+    chain: Chain,
+    matches: list[DepositMatch],
+    confirmations_required: int,
+    batch_size: int = 200,
+    lock_retries: int = 3,
+) -> tuple[
+    list[tuple[EscrowRow, DepositMatch]], list[DepositMatch], list[tuple[DepositMatch, str]]
+]:
+    applied: list[tuple[EscrowRow, DepositMatch]] = []
+    failed: list[tuple[DepositMatch, str]] = []
+    pending = matches
+    for attempt in range(lock_retries):
+        skipped: list[DepositMatch] = []
+        batches = [
+            pending[start : start + batch_size] for start in range(0, len(pending), batch_size)
+        ]
+        while batches:
+            batch = batches.pop(0)
+            try:
+                async with session_scope(session_factory) as session:
+                    rows, locked = await record_deposits(
+                        session, chain, batch, confirmations_required
+                    )
+            except POISON_ERRORS as exc:
+                # Bisect down to the offending match so the rest of the batch still lands.
+                if len(batch) == 1:
+                    failed.append((batch[0], str(exc)))
+                else:
+                    middle = len(batch) // 2
+                    batches[:0] = [batch[:middle], batch[middle:]]
+                continue
+            skipped.extend(locked)
+            applied.extend(rows)
+        pending = skipped
+        if not pending or attempt == lock_retries - 1:
+            break
+        await asyncio.sleep(0.2 * (attempt + 1))
+    return applied, pending, failed
+
+
+async def load_pending_deposits(session: AsyncSession, chain: Chain) -> list[tuple]:
+    result = await session.execute(
+        select(Escrow.id, Escrow.deposit_block).where(
+            Escrow.chain == chain,
+            Escrow.status == EscrowStatus.DEPOSIT_SEEN,
+            Escrow.deposit_block.is_not(None),
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def confirm_deposits(
+    session: AsyncSession,
+    confirmations: dict,
+    confirmations_required: int,
+) -> list[Escrow]:
+    if not confirmations:
+        return []
+    await session.execute(
+        update(Escrow)
+        .where(Escrow.id.in_(list(confirmations)), Escrow.status == EscrowStatus.DEPOSIT_SEEN)
+        .values(deposit_confirmations=case(confirmations, value=Escrow.id))
+        .execution_options(synchronize_session=False)
+    )
+    ready = [
+        escrow_id for escrow_id, count in confirmations.items() if count >= confirmations_required
+    ]
+    if not ready:
+        return []
+    result = await session.execute(
+        select(Escrow)
+        .where(Escrow.id.in_(ready), Escrow.status == EscrowStatus.DEPOSIT_SEEN)
+        .with_for_update()
+    )
+    escrows = list(result.scalars().all())
+    for escrow in escrows:
+        await transition_escrow(
+            session, escrow, deposit_outcome(escrow.amount_received or 0.0, escrow.amount_expected)
+        )
+    return escrows
+
+
+async def rollback_deposits(session: AsyncSession, chain: Chain, after_block: int) -> list[Escrow]:
+    return await drop_deposit_transfers(
+        session,
+        (Escrow.chain == chain) & (Escrow.deposit_block > after_block),
+        DepositTransfer.block_number > after_block,
+    )
+
+
+async def remove_deposit_transfer(
+    session: AsyncSession, chain: Chain, tx_hash: str, log_index: int
+) -> list[Escrow]:
+    orphaned = (
+        (DepositTransfer.chain == chain)
+        & (DepositTransfer.tx_hash == tx_hash)
+        & (DepositTransfer.log_index == log_index)
+    )
+    return await drop_deposit_transfers(
+        session, Escrow.id.in_(select(DepositTransfer.escrow_id).where(orphaned)), orphaned
+    )
+
+
+async def drop_deposit_transfers(
+    session: AsyncSession, escrows_filter: Any, transfers_filter: Any
+) -> list[Escrow]:
+    result = await session.execute(
+        select(Escrow)
+        .where(escrows_filter, Escrow.status == EscrowStatus.DEPOSIT_SEEN)
+        .with_for_update()
+    )
+    escrows = list(result.scalars().all())
+    if not escrows:
+        return []
+    ids = [escrow.id for escrow in escrows]
+    await session.execute(
+        delete(DepositTransfer).where(DepositTransfer.escrow_id.in_(ids), transfers_filter)
+    )
+    result = await session.execute(
+        select(
+            DepositTransfer.escrow_id,
+            DepositTransfer.tx_hash,
+            DepositTransfer.block_number,
+            DepositTransfer.amount,
+        )
+        .where(DepositTransfer.escrow_id.in_(ids))
+        .order_by(DepositTransfer.block_number, DepositTransfer.log_index)
+    )
+    remaining = defaultdict(list)
+    for escrow_id, tx_hash, block_number, amount in result.all():
+        remaining[escrow_id].append((tx_hash, block_number, amount))
+    for escrow in escrows:
+        transfers = remaining.get(escrow.id)
+        if transfers:
+            # Transfers that are still canonical count; only the orphaned ones are dropped.
+            escrow.deposit_tx_hash = transfers[0][0]
+            escrow.deposit_block = transfers[-1][1]
+            escrow.amount_received = round(sum(amount for _, _, amount in transfers), 2)
+            continue
+        await transition_escrow(session, escrow, EscrowStatus.AWAITING_DEPOSIT)
+        escrow.deposit_tx_hash = None
+        escrow.amount_received = None
+        escrow.deposit_block = None
+        escrow.deposit_confirmations = None
+    return escrows
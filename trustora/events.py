@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import socket
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from trustora.enums import Chain
+
+ESCROW_EVENTS_STREAM = "trustora:escrow_events"
+ESCROW_EVENTS_MAXLEN = 100_000
+ESCROW_EVENTS_DEAD_LETTER = "trustora:escrow_events:dead"
+
+
+def escrow_event(escrow: Any, chain: Chain | None = None) -> dict[str, Any]:
+    return {
+        "escrow_id": str(escrow.id),
+        "chain": (chain or escrow.chain).value,
+        "status": escrow.status.value,
+        "deposit_address": escrow.deposit_address,
+        "amount_expected": escrow.amount_expected,
+        "token": escrow.token.value,
+        "amount_tagged": escrow.amount_tagged,
+        "deposit_block": escrow.deposit_block,
+    }
+
+
+def decode_entries(
+    entries: list[tuple[str, dict[str, str] | None]],
+) -> list[tuple[str, dict[str, Any] | None]]:
+    # Pending entries trimmed from the stream come back without fields.
+    return [
+        (entry_id, json.loads(fields["event"]) if fields else None) for entry_id, fields in entries
+    ]
+
+
+async def publish_escrow_event(redis: Any, escrow: Any, chain: Chain | None = None) -> None:
+    await publish_escrow_events(redis, [escrow], chain)
+
+
+async def publish_escrow_events(
+    redis: Any,
+    escrows: Iterable[Any],
+    chain: Chain | None = None,
+) -> None:
+    pipe = redis.pipeline(transaction=False)
+    for escrow in escrows:
+        pipe.xadd(
+            ESCROW_EVENTS_STREAM,
+            {"event": json.dumps(escrow_event(escrow, chain))},
+            maxlen=ESCROW_EVENTS_MAXLEN,
+            approximate=True,
+        )
+    await pipe.execute()
+
+
+async def follow_escrow_events(
+    redis: Any,
+    handler: Callable[[dict[str, Any]], None],
+    on_reconnect: Callable[[], None] | None = None,
+    retry_seconds: float = 5.0,
+    block_ms: int = 5000,
+) -> None:
+    # Every replica needs every event, so this tails the stream without a consumer group and
+    # resumes from the last seen id after an outage instead of resyncing from the database.
+    last_id = "$"
+    while True:
+        try:
+            if last_id == "$":
+                last_id = await stream_tail_id(redis)
+                if on_reconnect is not None:
+                    on_reconnect()
+            response = await redis.xread({ESCROW_EVENTS_STREAM: last_id}, count=500, block=block_ms)
+            for _, entries in response or []:
+                for entry_id, event in decode_entries(entries):
+                    if event is not None:
+                        handler(event)
+                    last_id = entry_id
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - network behavior
+            logging.warning("escrow event stream read failed: %s", exc)
+            await asyncio.sleep(retry_seconds)
+
+
+async def stream_tail_id(redis: Any) -> str:
+    entries = await redis.xrevrange(ESCROW_EVENTS_STREAM, count=1)
+    return entries[0][0] if entries else "0-0"
+
+
+def consumer_name() -> str:
+    # Stable across restarts, so a restarted process replays its own pending entries instead of
+    # joining the group as yet another consumer.
+    return socket.gethostname()
+
+
+async def ensure_consumer_group(redis: Any, group: str) -> None:
+    try:
+        await redis.xgroup_create(ESCROW_EVENTS_STREAM, group, id="$", mkstream=True)
+    except Exception as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def prune_consumers(redis: Any, group: str, keep: str, idle_ms: int) -> None:
+    for info in await redis.xinfo_consumers(ESCROW_EVENTS_STREAM, group):
+        if info["name"] != keep and info["pending"] == 0 and info["idle"] >= idle_ms:
+            await redis.xgroup_delconsumer(ESCROW_EVENTS_STREAM, group, info["name"])
+
+
+async def deliver_event(
+    redis: Any,
+    group: str,
+    entry_id: str,
+    event: dict[str, Any],
+    handler: Callable[[dict[str, Any]], Awaitable[None]],
+    max_deliveries: int,
+) -> bool:
+    try:
+        await handler(event)
+        return True
+    except Exception as exc:
+        pending = await redis.xpending_range(
+            ESCROW_EVENTS_STREAM, group, min=entry_id, max=entry_id, count=1
+        )
+        deliveries = pending[0]["times_delivered"] if pending else max_deliveries
+        if deliveries < max_deliveries:
+            # Left unacknowledged; it is claimed again once idle.
+            logging.warning("escrow event %s failed for %s: %s", entry_id, group, exc)
+            return False
+        logging.error("escrow event %s dead-lettered for %s: %s", entry_id, group, exc)
+        await redis.xadd(
+            ESCROW_EVENTS_DEAD_LETTER,
+            {"group": group, "entry_id": entry_id, "event": json.dumps(event), "error": str(exc)},
+            maxlen=ESCROW_EVENTS_MAXLEN,
+            approximate=True,
+        )
+        return True
+
+
+async def consume_escrow_events(
+    redis: Any,
+    group: str,
+    consumer: str,
+    handler: Callable[[dict[str, Any]], Awaitable[None]],
+    retry_seconds: float = 5.0,
+    block_ms: int = 5000,
+    claim_idle_ms: int = 60_000,
+    max_deliveries: int = 5,
+) -> None:
+    # Start with our own pending entries so events delivered before a crash are replayed.
+    cursor = "0"
+    pruned = False
+    while True:
+        try:
+            await ensure_consumer_group(redis, group)
+            if not pruned:
+                await prune_consumers(redis, group, consumer, 10 * claim_idle_ms)
+                pruned = True
+            if cursor != ">":
+                response = await redis.xreadgroup(
+                    group, consumer, {ESCROW_EVENTS_STREAM: cursor}, count=100
+                )
+                entries = response[0][1] if response else []
+                if not entries:
+                    cursor = ">"
+                    continue
+            else:
+                claimed = await redis.xautoclaim(
+                    ESCROW_EVENTS_STREAM, group, consumer, claim_idle_ms, count=100
+                )
+                entries = claimed[1]
+                if not entries:
+                    response = await redis.xreadgroup(
+                        group, consumer, {ESCROW_EVENTS_STREAM: ">"}, count=100, block=block_ms
+                    )
+                    entries = response[0][1] if response else []
+            for entry_id, event in decode_entries(entries):
+                if cursor != ">":
+                    cursor = entry_id
+                if event is not None and not await deliver_event(
+                    redis, group, entry_id, event, handler, max_deliveries
+                ):
+                    continue
+                await redis.xack(ESCROW_EVENTS_STREAM, group, entry_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - network behavior
+            logging.warning("escrow event consumer error: %s", exc)
+            cursor = "0"
+            await asyncio.sleep(retry_seconds)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+
+from trustora.enums import Chain
+
+T = TypeVar("T")
+
+
+@dataclass
+class ExecutorStats:
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    max_queued: int = 0
+
+
+class ChainExecutor:
+    def __init__(self, limits: dict[Chain, int], signing_workers: int = 4) -> None:
+        self._slots = {chain: asyncio.Semaphore(limit) for chain, limit in limits.items()}
+        self.limits = dict(limits)
+        self.stats = {chain: ExecutorStats() for chain in limits}
+        # Signing is CPU-bound ECDSA work, so it gets its own bounded pool off the event loop.
+        self._signing = ThreadPoolExecutor(signing_workers, thread_name_prefix="signing")
+        self.signing_workers = signing_workers
+        self.signing_pending = 0
+
+    async def run(self, chain: Chain, operation: Awaitable[T]) -> T:
+        stats = self.stats[chain]
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        try:
+            await self._slots[chain].acquire()
+        except BaseException:
+            stats.queued -= 1
+            if asyncio.iscoroutine(operation):
+                operation.close()
+            raise
+        stats.queued -= 1
+        stats.running += 1
+        try:
+            result = await operation
+        except BaseException:
+            stats.failed += 1
+            raise
+        else:
+            stats.completed += 1
+            return result
+        finally:
+            stats.running -= 1
+            self._slots[chain].release()
+
+    async def sign(self, func: Callable[..., T], *args: Any) -> T:
+        self.signing_pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._signing, functools.partial(func, *args))
+        finally:
+            self.signing_pending -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "chains": {
+                chain.value: asdict(stats) | {"limit": self.limits[chain]}
+                for chain, stats in self.stats.items()
+            },
+            "signing": {"workers": self.signing_workers, "pending": self.signing_pending},
+        }
+
+    def shutdown(self) -> None:
+        self._signing.shutdown(wait=False, cancel_futures=True)
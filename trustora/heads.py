@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from trustora.enums import Chain
+from trustora.reorg import BlockRef, parse_block_ref
+
+
+@dataclass(frozen=True)
+class ChainHead:
+    chain: Chain
+    latest: int
+    latest_hash: str
+    parent_hash: str
+    finalized: int | None
+    safe: int | None
+    gas_price: int | None
+    chain_id: int | None
+    updated_at: float
+
+    def block_ref(self) -> BlockRef:
+        return BlockRef(self.latest, self.latest_hash, self.parent_hash)
+
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self) | {"chain": self.chain.value})
+
+    @classmethod
+    def loads(cls, data: str) -> ChainHead:
+        fields = json.loads(data)
+        return cls(**(fields | {"chain": Chain(fields["chain"])}))
+
+
+def head_key(chain: Chain) -> str:
+    return f"heads:{chain.value}"
+
+
+class HeadTracker:
+    def __init__(
+        self,
+        redis: Any,
+        chain: Chain,
+        client: Any,
+        poll_seconds: float = 3.0,
+        max_age_seconds: float = 30.0,
+        lease: Any | None = None,
+    ) -> None:
+        self.redis = redis
+        self.chain = chain
+        self.client = client
+        self.poll_seconds = poll_seconds
+        self.max_age_seconds = max_age_seconds
+        self.lease = lease
+        self.head: ChainHead | None = None
+        self._chain_id: int | None = None
+
+    async def refresh(self) -> ChainHead:
+        calls = [
+            ("eth_getBlockByNumber", ["latest", False]),
+            ("eth_getBlockByNumber", ["finalized", False]),
+            ("eth_getBlockByNumber", ["safe", False]),
+            ("eth_gasPrice", []),
+        ]
+        if self._chain_id is None:
+            calls.append(("eth_chainId", []))
+        results = await self.client.rpc.batch(calls)
+        if isinstance(results[0], Exception):
+            raise results[0]
+        if self._chain_id is None:
+            if isinstance(results[4], Exception):
+                raise results[4]
+            self._chain_id = int(results[4], 16)
+        latest = parse_block_ref(results[0])
+        # Not every node knows the finality tags (older TRON builds); fall back to counting.
+        finalized, safe = (
+            None if isinstance(result, Exception) or not result else int(result["number"], 16)
+            for result in results[1:3]
+        )
+        gas_price = None if isinstance(results[3], Exception) else int(results[3], 16)
+        self.head = ChainHead(
+            chain=self.chain,
+            latest=latest.number,
+            latest_hash=latest.hash,
+            parent_hash=latest.parent_hash,
+            finalized=finalized,
+            safe=safe,
+            gas_price=gas_price,
+            chain_id=self._chain_id,
+            updated_at=time.time(),
+        )
+        data = self.head.dumps()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(head_key(self.chain), data)
+        pipe.publish(head_key(self.chain), data)
+        await pipe.execute()
+        return self.head
+
+    async def current(self) -> ChainHead:
+        if self.head is None or self.head.age() > self.max_age_seconds:
+            head = await read_head(self.redis, self.chain, self.max_age_seconds)
+            if head is not None:
+                self.head = head
+            else:
+                return await self.refresh()
+        return self.head
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if self.lease is None or await self.lease.hold():
+                    await self.refresh()
+                else:
+                    self.head = await read_head(self.redis, self.chain, self.max_age_seconds)
+            except Exception as exc:  # pragma: no cover - network behavior
+                logging.warning("head refresh failed for %s: %s", self.chain.value, exc)
+            await asyncio.sleep(self.poll_seconds)
+
+
+async def read_head(redis: Any, chain: Chain, max_age_seconds: float = 30.0) -> ChainHead | None:
+    data = await redis.get(head_key(chain))
+    if not data:
+        return None
+    head = ChainHead.loads(data)
+    return head if head.age() <= max_age_seconds else None
+
+
+class HeadReader:
+    def __init__(self, redis: Any, chain: Chain, max_age_seconds: float = 30.0) -> None:
+        self.redis = redis
+        self.chain = chain
+        self.max_age_seconds = max_age_seconds
+        self.head: ChainHead | None = None
+
+    async def get(self) -> ChainHead | None:
+        if self.head is None or self.head.age() > self.max_age_seconds:
+            self.head = await read_head(self.redis, self.chain, self.max_age_seconds)
+        return self.head
+
+    async def follow(self, retry_seconds: float = 5.0) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(head_key(self.chain))
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.head = ChainHead.loads(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - network behavior
+                logging.warning("head subscription lost for %s: %s", self.chain.value, exc)
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(retry_seconds)
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+from collections.abc import Collection
 from typing import Protocol
 
+# Deposits recorded before the ledger existed were backfilled under this log index.
+LEGACY_LOG_INDEX = -1
+
 
 class EscrowLike(Protocol):
-    deposit_tx_hash: str | None
     payout_tx_hash: str | None
 
 
-def can_record_deposit(escrow: EscrowLike, tx_hash: str) -> bool:
-    return escrow.deposit_tx_hash is None or escrow.deposit_tx_hash == tx_hash
+def can_record_deposit(recorded: Collection[tuple[str, int]], tx_hash: str, log_index: int) -> bool:
+    # A legacy entry stands for the one transfer the escrow kept from its transaction, without
+    # saying which log it was, so it covers every log of that transaction.
+    return (tx_hash, log_index) not in recorded and (tx_hash, LEGACY_LOG_INDEX) not in recorded
 
 
 def can_send_payout(escrow: EscrowLike) -> bool:
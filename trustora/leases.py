@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Range leases live under ARGV lease prefixes rather than KEYS, so these scripts assume a
+# single (non-cluster) Redis, like the rest of the services.
+CLAIM_SCRIPT = """
+local owner, ttl, lease_prefix = ARGV[1], ARGV[2], ARGV[5]
+local head, size = tonumber(ARGV[3]), tonumber(ARGV[4])
+for _, member in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+  local start = string.sub(member, 1, string.find(member, ':') - 1)
+  if redis.call('SET', lease_prefix .. start, owner, 'NX', 'PX', ttl) then
+    return member
+  end
+end
+local cursor = redis.call('GET', KEYS[3])
+if not cursor then
+  return nil
+end
+local frontier = math.max(tonumber(redis.call('GET', KEYS[1]) or '0'), tonumber(cursor) + 1)
+if frontier > head then
+  return nil
+end
+local stop = math.min(head, frontier + size - 1)
+local member = frontier .. ':' .. stop
+redis.call('ZADD', KEYS[2], frontier, member)
+redis.call('SET', lease_prefix .. frontier, owner, 'PX', ttl)
+redis.call('SET', KEYS[1], stop + 1)
+return member
+"""
+
+COMPLETE_SCRIPT = """
+local member, start, owner, lease_prefix = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+if redis.call('GET', lease_prefix .. start) ~= owner then
+  return -1
+end
+redis.call('DEL', lease_prefix .. start)
+redis.call('ZREM', KEYS[1], member)
+redis.call('ZADD', KEYS[2], tonumber(start), member)
+local cursor = tonumber(redis.call('GET', KEYS[3]) or '-1')
+while true do
+  local first = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+  if not first then
+    break
+  end
+  local sep = string.find(first, ':')
+  local first_start = tonumber(string.sub(first, 1, sep - 1))
+  local first_end = tonumber(string.sub(first, sep + 1))
+  if first_start > cursor + 1 then
+    break
+  end
+  cursor = math.max(cursor, first_end)
+  redis.call('ZREM', KEYS[2], first)
+end
+redis.call('SET', KEYS[3], cursor)
+return cursor
+"""
+
+REWIND_SCRIPT = """
+local block, lease_prefix = tonumber(ARGV[1]), ARGV[2]
+local frontier = math.min(tonumber(redis.call('GET', KEYS[1]) or '0'), block + 1)
+for _, key in ipairs({KEYS[2], KEYS[3]}) do
+  for _, member in ipairs(redis.call('ZRANGE', key, 0, -1)) do
+    local sep = string.find(member, ':')
+    local start = tonumber(string.sub(member, 1, sep - 1))
+    if tonumber(string.sub(member, sep + 1)) > block then
+      redis.call('ZREM', key, member)
+      redis.call('DEL', lease_prefix .. start)
+      frontier = math.min(frontier, start)
+    end
+  end
+end
+redis.call('SET', KEYS[1], frontier)
+local cursor = redis.call('GET', KEYS[4])
+if cursor and tonumber(cursor) > block then
+  redis.call('SET', KEYS[4], block)
+end
+return frontier
+"""
+
+
+def replica_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class Lease:
+    def __init__(self, redis: Any, key: str, owner: str, ttl_seconds: float = 30.0) -> None:
+        self.redis = redis
+        self.key = key
+        self.owner = owner
+        self.ttl_ms = int(ttl_seconds * 1000)
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.owner, nx=True, px=self.ttl_ms))
+
+    async def renew(self) -> bool:
+        script = self.redis.register_script(RENEW_SCRIPT)
+        return bool(await script(keys=[self.key], args=[self.owner, self.ttl_ms]))
+
+    async def hold(self) -> bool:
+        return await self.renew() or await self.acquire()
+
+    async def release(self) -> None:
+        script = self.redis.register_script(RELEASE_SCRIPT)
+        await script(keys=[self.key], args=[self.owner])
+
+
+class RangeCoordinator:
+    def __init__(
+        self,
+        redis: Any,
+        prefix: str,
+        cursor_key: str,
+        owner: str,
+        ttl_seconds: float = 30.0,
+    ) -> None:
+        self.redis = redis
+        self.owner = owner
+        self.ttl_seconds = ttl_seconds
+        self.frontier_key = f"{prefix}:frontier"
+        self.ranges_key = f"{prefix}:ranges"
+        self.done_key = f"{prefix}:done"
+        self.lease_prefix = f"{prefix}:range_lease:"
+        self.cursor_key = cursor_key
+
+    def lease(self, start: int) -> Lease:
+        return Lease(self.redis, f"{self.lease_prefix}{start}", self.owner, self.ttl_seconds)
+
+    async def claim(self, head: int, size: int) -> tuple[int, int] | None:
+        script = self.redis.register_script(CLAIM_SCRIPT)
+        member = await script(
+            keys=[self.frontier_key, self.ranges_key, self.cursor_key],
+            args=[self.owner, int(self.ttl_seconds * 1000), head, size, self.lease_prefix],
+        )
+        if not member:
+            return None
+        start, end = member.split(":")
+        return int(start), int(end)
+
+    async def complete(self, start: int, end: int) -> int:
+        script = self.redis.register_script(COMPLETE_SCRIPT)
+        return int(
+            await script(
+                keys=[self.ranges_key, self.done_key, self.cursor_key],
+                args=[f"{start}:{end}", start, self.owner, self.lease_prefix],
+            )
+        )
+
+    async def rewind(self, block: int) -> None:
+        script = self.redis.register_script(REWIND_SCRIPT)
+        await script(
+            keys=[self.frontier_key, self.ranges_key, self.done_key, self.cursor_key],
+            args=[block, self.lease_prefix],
+        )
+
+    @asynccontextmanager
+    async def holding(self, start: int) -> AsyncIterator[None]:
+        lease = self.lease(start)
+
+        async def heartbeat() -> None:
+            while True:
+                await asyncio.sleep(self.ttl_seconds / 3)
+                if not await lease.renew():
+                    logging.warning("lost range lease at %s", start)
+                    return
+
+        task = asyncio.create_task(heartbeat())
+        try:
+            yield
+        except BaseException:
+            # Give the range back right away instead of waiting for the TTL.
+            await lease.release()
+            raise
+        finally:
+            task.cancel()
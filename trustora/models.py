@@ -19,7 +19,15 @@ from sqlalchemy import (
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-from trustora.enums import Chain, DisputeStatus, EscrowStatus, MessageRole, MessageType, Token
+from trustora.enums import (
+    Chain,
+    DisputeStatus,
+    EscrowStatus,
+    MessageRole,
+    MessageType,
+    PayoutJobStatus,
+    Token,
+)
 
 
 class Base(DeclarativeBase):
@@ -52,12 +60,14 @@ class Escrow(Base):
     token: Mapped[Token] = mapped_column(Enum(Token))
     amount_expected: Mapped[float] = mapped_column(Float)
     amount_received: Mapped[float | None] = mapped_column(Float)
+    amount_tagged: Mapped[bool] = mapped_column(Boolean, default=False)
     fee_snapshot_json: Mapped[dict] = mapped_column(JSON)
     fee_amount: Mapped[float] = mapped_column(Float)
     net_amount: Mapped[float] = mapped_column(Float)
     deposit_address: Mapped[str] = mapped_column(String(128))
     deposit_tx_hash: Mapped[str | None] = mapped_column(String(128))
     deposit_confirmations: Mapped[int | None] = mapped_column(Integer)
+    deposit_block: Mapped[int | None] = mapped_column(BigInteger)
     payout_address: Mapped[str | None] = mapped_column(String(128))
     payout_tx_hash: Mapped[str | None] = mapped_column(String(128))
     payout_confirmations: Mapped[int | None] = mapped_column(Integer)
@@ -66,11 +76,48 @@ class Escrow(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+
+class DepositTransfer(Base):
+    __tablename__ = "deposit_transfers"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    escrow_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("escrows.id"), index=True
+    )
+    chain: Mapped[Chain] = mapped_column(Enum(Chain))
+    token: Mapped[Token] = mapped_column(Enum(Token))
+    tx_hash: Mapped[str] = mapped_column(String(128))
+    log_index: Mapped[int] = mapped_column(Integer)
+    block_number: Mapped[int] = mapped_column(BigInteger)
+    amount: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
     __table_args__ = (
-        UniqueConstraint("chain", "deposit_tx_hash", name="uq_chain_deposit_tx"),
+        UniqueConstraint("chain", "tx_hash", "log_index", name="uq_deposit_transfer"),
     )
 
 
+class PayoutJob(Base):
+    __tablename__ = "payout_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    escrow_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("escrows.id"), index=True
+    )
+    chain: Mapped[Chain] = mapped_column(Enum(Chain))
+    payout_address: Mapped[str] = mapped_column(String(128))
+    token: Mapped[Token] = mapped_column(Enum(Token), default=Token.USDT)
+    amount: Mapped[float] = mapped_column(Float)
+    status: Mapped[PayoutJobStatus] = mapped_column(Enum(PayoutJobStatus), index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    tx_hash: Mapped[str | None] = mapped_column(String(128))
+    raw_tx: Mapped[str | None] = mapped_column(Text)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class Message(Base):
     __tablename__ = "messages"
 
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+# Multicall3 is deployed at the same address on BSC and most EVM chains.
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")
+TRANSFER_SELECTOR = bytes.fromhex("a9059cbb")
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 32)
+
+
+def balance_of_call(address: str) -> bytes:
+    return BALANCE_OF_SELECTOR + _word(int(address, 16))
+
+
+def transfer_call(address: str, amount: int) -> bytes:
+    return TRANSFER_SELECTOR + _word(int(address, 16)) + _word(amount)
+
+
+def encode_aggregate3(calls: list[tuple[str, bytes]]) -> str:
+    # aggregate3((address target, bool allowFailure, bytes callData)[]); every call may fail.
+    encoded = [
+        _word(int(target, 16)) + _word(1) + _word(96) + _word(len(data)) + _pad(data)
+        for target, data in calls
+    ]
+    offsets = []
+    position = 32 * len(encoded)
+    for item in encoded:
+        offsets.append(_word(position))
+        position += len(item)
+    body = _word(32) + _word(len(encoded)) + b"".join(offsets) + b"".join(encoded)
+    return "0x" + (AGGREGATE3_SELECTOR + body).hex()
+
+
+def decode_aggregate3(result: str) -> list[bytes | None]:
+    raw = bytes.fromhex(result.removeprefix("0x"))
+
+    def word(position: int) -> int:
+        return int.from_bytes(raw[position : position + 32], "big")
+
+    start = word(0)
+    base = start + 32
+    decoded: list[bytes | None] = []
+    for i in range(word(start)):
+        item = base + word(base + 32 * i)
+        data = item + word(item + 32)
+        decoded.append(raw[data + 32 : data + 32 + word(data)] if word(item) else None)
+    return decoded
+
+
+def decode_uint(data: bytes | None) -> int | None:
+    return int.from_bytes(data[:32], "big") if data else None
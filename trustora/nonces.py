@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from trustora.enums import Chain
+from trustora.leases import Lease, replica_id
+
+# Nodes only accept a same-nonce replacement that raises the gas price by at least 10%.
+REPLACEMENT_BUMP = 1.125
+NONCE_CONFLICT_ERRORS = ("nonce too low", "replacement transaction underpriced")
+
+
+@dataclass(frozen=True)
+class SentTransaction:
+    nonce: int
+    tx_hash: str
+    txn: dict[str, Any]
+    ref: str
+    sent_at: float
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, data: str) -> SentTransaction:
+        return cls(**json.loads(data))
+
+
+def plan_resync(pending: int, taken: Iterable[int]) -> tuple[int, list[int]]:
+    # Nonces reserved or sent but not yet pending stay taken; holes below them become gaps.
+    held = {nonce for nonce in taken if nonce >= pending}
+    top = max(held, default=pending - 1) + 1
+    return top, [nonce for nonce in range(pending, top) if nonce not in held]
+
+
+def find_holes(pending: int, sent: Iterable[int], reserved: Iterable[int]) -> list[int]:
+    # The node's pending count stops at the first nonce it has never seen; every sent
+    # transaction above such a hole waits in its queue until something takes that nonce.
+    broadcast = set(sent)
+    taken = broadcast | set(reserved)
+    top = max(broadcast, default=pending)
+    return [nonce for nonce in range(pending, top) if nonce not in taken]
+
+
+def bump_gas_price(previous: int, current: int | None = None) -> int:
+    return max(int(previous * REPLACEMENT_BUMP) + 1, current or 0)
+
+
+def cancel_transaction(txn: dict[str, Any], sender: str, gas_price: int) -> dict[str, Any]:
+    # A zero-value self transfer that takes the nonce so the original transaction can never land.
+    return {
+        "to": sender,
+        "value": 0,
+        "gas": 21000,
+        "gasPrice": gas_price,
+        "nonce": txn["nonce"],
+        "chainId": txn["chainId"],
+        "data": "0x",
+    }
+
+
+def is_nonce_conflict(exc: Exception) -> bool:
+    message = str(exc).lower()
+    return any(error in message for error in NONCE_CONFLICT_ERRORS)
+
+
+def can_reuse_nonce(nonce: int, pending: int, exc: Exception) -> bool:
+    # A timed out broadcast may still have landed, so a nonce is only reused once the node
+    # confirms nothing took it.
+    return not is_nonce_conflict(exc) and nonce >= pending
+
+
+class NonceManager:
+    def __init__(
+        self,
+        redis: Any,
+        rpc: Any,
+        chain: Chain,
+        address: str,
+        reserve_ttl_seconds: float = 120.0,
+    ) -> None:
+        self.redis = redis
+        self.rpc = rpc
+        self.address = address
+        self.reserve_ttl_seconds = reserve_ttl_seconds
+        prefix = f"nonce:{chain.value}:{address.lower()}"
+        self.counter_key = f"{prefix}:next"
+        self.gaps_key = f"{prefix}:gaps"
+        self.reserved_key = f"{prefix}:reserved"
+        self.sent_key = f"{prefix}:sent"
+        self.lock = Lease(redis, f"{prefix}:lock", replica_id(), ttl_seconds=10.0)
+
+    @asynccontextmanager
+    async def locked(self) -> AsyncIterator[None]:
+        while not await self.lock.acquire():
+            await asyncio.sleep(0.01)
+        try:
+            yield
+        finally:
+            await self.lock.release()
+
+    async def transaction_count(self, tag: str) -> int:
+        return int(await self.rpc.call("eth_getTransactionCount", [self.address, tag]), 16)
+
+    async def reserve(self) -> int:
+        # RPC calls stay outside the lock: the lease is short and never renewed.
+        pending = None
+        if await self.redis.get(self.counter_key) is None:
+            pending = await self.transaction_count("pending")
+        async with self.locked():
+            if pending is not None and await self.redis.get(self.counter_key) is None:
+                await self._resync(pending)
+            gap = await self.redis.zpopmin(self.gaps_key)
+            if gap:
+                nonce = int(gap[0][0])
+            else:
+                nonce = int(await self.redis.incr(self.counter_key)) - 1
+            await self.redis.zadd(self.reserved_key, {str(nonce): time.time()})
+        return nonce
+
+    async def sent(self, nonce: int, tx_hash: str, txn: dict[str, Any], ref: str = "") -> None:
+        record = SentTransaction(nonce, tx_hash, txn, ref, time.time())
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(self.reserved_key, str(nonce))
+        pipe.hset(self.sent_key, str(nonce), record.dumps())
+        await pipe.execute()
+
+    async def failed(self, nonce: int, exc: Exception) -> None:
+        try:
+            pending = await self.transaction_count("pending")
+        except Exception as rpc_exc:
+            # The nonce stays reserved; once the reservation expires, claim_holes picks it up.
+            logging.warning("nonce %s left reserved, node unreachable: %s", nonce, rpc_exc)
+            return
+        async with self.locked():
+            await self.redis.zrem(self.reserved_key, str(nonce))
+            if can_reuse_nonce(nonce, pending, exc):
+                await self.redis.zadd(self.gaps_key, {str(nonce): nonce})
+            else:
+                await self._resync(pending)
+
+    async def resync(self) -> int:
+        pending = await self.transaction_count("pending")
+        async with self.locked():
+            return await self._resync(pending)
+
+    async def _resync(self, pending: int) -> int:
+        # Reservations of a crashed process would otherwise hold their nonce forever.
+        cutoff = time.time() - self.reserve_ttl_seconds
+        await self.redis.zremrangebyscore(self.reserved_key, "-inf", cutoff)
+        reserved = [int(nonce) for nonce in await self.redis.zrange(self.reserved_key, 0, -1)]
+        sent = [int(nonce) for nonce in await self.redis.hkeys(self.sent_key)]
+        top, gaps = plan_resync(pending, reserved + sent)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self.counter_key, top)
+        pipe.delete(self.gaps_key)
+        if gaps:
+            pipe.zadd(self.gaps_key, {str(nonce): nonce for nonce in gaps})
+        await pipe.execute()
+        return top
+
+    async def claim_holes(self) -> list[int]:
+        # Nonces reserved but never broadcast, by a crash or a failed send whose cleanup also
+        # failed. The caller fills each one with a transaction of its own.
+        pending = await self.transaction_count("pending")
+        async with self.locked():
+            cutoff = time.time() - self.reserve_ttl_seconds
+            fresh = await self.redis.zrangebyscore(self.reserved_key, cutoff, "+inf")
+            sent = await self.redis.hkeys(self.sent_key)
+            holes = find_holes(pending, map(int, sent), map(int, fresh))
+            if holes:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.zrem(self.gaps_key, *(str(nonce) for nonce in holes))
+                pipe.zadd(self.reserved_key, {str(nonce): time.time() for nonce in holes})
+                await pipe.execute()
+        return holes
+
+    async def stuck(self, max_age_seconds: float) -> list[SentTransaction]:
+        mined = await self.transaction_count("latest")
+        entries = await self.redis.hgetall(self.sent_key)
+        records = [SentTransaction.loads(data) for data in entries.values()]
+        done = [str(record.nonce) for record in records if record.nonce < mined]
+        if done:
+            await self.redis.hdel(self.sent_key, *done)
+        cutoff = time.time() - max_age_seconds
+        return sorted(
+            (record for record in records if record.nonce >= mined and record.sent_at < cutoff),
+            key=lambda record: record.nonce,
+        )
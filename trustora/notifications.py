@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from trustora.enums import EscrowStatus
+
+STATUS_NOTIFICATIONS: dict[EscrowStatus, tuple[str, bool, bool]] = {
+    EscrowStatus.DEPOSIT_SEEN: (
+        "💳 Deposit detected for {room_code}. Waiting for network confirmations.",
+        True,
+        True,
+    ),
+    EscrowStatus.FUNDS_LOCKED: (
+        "🔒 Deposit confirmed for {room_code}. Funds are locked in escrow.",
+        True,
+        True,
+    ),
+    EscrowStatus.UNDERPAID: (
+        "⚠️ Deposit for {room_code} is below the expected {amount} USDT. Contact support.",
+        True,
+        False,
+    ),
+    EscrowStatus.OVERPAID_REVIEW: (
+        "🔎 Deposit for {room_code} is above the expected {amount} USDT and is under review.",
+        True,
+        True,
+    ),
+    EscrowStatus.PAYOUT_SENT: ("💸 Payout sent for {room_code}.", True, True),
+    EscrowStatus.COMPLETED: (
+        "✅ Payout for {room_code} confirmed on chain. Escrow completed.",
+        True,
+        True,
+    ),
+    EscrowStatus.PAYOUT_FAILED: (
+        "⚠️ Payout for {room_code} could not be sent. An admin will review it.",
+        True,
+        True,
+    ),
+}
+
+
+def build_status_notifications(
+    status: EscrowStatus,
+    room_code: str,
+    amount_expected: float,
+    buyer_tg_id: int,
+    seller_tg_id: int,
+) -> list[tuple[int, str]]:
+    if status not in STATUS_NOTIFICATIONS:
+        return []
+    template, to_buyer, to_seller = STATUS_NOTIFICATIONS[status]
+    text = template.format(room_code=room_code, amount=amount_expected)
+    recipients = [buyer_tg_id] if to_buyer else []
+    if to_seller:
+        recipients.append(seller_tg_id)
+    return [(tg_id, text) for tg_id in recipients]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from trustora.enums import EscrowStatus
+
+
+@dataclass(frozen=True)
+class SentPayout:
+    escrow_id: uuid.UUID
+    tx_hash: str
+    sent_at: datetime
+    confirmations: int | None = None
+
+
+@dataclass(frozen=True)
+class PayoutUpdate:
+    escrow_id: uuid.UUID
+    tx_hash: str
+    confirmations: int
+    status: EscrowStatus | None = None
+    reason: str | None = None
+
+
+def payout_confirmations(
+    block: int,
+    head: int,
+    finalized: int | None = None,
+    required: int | None = None,
+) -> int:
+    count = max(0, head - block)
+    if finalized is None or required is None:
+        return count
+    return required if block <= finalized else min(count, required - 1)
+
+
+def plan_payout_updates(
+    payouts: list[SentPayout],
+    lookups: list[tuple[Any, Any]],
+    head: int,
+    finalized: int | None,
+    required: int,
+    drop_after_seconds: float,
+    now: datetime,
+) -> list[PayoutUpdate]:
+    updates = []
+    for payout, (receipt, txn) in zip(payouts, lookups, strict=True):
+        if isinstance(receipt, Exception) or isinstance(txn, Exception):
+            continue
+        if receipt:
+            if int(receipt.get("status") or "0x1", 16) == 0:
+                updates.append(
+                    PayoutUpdate(
+                        payout.escrow_id, payout.tx_hash, 0, EscrowStatus.PAYOUT_FAILED, "reverted"
+                    )
+                )
+                continue
+            block = int(receipt["blockNumber"], 16)
+            confirmations = payout_confirmations(block, head, finalized, required)
+            status = EscrowStatus.COMPLETED if confirmations >= required else None
+            if status is not None or confirmations != payout.confirmations:
+                updates.append(
+                    PayoutUpdate(payout.escrow_id, payout.tx_hash, confirmations, status)
+                )
+        elif txn is None and (now - payout.sent_at).total_seconds() >= drop_after_seconds:
+            # Neither mined nor known to the node long after broadcast: the transaction is gone.
+            updates.append(
+                PayoutUpdate(
+                    payout.escrow_id, payout.tx_hash, 0, EscrowStatus.PAYOUT_FAILED, "dropped"
+                )
+            )
+    return updates
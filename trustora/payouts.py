@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from typing import Any
+
+from trustora.enums import PayoutJobStatus
+
+ACTIVE_JOB_STATUSES = frozenset(
+    {PayoutJobStatus.QUEUED, PayoutJobStatus.RUNNING, PayoutJobStatus.SENT}
+)
+
+
+class BroadcastError(RuntimeError):
+    pass
+
+
+def retry_delay(attempts: int, base_seconds: float = 5.0, max_seconds: float = 300.0) -> float:
+    return min(max_seconds, base_seconds * 2 ** max(attempts - 1, 0))
+
+
+def failure_status(signed: bool, attempts: int, max_attempts: int) -> PayoutJobStatus:
+    # A signed transaction may have reached the network even if its broadcast failed, so only
+    # the payout tracker can tell whether the seller was paid.
+    if signed:
+        return PayoutJobStatus.SENT
+    if attempts >= max_attempts:
+        return PayoutJobStatus.FAILED
+    return PayoutJobStatus.QUEUED
+
+
+def payout_job_view(job: Any) -> dict[str, Any]:
+    return {
+        "job_id": str(job.id),
+        "escrow_id": str(job.escrow_id),
+        "status": job.status.value,
+        "token": job.token.value,
+        "attempts": job.attempts,
+        "tx_hash": job.tx_hash,
+        "error": job.last_error,
+    }
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict
+from typing import Any
+
+from trustora.deposits import DepositMatch
+
+
+def retry_delay(attempts: int, base_seconds: float, max_seconds: float) -> float:
+    return min(max_seconds, base_seconds * 2 ** max(0, attempts - 1))
+
+
+def encode_entry(match: DepositMatch, attempts: int, error: str) -> str:
+    return json.dumps(
+        asdict(match) | {"escrow_id": str(match.escrow_id), "attempts": attempts, "error": error}
+    )
+
+
+def decode_entry(data: str) -> tuple[DepositMatch, int]:
+    fields = json.loads(data)
+    attempts = fields.pop("attempts")
+    fields.pop("error", None)
+    fields["escrow_id"] = uuid.UUID(fields["escrow_id"])
+    return DepositMatch(**fields), attempts
+
+
+def entry_key(match: DepositMatch) -> str:
+    # One transaction can carry several transfers to the same escrow.
+    return f"{match.escrow_id}:{match.tx_hash}:{match.log_index}:{match.block_number}"
+
+
+class DepositQuarantine:
+    def __init__(
+        self,
+        redis: Any,
+        prefix: str,
+        base_delay_seconds: float = 30.0,
+        max_delay_seconds: float = 3600.0,
+        max_attempts: int = 10,
+    ) -> None:
+        self.redis = redis
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.max_attempts = max_attempts
+        self.due_key = f"{prefix}:quarantine"
+        self.entries_key = f"{prefix}:quarantine:entries"
+        self.dead_key = f"{prefix}:quarantine:dead"
+
+    async def add(self, failures: list[tuple[DepositMatch, int, str]]) -> None:
+        if not failures:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        now = time.time()
+        for match, attempts, error in failures:
+            key = entry_key(match)
+            if attempts >= self.max_attempts:
+                logging.error("deposit %s dead-lettered after %s tries: %s", key, attempts, error)
+                pipe.hset(self.dead_key, key, encode_entry(match, attempts, error))
+                pipe.hdel(self.entries_key, key)
+                continue
+            logging.warning("deposit %s quarantined (attempt %s): %s", key, attempts, error)
+            delay = retry_delay(attempts, self.base_delay_seconds, self.max_delay_seconds)
+            pipe.hset(self.entries_key, key, encode_entry(match, attempts, error))
+            pipe.zadd(self.due_key, {key: now + delay})
+        await pipe.execute()
+
+    async def claim_due(self, limit: int = 100) -> list[tuple[DepositMatch, int]]:
+        keys = await self.redis.zrangebyscore(self.due_key, "-inf", time.time(), 0, limit)
+        claimed = []
+        for key in keys:
+            # ZREM is the claim: only one replica gets 1 back for a given entry.
+            if not await self.redis.zrem(self.due_key, key):
+                continue
+            data = await self.redis.hget(self.entries_key, key)
+            if data:
+                claimed.append(decode_entry(data))
+        return claimed
+
+    async def resolve(self, matches: list[DepositMatch]) -> None:
+        if matches:
+            await self.redis.hdel(self.entries_key, *(entry_key(match) for match in matches))
+
+    async def size(self) -> int:
+        return await self.redis.zcard(self.due_key)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from trustora.enums import EscrowStatus, Token
+from trustora.tokens import TokenRegistry
+
+# Statuses in which the deposit address should still hold exactly what we recorded.
+RECONCILED_STATUSES = frozenset(
+    {
+        EscrowStatus.AWAITING_DEPOSIT,
+        EscrowStatus.DEPOSIT_SEEN,
+        EscrowStatus.UNDERPAID,
+        EscrowStatus.OVERPAID_REVIEW,
+        EscrowStatus.FUNDS_LOCKED,
+        EscrowStatus.RELEASE_REQUESTED,
+        EscrowStatus.RELEASE_APPROVED,
+        EscrowStatus.PAYOUT_QUEUED,
+        EscrowStatus.PAYOUT_FAILED,
+        EscrowStatus.DISPUTED,
+        EscrowStatus.REVIEW,
+    }
+)
+
+
+@dataclass(frozen=True)
+class AddressTarget:
+    address: str
+    token: Token
+    expected: float
+    escrow_ids: tuple[uuid.UUID, ...]
+    shared: bool = False
+
+
+@dataclass(frozen=True)
+class BalanceMismatch:
+    address: str
+    token: Token
+    expected: float
+    on_chain: float | None
+    escrow_ids: tuple[uuid.UUID, ...]
+
+    @property
+    def kind(self) -> str:
+        if self.on_chain is None:
+            return "unreadable"
+        return "unrecorded_deposit" if self.on_chain > self.expected else "missing_funds"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "address": self.address,
+            "token": self.token.value,
+            "expected": self.expected,
+            "on_chain": self.on_chain,
+            "kind": self.kind,
+            "escrow_ids": [str(escrow_id) for escrow_id in self.escrow_ids],
+        }
+
+
+def group_targets(rows: list[tuple]) -> list[AddressTarget]:
+    expected: dict[tuple[str, Token], float] = defaultdict(float)
+    escrows: dict[tuple[str, Token], list[uuid.UUID]] = defaultdict(list)
+    shared: set[tuple[str, Token]] = set()
+    for escrow_id, address, token, amount_received, amount_tagged in rows:
+        expected[(address, token)] += amount_received or 0.0
+        escrows[(address, token)].append(escrow_id)
+        if amount_tagged:
+            shared.add((address, token))
+    return [
+        AddressTarget(
+            address,
+            token,
+            round(total, 2),
+            tuple(escrows[(address, token)]),
+            (address, token) in shared,
+        )
+        for (address, token), total in expected.items()
+    ]
+
+
+def diff_balances(
+    targets: list[AddressTarget],
+    balances: dict[tuple[str, Token], float | None],
+    tolerance: float = 0.01,
+) -> list[BalanceMismatch]:
+    mismatches = []
+    for target in targets:
+        on_chain = balances.get((target.address, target.token))
+        if on_chain is not None and abs(on_chain - target.expected) <= tolerance:
+            continue
+        # Payouts leave from the hot wallet, so shared addresses keep the funds of completed
+        # escrows; only a shortfall against the open ones means something is wrong.
+        if target.shared and on_chain is not None and on_chain >= target.expected:
+            continue
+        mismatches.append(
+            BalanceMismatch(
+                target.address, target.token, target.expected, on_chain, target.escrow_ids
+            )
+        )
+    return mismatches
+
+
+async def fetch_balances(
+    client: Any,
+    tokens: TokenRegistry,
+    targets: list[AddressTarget],
+    multicall: str | None = None,
+) -> dict[tuple[str, Token], float | None]:
+    by_token: dict[Token, list[str]] = defaultdict(list)
+    for target in targets:
+        by_token[target.token].append(target.address)
+    balances: dict[tuple[str, Token], float | None] = {}
+    for token, addresses in by_token.items():
+        spec = tokens.for_token(token)
+        if spec is None:
+            continue
+        raw = await client.token_balances(spec.contract, addresses, multicall=multicall)
+        for address, value in raw.items():
+            balances[(address, token)] = None if value is None else spec.to_amount(value)
+    return balances
+
+
+async def publish_report(redis: Any, prefix: str, mismatches: list[BalanceMismatch]) -> None:
+    report = {
+        "checked_at": time.time(),
+        "mismatches": [mismatch.as_dict() for mismatch in mismatches],
+    }
+    await redis.set(f"{prefix}:reconcile:report", json.dumps(report))
+
+
+async def enqueue_rescans(redis: Any, prefix: str, mismatches: list[BalanceMismatch]) -> int:
+    # Only money we never recorded can be found by rescanning; other kinds need a human.
+    addresses = {m.address for m in mismatches if m.kind == "unrecorded_deposit"}
+    if addresses:
+        await redis.sadd(rescan_key(prefix), *addresses)
+    return len(addresses)
+
+
+async def claim_rescans(redis: Any, prefix: str, limit: int = 100) -> list[str]:
+    return await redis.spop(rescan_key(prefix), limit) or []
+
+
+def rescan_key(prefix: str) -> str:
+    return f"{prefix}:rescan"
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class BlockRef:
+    number: int
+    hash: str
+    parent_hash: str
+
+
+def parse_block_ref(result: dict[str, Any]) -> BlockRef:
+    return BlockRef(int(result["number"], 16), result["hash"], result["parentHash"])
+
+
+class BlockHashRing:
+    def __init__(self, size: int = 128) -> None:
+        self.size = size
+        self._hashes: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def get(self, number: int) -> str | None:
+        return self._hashes.get(number)
+
+    def latest(self) -> int | None:
+        return max(self._hashes, default=None)
+
+    def numbers(self) -> list[int]:
+        return sorted(self._hashes, reverse=True)
+
+    def record(self, number: int, block_hash: str) -> None:
+        self._hashes[number] = block_hash
+        while len(self._hashes) > self.size:
+            del self._hashes[min(self._hashes)]
+
+    def truncate(self, after: int) -> None:
+        self._hashes = {number: h for number, h in self._hashes.items() if number <= after}
+
+    def dumps(self) -> str:
+        return json.dumps({str(number): h for number, h in self._hashes.items()})
+
+    @classmethod
+    def loads(cls, data: str | None, size: int = 128) -> BlockHashRing:
+        ring = cls(size)
+        for number, block_hash in sorted((int(n), h) for n, h in json.loads(data or "{}").items()):
+            ring.record(number, block_hash)
+        return ring
+
+
+async def find_fork(
+    ring: BlockHashRing,
+    fetch_blocks: Callable[[list[int]], Awaitable[list[BlockRef]]],
+    window: int = 16,
+) -> int:
+    numbers = ring.numbers()
+    for start in range(0, len(numbers), window):
+        for block in await fetch_blocks(numbers[start : start + window]):
+            if block.hash == ring.get(block.number):
+                return block.number
+    oldest = min(ring.numbers())
+    logging.error("reorg deeper than the block hash ring, rewinding to %s", oldest - 1)
+    return oldest - 1
+
+
+async def detect_reorg(
+    ring: BlockHashRing,
+    head: BlockRef,
+    fetch_blocks: Callable[[list[int]], Awaitable[list[BlockRef]]],
+) -> int | None:
+    latest = ring.latest()
+    # A head at or below what we have seen is usually a lagging endpoint, not a reorg.
+    if latest is None or latest >= head.number:
+        return None
+    child = head if latest == head.number - 1 else (await fetch_blocks([latest + 1]))[0]
+    if child.parent_hash == ring.get(latest):
+        return None
+    return await find_fork(ring, fetch_blocks)
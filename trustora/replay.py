@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from redis.asyncio import Redis
+
+from trustora.backfill import run_backfill
+from trustora.chain_client import EvmChainClient, TransferLog
+from trustora.db import create_engine, create_session_factory
+from trustora.deposits import DepositMatch, EscrowRow
+from trustora.escrow import load_watched_deposits, preview_deposits
+from trustora.watcher import ChainWatcher
+
+
+@dataclass
+class ReplayStats:
+    started: float = field(default_factory=time.monotonic)
+    blocks: int = 0
+    logs: int = 0
+    matches: int = 0
+
+    def record(self, blocks: int, logs: int, matches: int) -> None:
+        self.blocks += blocks
+        self.logs += logs
+        self.matches += matches
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return (
+            f"replayed {self.blocks} blocks, {self.logs} logs, {self.matches} deposit matches "
+            f"in {elapsed:.1f}s ({self.blocks / elapsed:.1f} blocks/s, "
+            f"{self.logs / elapsed:.1f} logs/s)"
+        )
+
+
+def replay_parser(chain: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=f"Re-run {chain} deposit detection over a historical block range."
+    )
+    parser.add_argument("--from", dest="from_block", type=int, required=True, help="First block.")
+    parser.add_argument("--to", dest="to_block", type=int, help="Last block (default: head).")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel range fetches.")
+    parser.add_argument("--chunk", type=int, help="Initial blocks per getLogs request.")
+    parser.add_argument(
+        "--address",
+        action="append",
+        default=[],
+        help="Only replay transfers to this deposit address (repeatable).",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print what would change without writing."
+    )
+    return parser
+
+
+def format_diff(
+    rows: dict[uuid.UUID, EscrowRow],
+    updates: dict[uuid.UUID, dict[str, Any]],
+) -> list[str]:
+    lines = []
+    for escrow_id, values in updates.items():
+        row = rows[escrow_id]
+        lines.append(
+            f"{escrow_id} {row.deposit_address}: {row.status.value} -> {values['status'].value}, "
+            f"received {row.amount_received or 0.0} -> {values['amount_received']} "
+            f"(block {values['deposit_block']})"
+        )
+    return lines
+
+
+async def replay(
+    args: argparse.Namespace,
+    settings: Any,
+    build_client: Callable[[], EvmChainClient],
+    build_watcher: Callable[..., ChainWatcher],
+) -> None:
+    redis = Redis.from_url(settings.redis_url, decode_responses=True)
+    engine = create_engine(settings.database_url)
+    session_factory = create_session_factory(engine)
+    client = build_client()
+    watcher = build_watcher(settings, session_factory, redis, client)
+    index = watcher.index
+    try:
+        async with session_factory() as session:
+            rows = await load_watched_deposits(session, watcher.chain)
+        if args.address:
+            wanted = {index.normalize(address) for address in args.address}
+            rows = [row for row in rows if index.normalize(row[1]) in wanted]
+        index.replace(rows)
+        if not index:
+            logging.warning("no watched deposit addresses to replay")
+            return
+        head = await client.block_number()
+        to_block = head if args.to_block is None else min(args.to_block, head)
+        sizer = watcher.new_sizer(args.chunk)
+        stats = ReplayStats()
+        planned: list[DepositMatch] = []
+
+        async def apply(start: int, end: int, transfers: list[TransferLog]) -> None:
+            matches = watcher.match_transfers(transfers, head)
+            stats.record(end - start + 1, len(transfers), len(matches))
+            if args.dry_run:
+                planned.extend(matches)
+            else:
+                await watcher.apply_matches(matches)
+
+        async def checkpoint(block: int) -> None:
+            logging.info("replayed through block %s", block)
+
+        logging.info(
+            "replaying blocks %s-%s for %s addresses", args.from_block, to_block, len(index)
+        )
+        # The scan cursor is left alone; matching and applying are idempotent.
+        applied_to = await run_backfill(
+            args.from_block,
+            to_block,
+            watcher.fetch_transfers,
+            apply,
+            checkpoint,
+            sizer,
+            concurrency=args.workers,
+        )
+        if applied_to < to_block:
+            logging.error("replay stopped after block %s", applied_to)
+        if args.dry_run:
+            planned.sort(key=lambda match: (match.block_number, match.log_index))
+            async with session_factory() as session:
+                rows, updates, _, _ = await preview_deposits(
+                    session, watcher.chain, planned, watcher.confirmations_required
+                )
+            for line in format_diff(rows, updates):
+                print(line)
+            print(f"{len(updates)} escrows would change")
+        print(stats.summary())
+    finally:
+        await client.aclose()
+        await redis.aclose()
+        await engine.dispose()
@@ -1,11 +1,55 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from typing import Any
 
 import httpx
 
+ERROR_DECAY = 0.1
+WRITE_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction"})
+# Per-item codes providers use for rate limits inside an otherwise successful batch.
+RETRYABLE_CODES = frozenset({-32005, -32029, 429})
+
+
+class RpcError(RuntimeError):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+
+
+@dataclass
+class EndpointHealth:
+    url: str
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    error_rate: float = 0.0
+    head: int | None = None
+    lagging: bool = False
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.error_rate *= 1 - ERROR_DECAY
+
+    def record_error(self) -> None:
+        self.error_rate = self.error_rate * (1 - ERROR_DECAY) + ERROR_DECAY
+
+    def percentile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def score(self) -> float:
+        if self.lagging:
+            return math.inf
+        # Unmeasured endpoints score 0 so they get probed by real traffic.
+        return (self.percentile(0.5) or 0.0) * (1 + 10 * self.error_rate) + self.error_rate
+
 
 @dataclass
 class RpcClient:
@@ -13,17 +57,209 @@ class RpcClient:
     timeout: float = 10.0
     max_retries: int = 3
     backoff_seconds: float = 0.5
+    max_connections: int = 20
+    hedge_min_delay: float = 0.05
+    hedge_default_delay: float = 1.0
+    max_head_lag: int = 5
+    head_refresh_seconds: float = 15.0
+    head_method: str | None = "eth_blockNumber"
+    max_batch_size: int = 100
+    _client: httpx.AsyncClient | None = field(default=None, init=False, repr=False)
+    _ids: itertools.count = field(default_factory=itertools.count, init=False, repr=False)
+    _endpoints: list[EndpointHealth] = field(default_factory=list, init=False, repr=False)
+    _heads_checked_at: float = field(default=0.0, init=False, repr=False)
+    _heads_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._endpoints = [EndpointHealth(url) for url in self.urls]
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    def ranked(self) -> list[EndpointHealth]:
+        return sorted(self._endpoints, key=lambda endpoint: endpoint.score())
+
+    def update_heads(self, heads: dict[str, int]) -> None:
+        if not heads:
+            return
+        best = max(heads.values())
+        for endpoint in self._endpoints:
+            if endpoint.url not in heads:
+                continue
+            endpoint.head = heads[endpoint.url]
+            lagging = best - endpoint.head > self.max_head_lag
+            if lagging and not endpoint.lagging:
+                logging.warning("ejecting %s: %s blocks behind", endpoint.url, best - endpoint.head)
+            endpoint.lagging = lagging
 
-    async def post(self, payload: dict[str, Any]) -> dict[str, Any]:
+    async def _send(self, endpoint: EndpointHealth, payload: Any, path: str = "") -> Any:
+        url = f"{endpoint.url.rstrip('/')}/{path}" if path else endpoint.url
+        started = time.monotonic()
+        try:
+            response = await self._http().post(url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            endpoint.record_error()
+            raise
+        endpoint.record_success(time.monotonic() - started)
+        return data
+
+    async def _hedged(
+        self, primary: EndpointHealth, backup: EndpointHealth, payload: Any, path: str = ""
+    ) -> Any:
+        delay = max(self.hedge_min_delay, primary.percentile(0.95) or self.hedge_default_delay)
+        first = asyncio.ensure_future(self._send(primary, payload, path))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        pending = {first, asyncio.ensure_future(self._send(backup, payload, path))}
+        last_exc: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_exc = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise RuntimeError("hedged RPC request failed") from last_exc
+
+    async def post(self, payload: Any, hedge: bool = False, path: str = "") -> Any:
         last_exc: Exception | None = None
         for attempt in range(self.max_retries):
-            for url in self.urls:
+            ranked = self.ranked()
+            if hedge and len(ranked) > 1:
                 try:
-                    async with httpx.AsyncClient(timeout=self.timeout) as client:
-                        response = await client.post(url, json=payload)
-                        response.raise_for_status()
-                        return response.json()
+                    return await self._hedged(ranked[0], ranked[1], payload, path)
+                except Exception as exc:  # pragma: no cover - network behavior
+                    last_exc = exc
+                ranked = ranked[1:]
+            for endpoint in ranked:
+                try:
+                    return await self._send(endpoint, payload, path)
                 except Exception as exc:  # pragma: no cover - network behavior
                     last_exc = exc
             await asyncio.sleep(self.backoff_seconds * (attempt + 1))
         raise RuntimeError("RPC request failed") from last_exc
+
+    async def call(self, method: str, params: list[Any] | None = None) -> Any:
+        self._maybe_refresh_heads()
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params or [],
+        }
+        data = await self.post(payload, hedge=method not in WRITE_METHODS)
+        if data.get("error"):
+            error = data["error"]
+            raise RpcError(int(error.get("code", 0)), str(error.get("message", "")))
+        return data.get("result")
+
+    async def batch(self, calls: list[tuple[str, list[Any]]]) -> list[Any]:
+        self._maybe_refresh_heads()
+        results: list[Any] = [None] * len(calls)
+        pending = list(range(len(calls)))
+        for attempt in range(self.max_retries):
+            size = self.max_batch_size
+            chunks = [pending[i : i + size] for i in range(0, len(pending), size)]
+            retries = await asyncio.gather(
+                *(self._batch_chunk(calls, chunk, results) for chunk in chunks)
+            )
+            pending = [index for retry in retries for index in retry]
+            if not pending:
+                break
+            await asyncio.sleep(self.backoff_seconds * (attempt + 1))
+        for index in pending:
+            if results[index] is None:
+                results[index] = RpcError(0, "no response for batched call")
+        return results
+
+    async def _batch_chunk(
+        self,
+        calls: list[tuple[str, list[Any]]],
+        indexes: list[int],
+        results: list[Any],
+    ) -> list[int]:
+        ids = {next(self._ids): index for index in indexes}
+        payload = [
+            {"jsonrpc": "2.0", "id": rpc_id, "method": calls[index][0], "params": calls[index][1]}
+            for rpc_id, index in ids.items()
+        ]
+        hedge = all(calls[index][0] not in WRITE_METHODS for index in indexes)
+        data = await self.post(payload, hedge=hedge)
+        if not isinstance(data, list):
+            # A single error object means the provider rejected the batch as a whole (usually
+            # too large); shrink the batch size for later calls and split this one.
+            if len(indexes) == 1:
+                error = (data or {}).get("error") or {}
+                results[indexes[0]] = RpcError(
+                    int(error.get("code", 0)), str(error.get("message", ""))
+                )
+                return []
+            middle = len(indexes) // 2
+            self.max_batch_size = max(1, min(self.max_batch_size, middle))
+            first, second = await asyncio.gather(
+                self._batch_chunk(calls, indexes[:middle], results),
+                self._batch_chunk(calls, indexes[middle:], results),
+            )
+            return first + second
+        responses = {item.get("id"): item for item in data if isinstance(item, dict)}
+        retry = []
+        for rpc_id, index in ids.items():
+            item = responses.get(rpc_id)
+            if item is None:
+                retry.append(index)
+            elif item.get("error"):
+                error = item["error"]
+                code = int(error.get("code", 0))
+                results[index] = RpcError(code, str(error.get("message", "")))
+                if code in RETRYABLE_CODES:
+                    retry.append(index)
+            else:
+                results[index] = item.get("result")
+        return retry
+
+    async def refresh_heads(self) -> None:
+        payload = {"jsonrpc": "2.0", "id": 0, "method": self.head_method, "params": []}
+        results = await asyncio.gather(
+            *(self._send(endpoint, payload) for endpoint in self._endpoints),
+            return_exceptions=True,
+        )
+        heads = {
+            endpoint.url: int(result["result"], 16)
+            for endpoint, result in zip(self._endpoints, results, strict=True)
+            if isinstance(result, dict) and result.get("result")
+        }
+        self.update_heads(heads)
+
+    def _maybe_refresh_heads(self) -> None:
+        if self.head_method is None or len(self._endpoints) < 2:
+            return
+        if self._heads_task is not None and not self._heads_task.done():
+            return
+        now = time.monotonic()
+        if now - self._heads_checked_at < self.head_refresh_seconds:
+            return
+        self._heads_checked_at = now
+        self._heads_task = asyncio.ensure_future(self.refresh_heads())
+
+    async def aclose(self) -> None:
+        if self._heads_task is not None:
+            self._heads_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
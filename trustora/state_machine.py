@@ -1,11 +1,8 @@
 from __future__ import annotations
 
-from typing import Dict, Set
-
 from trustora.enums import EscrowStatus
 
-
-ALLOWED_TRANSITIONS: Dict[EscrowStatus, Set[EscrowStatus]] = {
+ALLOWED_TRANSITIONS: dict[EscrowStatus, set[EscrowStatus]] = {
     EscrowStatus.CREATED: {EscrowStatus.AWAITING_DEPOSIT, EscrowStatus.CANCELLED},
     EscrowStatus.AWAITING_DEPOSIT: {
         EscrowStatus.DEPOSIT_SEEN,
@@ -13,6 +10,7 @@ ALLOWED_TRANSITIONS: Dict[EscrowStatus, Set[EscrowStatus]] = {
         EscrowStatus.CANCELLED,
     },
     EscrowStatus.DEPOSIT_SEEN: {
+        EscrowStatus.AWAITING_DEPOSIT,
         EscrowStatus.FUNDS_LOCKED,
         EscrowStatus.UNDERPAID,
         EscrowStatus.OVERPAID_REVIEW,
@@ -26,7 +24,7 @@ ALLOWED_TRANSITIONS: Dict[EscrowStatus, Set[EscrowStatus]] = {
     EscrowStatus.RELEASE_REQUESTED: {EscrowStatus.RELEASE_APPROVED, EscrowStatus.DISPUTED},
     EscrowStatus.RELEASE_APPROVED: {EscrowStatus.PAYOUT_QUEUED},
     EscrowStatus.PAYOUT_QUEUED: {EscrowStatus.PAYOUT_SENT, EscrowStatus.PAYOUT_FAILED},
-    EscrowStatus.PAYOUT_SENT: {EscrowStatus.COMPLETED},
+    EscrowStatus.PAYOUT_SENT: {EscrowStatus.COMPLETED, EscrowStatus.PAYOUT_FAILED},
     EscrowStatus.COMPLETED: {EscrowStatus.REVIEW},
     EscrowStatus.DISPUTED: {EscrowStatus.REVIEW, EscrowStatus.RELEASE_APPROVED},
     EscrowStatus.REVIEW: {EscrowStatus.COMPLETED},
@@ -39,3 +37,11 @@ ALLOWED_TRANSITIONS: Dict[EscrowStatus, Set[EscrowStatus]] = {
 def validate_transition(current: EscrowStatus, target: EscrowStatus) -> None:
     if target not in ALLOWED_TRANSITIONS.get(current, set()):
         raise ValueError(f"Invalid transition {current} -> {target}")
+
+
+def deposit_outcome(amount_received: float, amount_expected: float) -> EscrowStatus:
+    if amount_received < amount_expected:
+        return EscrowStatus.UNDERPAID
+    if amount_received > amount_expected:
+        return EscrowStatus.OVERPAID_REVIEW
+    return EscrowStatus.FUNDS_LOCKED
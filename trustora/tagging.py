@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import random
+import uuid
+from typing import Any
+
+from trustora.enums import Chain
+
+PENDING_TAG = "pending"
+
+# A reservation belongs to its escrow from the first event on and no longer expires.
+BIND_TAG_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[2] and owner ~= ARGV[1] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+return 1
+"""
+
+# A freed amount stays blocked for a while so a late transfer cannot credit the next escrow.
+RELEASE_TAG_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('SET', KEYS[1], 'released', 'EX', ARGV[2])
+  return 1
+end
+return 0
+"""
+
+
+def amount_key(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def tagged_amount(amount: float, tag: int) -> float:
+    return round(amount + tag / 100, 2)
+
+
+def tag_key(chain: Chain, address: str, amount: float) -> str:
+    return f"deposit_tag:{chain.value}:{address}:{amount_key(amount)}"
+
+
+async def reserve_tagged_amount(
+    redis: Any,
+    chain: Chain,
+    addresses: list[str],
+    amount: float,
+    pending_ttl_seconds: int,
+    max_tag: int = 99,
+) -> tuple[str, float]:
+    tags = list(range(1, max_tag + 1))
+    # Random starting points keep concurrent allocations from racing for the same keys.
+    offset = random.randrange(max_tag)
+    for address in random.sample(addresses, len(addresses)):
+        for tag in tags[offset:] + tags[:offset]:
+            candidate = tagged_amount(amount, tag)
+            key = tag_key(chain, address, candidate)
+            # Unclaimed reservations expire in case the escrow is never created.
+            if await redis.set(key, PENDING_TAG, nx=True, ex=pending_ttl_seconds):
+                return address, candidate
+    raise RuntimeError("No free amount tags on shared deposit addresses")
+
+
+async def bind_tagged_amount(
+    redis: Any, chain: Chain, address: str, amount: float, escrow_id: uuid.UUID
+) -> bool:
+    script = redis.register_script(BIND_TAG_SCRIPT)
+    key = tag_key(chain, address, amount)
+    return bool(await script(keys=[key], args=[str(escrow_id), PENDING_TAG]))
+
+
+async def release_tagged_amount(
+    redis: Any,
+    chain: Chain,
+    address: str,
+    amount: float,
+    escrow_id: uuid.UUID,
+    cooldown_seconds: float,
+) -> bool:
+    script = redis.register_script(RELEASE_TAG_SCRIPT)
+    key = tag_key(chain, address, amount)
+    return bool(await script(keys=[key], args=[str(escrow_id), int(cooldown_seconds)]))
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from decimal import Decimal
+
+from trustora.enums import Chain, Token
+
+
+@dataclass(frozen=True)
+class TokenSpec:
+    token: Token
+    chain: Chain
+    contract: str
+    decimals: int
+
+    def to_amount(self, raw: int) -> float:
+        return round(raw / 10**self.decimals, 2)
+
+    def to_raw(self, amount: float) -> int:
+        # Via the decimal string so float error cannot shave a raw unit off, e.g. 0.29 * 10**6.
+        return round(Decimal(str(amount)) * 10**self.decimals)
+
+
+class TokenRegistry:
+    def __init__(self, specs: Iterable[TokenSpec], normalize: Callable[[str], str] = str) -> None:
+        self.normalize = normalize
+        self._by_contract = {normalize(spec.contract): spec for spec in specs}
+
+    def __len__(self) -> int:
+        return len(self._by_contract)
+
+    def contracts(self) -> list[str]:
+        return [spec.contract for spec in self._by_contract.values()]
+
+    def by_contract(self, contract: str) -> TokenSpec | None:
+        return self._by_contract.get(self.normalize(contract))
+
+    def for_token(self, token: Token) -> TokenSpec | None:
+        return next((spec for spec in self._by_contract.values() if spec.token == token), None)
+
+
+def build_token_registry(
+    chain: Chain,
+    contracts: dict[Token, tuple[str, int]],
+    normalize: Callable[[str], str] = str,
+) -> TokenRegistry:
+    return TokenRegistry(
+        (
+            TokenSpec(token, chain, contract, decimals)
+            for token, (contract, decimals) in contracts.items()
+            if contract
+        ),
+        normalize=normalize,
+    )
@@ -0,0 +1,512 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import replace
+from datetime import UTC, datetime
+from typing import Any
+
+from trustora.address_index import DepositAddressIndex
+from trustora.backfill import ChunkSizer, run_backfill
+from trustora.chain_client import TransferLog
+from trustora.confirmations import ConfirmationTracker
+from trustora.db import session_scope
+from trustora.deposits import DepositMatch
+from trustora.enums import Chain, EscrowStatus
+from trustora.escrow import (
+    apply_deposit_matches,
+    apply_payout_updates,
+    confirm_deposits,
+    load_pending_deposits,
+    load_reconcile_targets,
+    load_sent_payouts,
+    load_watched_deposits,
+    remove_deposit_transfer,
+    rollback_deposits,
+)
+from trustora.events import follow_escrow_events, publish_escrow_events
+from trustora.heads import HeadTracker
+from trustora.leases import Lease, RangeCoordinator, replica_id
+from trustora.payout_receipts import plan_payout_updates
+from trustora.quarantine import DepositQuarantine, entry_key
+from trustora.reconcile import (
+    claim_rescans,
+    diff_balances,
+    enqueue_rescans,
+    fetch_balances,
+    group_targets,
+    publish_report,
+)
+from trustora.reorg import BlockHashRing, BlockRef, detect_reorg
+
+
+class ChainWatcher:
+    def __init__(
+        self,
+        settings: Any,
+        session_factory: Any,
+        redis: Any,
+        client: Any,
+        chain: Chain,
+        prefix: str,
+        confirmations_required: int,
+        index: DepositAddressIndex,
+        multicall: str | None = None,
+        topic_filter_concurrency: int = 8,
+    ) -> None:
+        self.settings = settings
+        self.session_factory = session_factory
+        self.redis = redis
+        self.client = client
+        self.chain = chain
+        self.prefix = prefix
+        self.confirmations_required = confirmations_required
+        self.index = index
+        self.multicall = multicall
+        self.topic_filter_concurrency = topic_filter_concurrency
+        self.last_block_key = f"{prefix}:last_block"
+        self.pushed_blocks_key = f"{prefix}:pushed_blocks"
+        self.sizer = self.new_sizer()
+        self.tracker = ConfirmationTracker(resync_seconds=settings.rescan_interval_seconds)
+        self.quarantine = DepositQuarantine(
+            redis,
+            prefix,
+            base_delay_seconds=settings.quarantine_base_delay_seconds,
+            max_attempts=settings.quarantine_max_attempts,
+        )
+        self.coordinator: RangeCoordinator | None = None
+        self.confirmations_lease: Lease | None = None
+        self.reconcile_lease: Lease | None = None
+        self.payouts_lease: Lease | None = None
+        heads_lease = None
+        if settings.sharded:
+            owner = replica_id()
+            ttl = settings.lease_ttl_seconds
+            heads_lease = Lease(redis, f"{prefix}:lease:heads", owner, ttl_seconds=ttl)
+            self.coordinator = RangeCoordinator(
+                redis, prefix, self.last_block_key, owner, ttl_seconds=ttl
+            )
+            self.confirmations_lease = Lease(
+                redis, f"{prefix}:lease:confirmations", owner, ttl_seconds=ttl
+            )
+            self.reconcile_lease = Lease(
+                redis,
+                f"{prefix}:lease:reconcile",
+                owner,
+                ttl_seconds=2 * settings.reconcile_interval_seconds,
+            )
+            self.payouts_lease = Lease(
+                redis,
+                f"{prefix}:lease:payouts",
+                owner,
+                ttl_seconds=2 * settings.payout_poll_seconds,
+            )
+        self.heads = HeadTracker(
+            redis, chain, client, poll_seconds=settings.head_poll_seconds, lease=heads_lease
+        )
+
+    def new_sizer(self, size: int | None = None) -> ChunkSizer:
+        return ChunkSizer(
+            size=size or self.settings.backfill_chunk_blocks,
+            max_size=self.settings.backfill_max_chunk_blocks,
+        )
+
+    def start(self) -> list[asyncio.Task[None]]:
+        return [
+            asyncio.create_task(self.heads.run()),
+            asyncio.create_task(
+                follow_escrow_events(self.redis, self.apply_event, on_reconnect=self.mark_stale)
+            ),
+            asyncio.create_task(self.confirmation_loop()),
+            asyncio.create_task(self.quarantine_loop()),
+            asyncio.create_task(self.reconcile_loop()),
+            asyncio.create_task(self.payout_loop()),
+        ]
+
+    def apply_event(self, event: dict[str, Any]) -> None:
+        self.index.apply_event(event)
+        # Deposits recorded by other replicas reach the confirmation leader without a resync.
+        if event.get("chain") == self.chain.value:
+            self.tracker.apply_event(event)
+
+    def mark_stale(self) -> None:
+        self.index.mark_stale()
+        self.tracker.mark_stale()
+
+    def scan_interval(self) -> float:
+        return self.settings.scan_interval_seconds
+
+    async def run(self) -> None:
+        tasks = self.start()
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    if self.coordinator is not None:
+                        await self.scan_sharded(self.coordinator)
+                    else:
+                        await self.scan_once()
+                except Exception as exc:  # pragma: no cover
+                    logging.error("scan error: %s", exc)
+                logging.info("scan cycle took %.3fs", time.monotonic() - started)
+                await asyncio.sleep(self.scan_interval())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def sync_index(self) -> None:
+        async with self.session_factory() as session:
+            self.index.replace(await load_watched_deposits(session, self.chain))
+        logging.info("deposit index resynced: %s addresses", len(self.index))
+
+    async def scan_once(self) -> None:
+        if self.index.is_stale():
+            chain_head, last_block, _ = await asyncio.gather(
+                self.heads.current(), self.redis.get(self.last_block_key), self.sync_index()
+            )
+        else:
+            chain_head, last_block = await asyncio.gather(
+                self.heads.current(), self.redis.get(self.last_block_key)
+            )
+        head = chain_head.block_ref()
+        latest_block = head.number
+        fork = await self.handle_reorg(head)
+        if last_block is None:
+            from_block = max(0, latest_block - self.settings.initial_lookback_blocks)
+        else:
+            from_block = int(last_block) + 1
+        if fork is not None:
+            from_block = min(from_block, fork + 1)
+        to_block = latest_block
+        if from_block > to_block:
+            return
+
+        if not self.index:
+            await self.redis.set(self.last_block_key, to_block)
+            return
+
+        async def apply(start: int, end: int, transfers: list[TransferLog]) -> None:
+            await self.apply_transfers(transfers, latest_block)
+
+        async def checkpoint(block: int) -> None:
+            await self.redis.set(self.last_block_key, block)
+
+        if to_block - from_block >= self.settings.backfill_chunk_blocks:
+            logging.info("catching up %s blocks from %s", to_block - from_block + 1, from_block)
+        await run_backfill(
+            from_block,
+            to_block,
+            self.fetch_transfers,
+            apply,
+            checkpoint,
+            self.sizer,
+            concurrency=self.settings.backfill_concurrency,
+        )
+
+    async def scan_sharded(self, coordinator: RangeCoordinator) -> None:
+        if self.index.is_stale():
+            chain_head, _ = await asyncio.gather(self.heads.current(), self.sync_index())
+        else:
+            chain_head = await self.heads.current()
+        head = chain_head.block_ref()
+        latest_block = head.number
+        reorg_lease = Lease(
+            self.redis,
+            f"{self.prefix}:lease:reorg",
+            coordinator.owner,
+            ttl_seconds=coordinator.ttl_seconds,
+        )
+        if await reorg_lease.hold():
+            fork = await self.handle_reorg(head)
+            if fork is not None:
+                await coordinator.rewind(fork)
+        start_block = max(0, latest_block - self.settings.initial_lookback_blocks)
+        await self.redis.set(self.last_block_key, start_block - 1, nx=True)
+
+        async def worker() -> None:
+            while (claimed := await coordinator.claim(latest_block, self.sizer.size)) is not None:
+                start, end = claimed
+                try:
+                    async with coordinator.holding(start):
+                        transfers = await self.fetch_transfers(start, end)
+                        await self.apply_transfers(transfers, latest_block)
+                except Exception:
+                    self.sizer.on_error()
+                    raise
+                self.sizer.on_success(end - start + 1, len(transfers))
+                await coordinator.complete(start, end)
+
+        results = await asyncio.gather(
+            *(worker() for _ in range(self.settings.backfill_concurrency)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logging.error("range worker error: %s", result)
+
+    async def fetch_transfers(self, start: int, end: int) -> list[TransferLog]:
+        return await self.fetch_recipients(start, end, self.index.addresses())
+
+    async def fetch_recipients(
+        self, start: int, end: int, recipients: list[str] | None
+    ) -> list[TransferLog]:
+        return await self.client.get_transfers(
+            start,
+            end,
+            self.settings.tokens.contracts(),
+            recipients=recipients,
+            topic_chunk_size=self.settings.topic_filter_chunk_size,
+            max_concurrency=self.topic_filter_concurrency,
+        )
+
+    async def handle_reorg(self, head: BlockRef) -> int | None:
+        ring_key = f"{self.prefix}:block_hashes"
+        ring = BlockHashRing.loads(await self.redis.get(ring_key), self.settings.reorg_ring_size)
+        # Blocks that delivered deposits ahead of the scan must be covered by the fork check.
+        pushed = await self.redis.hgetall(self.pushed_blocks_key)
+        for number, block_hash in sorted((int(n), h) for n, h in pushed.items()):
+            ring.record(number, block_hash)
+        fork = await detect_reorg(ring, head, self.client.get_block_refs)
+        if fork is not None:
+            logging.warning("reorg detected below block %s, rewinding to %s", head.number, fork)
+            async with session_scope(self.session_factory) as session:
+                rolled_back = await rollback_deposits(session, self.chain, fork)
+            await self.publish_rollback(rolled_back)
+            ring.truncate(fork)
+        ring.record(head.number, head.hash)
+        await self.redis.set(ring_key, ring.dumps())
+        if pushed:
+            await self.redis.hdel(self.pushed_blocks_key, *pushed)
+        return fork
+
+    async def record_pushed_block(self, number: int, block_hash: str) -> None:
+        await self.redis.hset(self.pushed_blocks_key, str(number), block_hash)
+
+    async def rollback_transfer(self, transfer: TransferLog) -> None:
+        async with session_scope(self.session_factory) as session:
+            rolled_back = await remove_deposit_transfer(
+                session, self.chain, transfer.tx_hash, transfer.log_index
+            )
+        await self.publish_rollback(rolled_back)
+
+    async def publish_rollback(self, rolled_back: list[Any]) -> None:
+        for escrow in rolled_back:
+            logging.warning("deposit for %s rolled back by reorg", escrow.id)
+            if escrow.status == EscrowStatus.DEPOSIT_SEEN:
+                self.tracker.track(escrow.id, escrow.deposit_block)
+            else:
+                self.tracker.forget(escrow.id)
+            self.apply_status(escrow)
+        await publish_escrow_events(self.redis, rolled_back)
+
+    def apply_status(self, escrow: Any) -> None:
+        self.index.apply_status(
+            escrow.deposit_address,
+            escrow.id,
+            escrow.amount_expected,
+            escrow.status,
+            escrow.token,
+            escrow.amount_tagged,
+        )
+
+    async def apply_transfers(self, transfers: list[TransferLog], head: int) -> None:
+        await self.apply_matches(self.match_transfers(transfers, head))
+
+    def match_transfers(self, transfers: list[TransferLog], head: int) -> list[DepositMatch]:
+        matches = []
+        for transfer in transfers:
+            spec = self.settings.tokens.by_contract(transfer.contract)
+            if spec is None:
+                continue
+            amount = spec.to_amount(transfer.amount_raw)
+            watched = self.index.get(transfer.to_address, amount)
+            # The same deposit address may receive other tokens; only the escrow's token counts.
+            if watched is None or watched.token != spec.token:
+                continue
+            matches.append(
+                DepositMatch(
+                    escrow_id=watched.escrow_id,
+                    tx_hash=transfer.tx_hash,
+                    amount=amount,
+                    block_number=transfer.block_number,
+                    confirmations=max(0, head - transfer.block_number),
+                    log_index=transfer.log_index,
+                )
+            )
+        return matches
+
+    async def apply_matches(
+        self, matches: list[DepositMatch], attempts: dict[str, int] | None = None
+    ) -> set[str]:
+        if not matches:
+            return set()
+        applied, locked, failed = await apply_deposit_matches(
+            self.session_factory,
+            self.chain,
+            matches,
+            self.confirmations_required,
+            batch_size=self.settings.apply_batch_size,
+        )
+        for row, _ in applied:
+            self.apply_status(row)
+            if row.status == EscrowStatus.DEPOSIT_SEEN:
+                self.tracker.track(row.id, row.deposit_block)
+        await publish_escrow_events(self.redis, [row for row, _ in applied], self.chain)
+        # Matches that cannot be applied now are retried with backoff; the cursor moves on.
+        attempts = attempts or {}
+        failures = [(match, "row locked by another transaction") for match in locked] + failed
+        await self.quarantine.add(
+            [(match, attempts.get(entry_key(match), 0) + 1, error) for match, error in failures]
+        )
+        return {entry_key(match) for match, _ in failures}
+
+    async def quarantine_loop(self) -> None:
+        while True:
+            try:
+                await self.retry_quarantined()
+            except Exception as exc:  # pragma: no cover
+                logging.error("quarantine retry error: %s", exc)
+            await asyncio.sleep(self.settings.quarantine_poll_seconds)
+
+    async def retry_quarantined(self) -> None:
+        claimed = await self.quarantine.claim_due()
+        if not claimed:
+            return
+        head = (await self.heads.current()).latest
+        matches = [
+            replace(match, confirmations=max(0, head - match.block_number)) for match, _ in claimed
+        ]
+        attempts = {entry_key(match): count for match, count in claimed}
+        requarantined = await self.apply_matches(matches, attempts)
+        await self.quarantine.resolve([m for m in matches if entry_key(m) not in requarantined])
+
+    async def payout_loop(self) -> None:
+        while True:
+            try:
+                if self.payouts_lease is None or await self.payouts_lease.hold():
+                    await self.track_payouts()
+            except Exception as exc:  # pragma: no cover
+                logging.error("payout tracking error: %s", exc)
+            await asyncio.sleep(self.settings.payout_poll_seconds)
+
+    async def track_payouts(self) -> None:
+        async with self.session_factory() as session:
+            payouts = await load_sent_payouts(session, self.chain)
+        if not payouts:
+            return
+        head = await self.heads.current()
+        lookups = await self.client.get_transaction_lookups([payout.tx_hash for payout in payouts])
+        updates = plan_payout_updates(
+            payouts,
+            lookups,
+            head.latest,
+            head.finalized if self.settings.confirm_by_finality else None,
+            self.confirmations_required,
+            self.settings.payout_drop_seconds,
+            # Stored timestamps are naive UTC.
+            datetime.now(UTC).replace(tzinfo=None),
+        )
+        async with session_scope(self.session_factory) as session:
+            finished = await apply_payout_updates(session, updates)
+        for escrow in finished:
+            logging.info("payout for %s is now %s", escrow.id, escrow.status.value)
+        await publish_escrow_events(self.redis, finished)
+
+    async def reconcile_loop(self) -> None:
+        if not self.settings.reconcile_interval_seconds:
+            return
+        while True:
+            try:
+                if self.reconcile_lease is None or await self.reconcile_lease.hold():
+                    await self.reconcile()
+                await self.rescan_addresses()
+            except Exception as exc:  # pragma: no cover
+                logging.error("reconciliation error: %s", exc)
+            await asyncio.sleep(self.settings.reconcile_interval_seconds)
+
+    async def reconcile(self) -> None:
+        started = time.monotonic()
+        async with self.session_factory() as session:
+            targets = group_targets(await load_reconcile_targets(session, self.chain))
+        balances = await fetch_balances(self.client, self.settings.tokens, targets, self.multicall)
+        mismatches = diff_balances(targets, balances, self.settings.reconcile_tolerance)
+        for mismatch in mismatches:
+            logging.warning(
+                "%s on %s (%s): recorded %s, on chain %s",
+                mismatch.kind,
+                mismatch.address,
+                mismatch.token.value,
+                mismatch.expected,
+                mismatch.on_chain,
+            )
+        await publish_report(self.redis, self.prefix, mismatches)
+        if self.settings.reconcile_rescan:
+            await enqueue_rescans(self.redis, self.prefix, mismatches)
+        logging.info(
+            "reconciled %s addresses in %.3fs: %s mismatches",
+            len(targets),
+            time.monotonic() - started,
+            len(mismatches),
+        )
+
+    async def rescan_addresses(self) -> None:
+        addresses = await claim_rescans(self.redis, self.prefix)
+        if not addresses:
+            return
+        head = (await self.heads.current()).latest
+        start_block = max(0, head - self.settings.reconcile_rescan_blocks)
+        logging.info("rescanning %s addresses from block %s", len(addresses), start_block)
+
+        async def fetch(start: int, end: int) -> list[TransferLog]:
+            return await self.fetch_recipients(start, end, addresses)
+
+        async def apply(start: int, end: int, transfers: list[TransferLog]) -> None:
+            await self.apply_transfers(transfers, head)
+
+        async def checkpoint(block: int) -> None:
+            pass
+
+        await run_backfill(
+            start_block,
+            head,
+            fetch,
+            apply,
+            checkpoint,
+            self.new_sizer(),
+            concurrency=self.settings.backfill_concurrency,
+        )
+
+    async def confirmation_loop(self) -> None:
+        lease = self.confirmations_lease
+        while True:
+            try:
+                if lease is None or await lease.renew():
+                    await self.track_confirmations()
+                elif await lease.acquire():
+                    # Other replicas may have recorded deposits while we were not the leader.
+                    self.tracker.mark_stale()
+                    await self.track_confirmations()
+            except Exception as exc:  # pragma: no cover
+                logging.error("confirmation error: %s", exc)
+            await asyncio.sleep(self.settings.confirmation_poll_seconds)
+
+    async def track_confirmations(self) -> None:
+        if self.tracker.is_stale():
+            async with self.session_factory() as session:
+                self.tracker.replace(await load_pending_deposits(session, self.chain))
+        if not self.tracker:
+            return
+        head = await self.heads.current()
+        required = self.confirmations_required
+        finalized = head.finalized if self.settings.confirm_by_finality else None
+        confirmations = self.tracker.confirmations(head.latest, finalized, required)
+        async with session_scope(self.session_factory) as session:
+            promoted = await confirm_deposits(session, confirmations, required)
+        for escrow_id, count in confirmations.items():
+            if count >= required:
+                self.tracker.forget(escrow_id)
+        for escrow in promoted:
+            logging.info("deposit confirmed for %s: %s", escrow.id, escrow.status.value)
+            self.apply_status(escrow)
+        await publish_escrow_events(self.redis, promoted)